@@ -0,0 +1,61 @@
+"""Benchmark the logging of comparison plot data with many observations.
+
+The criterion function returns precomputed likelihood contributions as comparison plot
+data, such that the measured time is spent on logging. The time per evaluation and the
+size of the database are measured for different ``log_options``. Run it with
+``python benchmarks/comparison_plot_logging.py``.
+
+"""
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pandas as pd
+
+from estimagic.decorators import log_evaluation
+from estimagic.logging.create_database import prepare_database
+from estimagic.logging.update_database import flush_buffer
+
+
+def time_per_evaluation(path, n_obs, n_evaluations, log_options):
+    params = pd.DataFrame({"name": ["mu", "sigma"], "value": [0.5, 1.5]})
+    contributions = pd.DataFrame({"value": np.random.normal(size=n_obs)})
+    database = prepare_database(
+        path, params, comparison_plot_data=contributions, **log_options
+    )
+    tables = ["params_history", "criterion_history", "comparison_plot", "timestamps"]
+
+    # the criterion value decreases such that each evaluation is an improvement.
+    criterion_values = iter(range(n_evaluations, 0, -1))
+
+    @log_evaluation(database=database, tables=tables)
+    def criterion(params):
+        return float(next(criterion_values)), contributions
+
+    start = time.perf_counter()
+    for _ in range(n_evaluations):
+        criterion(params)
+    flush_buffer(database)
+    return (time.perf_counter() - start) / n_evaluations
+
+
+def main():
+    settings = {
+        "values": {},
+        "every 10th": {"comparison_plot_every": 10},
+        "summary": {"comparison_plot_storage": "summary"},
+        "histogram": {"comparison_plot_storage": "histogram"},
+    }
+    with TemporaryDirectory() as tmp:
+        for label, log_options in settings.items():
+            path = Path(tmp) / f"{label}.db"
+            seconds = time_per_evaluation(path, 200_000, 100, log_options)
+            print(
+                f"{label:<11} {seconds * 1e3:6.1f}ms per evaluation  "
+                f"{path.stat().st_size / 1e6:6.1f}MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
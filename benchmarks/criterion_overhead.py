@@ -0,0 +1,82 @@
+"""Benchmark the overhead of estimagic per criterion evaluation.
+
+The criterion function is so cheap that the measured time is almost entirely spent in
+estimagic, i.e. in the reparametrization, the construction of params DataFrames and
+logging. Logging is measured with and without write buffer and with logging of only
+every 100th evaluation. Run it with
+``python benchmarks/criterion_overhead.py``.
+
+"""
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pandas as pd
+
+from estimagic.optimization.optimize import minimize
+
+
+def sum_of_squares(params):
+    return (params["value"].to_numpy() ** 2).sum()
+
+
+def sum_of_squares_np(x):
+    return (x ** 2).sum()
+
+
+def time_per_evaluation(criterion, n_params, general_options, logging, log_options):
+    params = pd.DataFrame(
+        {"value": np.linspace(1, 2, n_params), "lower": -5.0, "upper": 5.0}
+    )
+    start = time.perf_counter()
+    info, _ = minimize(
+        criterion,
+        params,
+        "pygmo_de",
+        algo_options={"popsize": 20, "gen": 50},
+        general_options=general_options,
+        logging=logging,
+        log_options=log_options,
+    )
+    return (time.perf_counter() - start) / info["n_evaluations"]
+
+
+def main():
+    # the first optimization includes one-time costs, e.g. of imports.
+    time_per_evaluation(sum_of_squares, 10, {}, False, {})
+
+    # buffer_size=1 writes each evaluation in its own transaction.
+    log_settings = {
+        "no logging": (False, {}),
+        "unbuffered": (True, {"buffer_size": 1}),
+        "buffered": (True, {}),
+        "every 100th": (True, {"log_every": 100}),
+    }
+    with TemporaryDirectory() as tmp:
+        for n_params in [10, 100]:
+            for label, (logging, log_options) in log_settings.items():
+                log_path = Path(tmp) / f"log_{n_params}_{label}.db"
+                before = time_per_evaluation(
+                    sum_of_squares,
+                    n_params,
+                    {},
+                    log_path if logging else False,
+                    log_options,
+                )
+                log_path = Path(tmp) / f"log_np_{n_params}_{label}.db"
+                after = time_per_evaluation(
+                    sum_of_squares_np,
+                    n_params,
+                    {"numpy_criterion": True},
+                    log_path if logging else False,
+                    log_options,
+                )
+                print(
+                    f"n_params={n_params:<4} {label:<12}"
+                    f"DataFrame: {before * 1e6:8.1f}us  numpy: {after * 1e6:8.1f}us"
+                )
+
+
+if __name__ == "__main__":
+    main()
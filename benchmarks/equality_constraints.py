@@ -0,0 +1,85 @@
+"""Benchmark the consolidation of many pairwise equality constraints.
+
+Panel models often have parameters that are equal across groups of individuals. Such
+restrictions are typically generated as one equality constraint per pair of
+parameters. The params DataFrame has ``n_params`` rows and the equality constraints
+chain them into groups of ``group_size`` parameters. Run it with
+``python benchmarks/equality_constraints.py``.
+
+"""
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from estimagic.optimization.consolidate_constraints import (
+    _consolidate_equality_constraints,
+)
+from estimagic.optimization.process_constraints import _process_constraints
+
+
+def get_params_and_constraints(n_pairs, group_size=5):
+    """Create params and ``n_pairs`` pairwise equality constraints.
+
+    The constraints are shuffled, such that the members of a group are not found
+    together.
+
+    """
+    n_groups = n_pairs // (group_size - 1)
+    n_params = n_groups * group_size
+    params = pd.DataFrame(
+        {"value": np.repeat(np.linspace(0.1, 1, n_groups), group_size)},
+        index=pd.MultiIndex.from_product(
+            [range(n_groups), range(group_size)], names=["group", "member"]
+        ),
+    )
+    params["lower"] = -np.inf
+    params["upper"] = np.inf
+
+    pairs = [
+        (start + i, start + i + 1)
+        for start in range(0, n_params, group_size)
+        for i in range(group_size - 1)
+    ]
+    order = np.random.default_rng(0).permutation(len(pairs))
+    constraints = [
+        {"loc": params.index[list(pairs[i])], "type": "equality"} for i in order
+    ]
+
+    return params, constraints
+
+
+def time_consolidation(n_pairs):
+    params, constraints = get_params_and_constraints(n_pairs)
+    positions = pd.Series(np.arange(len(params)), index=params.index)
+    equality_pc = [
+        {"index": positions[constr["loc"]].tolist(), "type": "equality"}
+        for constr in constraints
+    ]
+    start = time.perf_counter()
+    _consolidate_equality_constraints(equality_pc)
+    return time.perf_counter() - start
+
+
+def time_processing(n_pairs):
+    params, constraints = get_params_and_constraints(n_pairs)
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        _process_constraints(constraints, params)
+    return time.perf_counter() - start
+
+
+def main():
+    for n_pairs in [1_000, 4_000, 10_000]:
+        consolidation = time_consolidation(n_pairs)
+        processing = time_processing(n_pairs)
+        print(
+            f"n_pairs={n_pairs:<6} consolidation {consolidation:8.3f}s  "
+            f"processing {processing:8.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
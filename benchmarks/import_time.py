@@ -0,0 +1,40 @@
+"""Benchmark the time it takes to import estimagic.
+
+Each import is timed in a fresh interpreter. The import of the dependencies that
+estimagic always needs, i.e. numpy, pandas and numba, is timed as well, because it is
+the lower bound for the import of estimagic. The difference is spent in estimagic and
+in the optional dependencies it imports at module level. Run it with
+``python benchmarks/import_time.py`` from the root of the repository.
+
+"""
+import statistics
+import subprocess
+import sys
+
+REQUIRED_MODULES = ["numpy", "pandas", "numba"]
+
+
+def import_time(modules, n_runs=10):
+    imports = "; ".join(f"import {module}" for module in modules)
+    code = (
+        f"import time; start = time.perf_counter(); {imports}; "
+        "print(time.perf_counter() - start)"
+    )
+    seconds = []
+    for _ in range(n_runs):
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, check=True, text=True
+        )
+        seconds.append(float(output.stdout))
+    return statistics.median(seconds)
+
+
+def main():
+    required = import_time(REQUIRED_MODULES)
+    estimagic = import_time(["estimagic"])
+    print(f"{', '.join(REQUIRED_MODULES):<20} {required:6.2f}s")
+    print(f"{'estimagic':<20} {estimagic:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
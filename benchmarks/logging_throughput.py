@@ -0,0 +1,92 @@
+"""Benchmark the writer throughput of the logging database with a concurrent reader.
+
+A writer logs the parameters and criterion values of many evaluations while a reader in
+a separate process polls the database every 200 ms, like the dashboard does. The number
+of evaluations that are written per second and the number of failed reads are measured
+for the default rollback journal and for WAL mode, each with one transaction per
+evaluation and with the default write buffer. Run it with
+``python benchmarks/logging_throughput.py``.
+
+"""
+import multiprocessing
+import time
+import warnings
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pandas as pd
+
+from estimagic.logging.create_database import load_database
+from estimagic.logging.create_database import prepare_database
+from estimagic.logging.read_database import read_new_iterations
+from estimagic.logging.update_database import buffer_rows
+from estimagic.logging.update_database import flush_buffer
+
+
+def poll_database(path, stop, n_failed_reads, interval=0.2):
+    database = load_database(path)
+    tables = ["params_history", "criterion_history"]
+    last_retrieved = 0
+    while not stop.is_set():
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            _, last_retrieved = read_new_iterations(
+                database, tables, last_retrieved, "bokeh", limit=20
+            )
+        n_failed_reads.value += len(caught)
+        time.sleep(interval)
+
+
+def evaluations_per_second(path, n_evaluations, n_params, log_options, with_reader):
+    params = pd.DataFrame({"name": [f"x_{i}" for i in range(n_params)]})
+    database = prepare_database(path, params, **log_options)
+
+    stop = multiprocessing.Event()
+    n_failed_reads = multiprocessing.Value("i", 0)
+    if with_reader:
+        reader = multiprocessing.Process(
+            target=poll_database, args=(path, stop, n_failed_reads)
+        )
+        reader.start()
+        time.sleep(0.5)
+
+    values = np.linspace(0, 1, n_params)
+    tables = ["params_history", "criterion_history"]
+    start = time.perf_counter()
+    for i in range(n_evaluations):
+        rows = [pd.Series(values + i, index=params["name"]), {"value": float(i)}]
+        buffer_rows(database, tables, rows)
+    flush_buffer(database)
+    seconds = time.perf_counter() - start
+
+    if with_reader:
+        stop.set()
+        reader.join()
+    return n_evaluations / seconds, n_failed_reads.value
+
+
+def main():
+    # buffer_size=1 writes each evaluation in its own transaction.
+    log_settings = {
+        "journal, unbuffered": {"buffer_size": 1},
+        "journal, buffered": {},
+        "wal, unbuffered": {"buffer_size": 1, "wal_mode": True},
+        "wal, buffered": {"wal_mode": True},
+    }
+    with TemporaryDirectory() as tmp:
+        for label, log_options in log_settings.items():
+            for with_reader in [False, True]:
+                path = Path(tmp) / f"log_{label}_{with_reader}.db"
+                throughput, n_failed_reads = evaluations_per_second(
+                    path, 2000, 20, log_options, with_reader
+                )
+                reader = "with reader" if with_reader else "no reader  "
+                print(
+                    f"{label:<20} {reader} {throughput:8.0f} evaluations/s  "
+                    f"failed reads: {n_failed_reads}"
+                )
+
+
+if __name__ == "__main__":
+    main()
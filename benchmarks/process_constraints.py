@@ -0,0 +1,89 @@
+"""Benchmark the processing of constraints for large params DataFrames.
+
+The constraints are typical for models with individual fixed effects: Each block of
+parameters has increasing, fixed, equality and linear constraints. The processing
+time is measured against the number of parameters with a fixed number of constraints
+and against the number of constraints with a fixed number of parameters. Run it with
+``python benchmarks/process_constraints.py``.
+
+"""
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from estimagic.optimization.process_constraints import _process_constraints
+
+
+def get_params_and_constraints(n_params, n_constraints):
+    """Create params with ``n_params`` rows and ``n_constraints`` constraints.
+
+    A quarter of the constraints are of type increasing, fixed, equality and linear,
+    respectively. Each type selects parameters from its own category.
+
+    """
+    n_per_category = n_params // 4
+    categories = np.repeat(
+        ["increasing", "fixed", "equality", "linear"], n_per_category
+    )
+    params = pd.DataFrame(
+        {
+            "value": np.linspace(0.1, 1, 4 * n_per_category),
+            "lower": -np.inf,
+            "upper": np.inf,
+        },
+        index=pd.MultiIndex.from_arrays(
+            [categories, np.arange(4 * n_per_category)], names=["category", "name"]
+        ),
+    )
+
+    n_per_type = n_constraints // 4
+    if 3 * n_per_type > n_per_category:
+        raise ValueError("Too many constraints for the number of parameters.")
+
+    constraints = []
+    start = 0
+    for i in range(n_per_type):
+        loc = ("increasing", list(range(start + 3 * i, start + 3 * i + 3)))
+        constraints.append({"loc": loc, "type": "increasing"})
+
+    start = n_per_category
+    for i in range(n_per_type):
+        constraints.append({"loc": ("fixed", start + 2 * i), "type": "fixed"})
+
+    start = 2 * n_per_category
+    for i in range(n_per_type):
+        loc = ("equality", [start + 2 * i, start + 2 * i + 1])
+        constraints.append({"loc": loc, "type": "equality"})
+    params.loc["equality", "value"] = 0.5
+
+    start = 3 * n_per_category
+    for i in range(n_per_type):
+        loc = ("linear", list(range(start + 3 * i, start + 3 * i + 3)))
+        constraints.append({"loc": loc, "type": "linear", "weights": 1, "lower": 0})
+
+    return params, constraints
+
+
+def time_processing(n_params, n_constraints):
+    params, constraints = get_params_and_constraints(n_params, n_constraints)
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        _process_constraints(constraints, params)
+    return time.perf_counter() - start
+
+
+def main():
+    for n_params in [2_000, 10_000, 20_000, 50_000]:
+        seconds = time_processing(n_params, 400)
+        print(f"n_params={n_params:<6} n_constraints=400    {seconds:6.2f}s")
+
+    for n_constraints in [100, 1_000, 4_000]:
+        seconds = time_processing(50_000, n_constraints)
+        print(f"n_params=50000  n_constraints={n_constraints:<6} {seconds:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark parallel optimizations that log to one shared database.
+
+Several processes log the parameters and criterion values of many evaluations, like
+the optimizations of a multistart. The number of evaluations that are written per
+second by all processes together is measured for one database per process and for one
+shared database, each with one transaction per evaluation and with the default write
+buffer. Run it with ``python benchmarks/shared_database_logging.py``.
+
+"""
+import multiprocessing
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pandas as pd
+
+from estimagic.logging.create_database import prepare_database
+from estimagic.logging.update_database import buffer_rows
+from estimagic.logging.update_database import flush_buffer
+from estimagic.logging.update_database import history_row
+
+
+def log_evaluations(database, n_evaluations, n_params, start):
+    names = [f"x_{i}" for i in range(n_params)]
+    values = np.linspace(0, 1, n_params)
+    tables = ["params_history", "criterion_history"]
+    start.wait()
+    for i in range(n_evaluations):
+        rows = [
+            history_row(database, "params_history", names, values + i),
+            {"value": float(i)},
+        ]
+        buffer_rows(database, tables, rows)
+    flush_buffer(database)
+
+
+def evaluations_per_second(directory, n_processes, n_evaluations, log_options, shared):
+    params = pd.DataFrame({"name": [f"x_{i}" for i in range(20)]})
+    databases = []
+    for i in range(n_processes):
+        if shared:
+            path = Path(directory) / "shared.db"
+            options = {**log_options, "optimization_id": i}
+        else:
+            path = Path(directory) / f"log_{i}.db"
+            options = {**log_options, "history_format": "blob"}
+        databases.append(prepare_database(path, params, **options))
+
+    start = multiprocessing.Barrier(n_processes + 1)
+    processes = [
+        multiprocessing.Process(
+            target=log_evaluations,
+            args=(database, n_evaluations, len(params), start),
+        )
+        for database in databases
+    ]
+    for process in processes:
+        process.start()
+    start.wait()
+    start_time = time.perf_counter()
+    for process in processes:
+        process.join()
+    seconds = time.perf_counter() - start_time
+    return n_processes * n_evaluations / seconds
+
+
+def main():
+    # buffer_size=1 writes each evaluation in its own transaction.
+    log_settings = {
+        "unbuffered": {"buffer_size": 1},
+        "buffered": {},
+        "wal, buffered": {"wal_mode": True},
+    }
+    for label, log_options in log_settings.items():
+        for shared in [False, True]:
+            with TemporaryDirectory() as tmp:
+                throughput = evaluations_per_second(tmp, 8, 2000, log_options, shared)
+            databases = "shared database  " if shared else "one per process  "
+            print(f"{label:<14} {databases} {throughput:8.0f} evaluations/s")
+
+
+if __name__ == "__main__":
+    main()
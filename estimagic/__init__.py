@@ -1,5 +1,7 @@
 __version__ = "0.0.31"
 
 
+from estimagic.optimization.algorithms import register_algorithm  # noqa: F401
 from estimagic.optimization.optimize import minimize  # noqa: F401
 from estimagic.optimization.optimize import maximize  # noqa: F401
+from estimagic.optimization.optimize import minimize_as_completed  # noqa: F401
@@ -29,10 +29,13 @@ def monitoring_app(doc, database_name, session_data):
             Keys of this app's entry are:
             - last_retrieved (int): last iteration currently in the ColumnDataSource.
             - database_path (str or pathlib.Path)
+            - optimization_id (int or None): id of the optimization in a shared
+              database. All reads are restricted to the rows of this optimization.
             - callbacks (dict): dictionary to be populated with callbacks.
 
     """
     database = load_database(session_data["database_path"])
+    database.optimization_id = session_data.get("optimization_id")
     start_params = read_scalar_field(database, "start_params")
     dash_options = read_scalar_field(database, "dash_options")
     rollover = dash_options["rollover"]
@@ -41,7 +44,9 @@ def monitoring_app(doc, database_name, session_data):
     criterion_history, params_history = _create_bokeh_data_sources(
         database=database, tables=tables
     )
-    session_data["last_retrieved"] = 1
+    # iterations of an optimization in a shared database are not consecutive.
+    iterations = criterion_history.data["iteration"]
+    session_data["last_retrieved"] = iterations[-1] if len(iterations) > 0 else 0
 
     # create initial bokeh elements without callbacks
     initial_convergence_plots = _create_initial_convergence_plots(
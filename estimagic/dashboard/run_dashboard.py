@@ -14,6 +14,7 @@ from estimagic.dashboard.monitoring_app import monitoring_app
 from estimagic.dashboard.utilities import create_short_database_names
 from estimagic.dashboard.utilities import find_free_port
 from estimagic.logging.create_database import load_database
+from estimagic.logging.read_database import read_optimization_ids
 from estimagic.logging.read_database import read_scalar_field
 
 
@@ -59,7 +60,11 @@ def run_dashboard(database_paths, no_browser=None, port=None):
         database_paths=database_paths, no_browser=no_browser, port=port
     )
 
-    session_data = _create_session_data(database_name_to_path)
+    database_name_to_path, database_name_to_id = _expand_shared_databases(
+        database_name_to_path
+    )
+
+    session_data = _create_session_data(database_name_to_path, database_name_to_id)
 
     master_app_func = partial(
         master_app,
@@ -109,6 +114,8 @@ def _process_dashboard_args(database_paths, no_browser, port):
     """
     if not isinstance(database_paths, (list, tuple)):
         database_paths = [database_paths]
+    # optimizations that share a database pass its path several times.
+    database_paths = list(dict.fromkeys(database_paths))
 
     for single_database_path in database_paths:
         if not isinstance(single_database_path, (str, pathlib.Path)):
@@ -121,8 +128,10 @@ def _process_dashboard_args(database_paths, no_browser, port):
     all_options = []
     for single_database_path in database_paths:
         database = load_database(single_database_path)
-        dash_options = read_scalar_field(database, "dash_options")
-        all_options.append(dash_options)
+        optimization_ids = read_optimization_ids(database) or [None]
+        for optimization_id in optimization_ids:
+            dash_options = read_scalar_field(database, "dash_options", optimization_id)
+            all_options.append(dash_options)
 
     if port is None:
         ports = {d.pop("port", None) for d in all_options}
@@ -148,11 +157,45 @@ def _process_dashboard_args(database_paths, no_browser, port):
     return database_name_to_path, no_browser, port
 
 
-def _create_session_data(database_name_to_path):
+def _expand_shared_databases(database_name_to_path):
+    """Create one entry per optimization for databases shared by several optimizations.
+
+    The entries of a shared database are named after the database and the id of the
+    optimization, e.g. "logging_0" and "logging_1".
+
+    Args:
+        database_name_to_path (dict): mapping from the short, unique names to the full
+            paths to the databases.
+
+    Returns:
+        database_name_to_path (dict): mapping from the names of the optimizations to
+            the full paths to their databases.
+        database_name_to_id (dict): mapping from the names of the optimizations to
+            their optimization_id. None if the database is not shared.
+
+    """
+    name_to_path = {}
+    name_to_id = {}
+    for database_name, database_path in database_name_to_path.items():
+        database = load_database(database_path)
+        optimization_ids = read_optimization_ids(database)
+        if len(optimization_ids) == 0:
+            name_to_path[database_name] = database_path
+            name_to_id[database_name] = None
+        for optimization_id in optimization_ids:
+            name = f"{database_name}_{optimization_id}"
+            name_to_path[name] = database_path
+            name_to_id[name] = optimization_id
+    return name_to_path, name_to_id
+
+
+def _create_session_data(database_name_to_path, database_name_to_id=None):
     """Create a nested dictionary with info to be passed between and within bokeh apps.
 
     Args:
         short_name_to_path (dict): mapping from the new unique names to their full path.
+        database_name_to_id (dict, optional): mapping from the new unique names to the
+            optimization_id in a shared database. By default, no database is shared.
 
     Returns:
         session_data (dict): Infos to be passed between and within apps.
@@ -160,14 +203,19 @@ def _create_session_data(database_name_to_path):
             The keys of the monitoring app's entries are:
             - last_retrieved (int): last iteration currently in the ColumnDataSource.
             - database_path (str or pathlib.Path)
+            - optimization_id (int or None): id of the optimization in a shared
+              database.
             - callbacks (dict): dictionary to be populated with callbacks.
 
     """
+    if database_name_to_id is None:
+        database_name_to_id = {}
     session_data = {"master_app": {}}
     for database_name, database_path in database_name_to_path.items():
         session_data[database_name] = {
             "last_retrieved": 0,
             "database_path": database_path,
+            "optimization_id": database_name_to_id.get(database_name),
             "callbacks": {},
         }
     return session_data
@@ -20,11 +20,18 @@ import pandas as pd
 
 from estimagic.config import MAX_CRITERION_PENALTY
 from estimagic.logging.update_database import append_rows
-from estimagic.logging.update_database import update_scalar_field
+from estimagic.logging.update_database import buffer_evaluation
+from estimagic.logging.update_database import buffer_rows
+from estimagic.logging.update_database import buffer_scalar_field
+from estimagic.logging.update_database import comparison_plot_row
+from estimagic.logging.update_database import history_row
+from estimagic.optimization.reparametrize import batch_external_values_from_internal
+from estimagic.optimization.reparametrize import compile_reparametrization_plan
+from estimagic.optimization.reparametrize import external_values_from_plan
 from estimagic.optimization.reparametrize import reparametrize_from_internal
 
 
-def numpy_interface(params, constraints=None):
+def numpy_interface(params, constraints=None, numpy_criterion=False):
     """Convert x to params.
 
     This decorator receives a NumPy array of parameters and converts it to a
@@ -33,8 +40,13 @@ def numpy_interface(params, constraints=None):
     Args:
         params (pandas.DataFrame): See :ref:`params`.
         constraints (list of dict): Contains constraints.
+        numpy_criterion (bool): If True, the decorated function receives a numpy array
+            with the values of all external parameters instead of a DataFrame. This is
+            only supported if constraints are given.
 
     """
+    if constraints is not None:
+        to_external = _make_external_values_function(params, constraints)
 
     def decorator_numpy_interface(func):
         @functools.wraps(func)
@@ -45,17 +57,12 @@ def numpy_interface(params, constraints=None):
                 p["value"] = x
 
             # Handle usage in :func:`internal_criterion`.
+            elif numpy_criterion:
+                p = to_external(x)
+
             else:
-                p = reparametrize_from_internal(
-                    internal=x,
-                    fixed_values=params["_internal_fixed_value"].to_numpy(),
-                    pre_replacements=params["_pre_replacements"].to_numpy().astype(int),
-                    processed_constraints=constraints,
-                    post_replacements=(
-                        params["_post_replacements"].to_numpy().astype(int)
-                    ),
-                    processed_params=params,
-                )
+                p = params.copy()
+                p["value"] = to_external(x)
 
             criterion_value = func(p, *args, **kwargs)
 
@@ -69,6 +76,61 @@ def numpy_interface(params, constraints=None):
     return decorator_numpy_interface
 
 
+def batch_numpy_interface(params, constraints, numpy_criterion=False):
+    """Convert a two-dimensional array of internal parameters to a list of params.
+
+    This decorator receives a NumPy array where each row are the internal parameters
+    of one candidate and converts it to a list of :class:`pandas.DataFrame`.
+
+    Args:
+        params (pandas.DataFrame): See :ref:`params`.
+        constraints (list of dict): Contains processed constraints.
+        numpy_criterion (bool): If True, the list contains numpy arrays with the values
+            of the external parameters instead of DataFrames.
+
+    """
+    fixed_values = params["_internal_fixed_value"].to_numpy()
+    pre_replacements = params["_pre_replacements"].to_numpy().astype(int)
+    post_replacements = params["_post_replacements"].to_numpy().astype(int)
+
+    def decorator_batch_numpy_interface(func):
+        @functools.wraps(func)
+        def wrapper_batch_numpy_interface(x_batch, *args, **kwargs):
+            external_batch = batch_external_values_from_internal(
+                internal_batch=x_batch,
+                fixed_values=fixed_values,
+                pre_replacements=pre_replacements,
+                processed_constraints=constraints,
+                post_replacements=post_replacements,
+            )
+            params_list = []
+            for external_values in external_batch:
+                if numpy_criterion:
+                    p = external_values
+                else:
+                    p = params.copy()
+                    p["value"] = external_values
+                params_list.append(p)
+
+            return func(params_list, *args, **kwargs)
+
+        return wrapper_batch_numpy_interface
+
+    return decorator_batch_numpy_interface
+
+
+def _make_external_values_function(params, constraints):
+    """Create a function that maps internal parameters to external parameter values.
+
+    The reparametrization is compiled into a
+    :class:`~estimagic.optimization.reparametrize.ReparametrizationPlan` once instead
+    of processing params and constraints in each call.
+
+    """
+    plan = compile_reparametrization_plan(params, constraints)
+    return functools.partial(external_values_from_plan, plan=plan)
+
+
 def expand_criterion_output(criterion):
     """Handle one- or two-element criterion returns.
 
@@ -127,9 +189,16 @@ def negative_gradient(gradient):
     return wrapper_negative_gradient
 
 
-def log_evaluation(func=None, *, database, tables):
+def log_evaluation(func=None, *, database, tables, names=None):
     """Log parameters and fitness values.
 
+    The decorated function receives a params DataFrame or, if ``names`` are given, a
+    numpy array with the parameter values. The rows are collected in the write buffer
+    of the database if the retention policy of the database keeps the evaluation. See
+    :func:`~estimagic.logging.update_database.buffer_evaluation`. The comparison plot
+    data are only logged for the evaluations selected by
+    :func:`~estimagic.logging.update_database.comparison_plot_row`.
+
     This decorator can be used with and without parentheses and accepts only keyword
     arguments.
 
@@ -141,16 +210,23 @@ def log_evaluation(func=None, *, database, tables):
             criterion_value, comparison_plot_data = func(params, *args, **kwargs)
 
             if database:
-                adj_params = params.copy().set_index("name")["value"]
-                cp_data = {"value": comparison_plot_data["value"].to_numpy()}
-                crit_val = {"value": criterion_value}
-                timestamp = {"value": dt.now()}
-
-                append_rows(
+                if names is None:
+                    param_names = params["name"]
+                    param_values = params["value"].to_numpy(dtype=float, copy=True)
+                else:
+                    param_names = names
+                    param_values = np.array(params, dtype=float)
+                make_rows = functools.partial(
+                    _evaluation_rows,
                     database=database,
                     tables=tables,
-                    rows=[adj_params, crit_val, cp_data, timestamp],
+                    param_names=param_names,
+                    param_values=param_values,
+                    criterion_value=criterion_value,
+                    comparison_plot_values=comparison_plot_data["value"],
+                    timestamp=dt.now(),
                 )
+                buffer_evaluation(database, criterion_value, make_rows)
 
             return criterion_value
 
@@ -162,6 +238,27 @@ def log_evaluation(func=None, *, database, tables):
         return decorator_log_evaluation
 
 
+def _evaluation_rows(
+    evaluation,
+    database,
+    tables,
+    param_names,
+    param_values,
+    criterion_value,
+    comparison_plot_values,
+    timestamp,
+):
+    """Return the tables and rows that log one evaluation of the criterion."""
+    adj_params = history_row(database, tables[0], param_names, param_values)
+    cp_data = comparison_plot_row(
+        database, evaluation, criterion_value, comparison_plot_values
+    )
+    rows = [adj_params, {"value": criterion_value}, cp_data, {"value": timestamp}]
+    tables = [tab for tab, row in zip(tables, rows) if row is not None]
+    rows = [row for row in rows if row is not None]
+    return tables, rows
+
+
 def aggregate_criterion_output(aggregation_func):
     """Aggregate the return of of criterion functions with non-scalar output.
 
@@ -201,8 +298,8 @@ def log_gradient(database, names):
             gradient = func(*args, **kwargs)
 
             if database:
-                data = [dict(zip(names, gradient))]
-                append_rows(database, ["gradient_history"], data)
+                data = [history_row(database, "gradient_history", names, gradient)]
+                buffer_rows(database, ["gradient_history"], data)
 
             return gradient
 
@@ -235,7 +332,7 @@ def log_gradient_status(func=None, *, database, n_gradient_evaluations):
                 else:
                     status = (c % n_gradient_evaluations) / n_gradient_evaluations
                     status = 1 if status == 0 else status
-                update_scalar_field(database, "gradient_status", status)
+                buffer_scalar_field(database, "gradient_status", status)
 
             return criterion_value
 
@@ -247,6 +344,35 @@ def log_gradient_status(func=None, *, database, n_gradient_evaluations):
         return decorator_log_gradient_status
 
 
+def cache_evaluations(func=None, *, cache):
+    """Return cached criterion values for internal parameters evaluated before.
+
+    ``cache`` is an :class:`~estimagic.optimization.evaluation_cache.EvaluationCache`
+    that can be shared by several functions. The decorated function is only called on
+    cache misses, so cache hits are neither logged nor counted as criterion evaluations.
+
+    This decorator can be used with and without parentheses and accepts only keyword
+    arguments.
+
+    """
+
+    def decorator_cache_evaluations(func):
+        @functools.wraps(func)
+        def wrapper_cache_evaluations(x, *args, **kwargs):
+            found, out = cache.lookup(x)
+            if not found:
+                out = func(x, *args, **kwargs)
+                cache.store(x, out)
+            return out
+
+        return wrapper_cache_evaluations
+
+    if callable(func):
+        return decorator_cache_evaluations(func)
+    else:
+        return decorator_cache_evaluations
+
+
 def handle_exceptions(database, params, constraints, start_params, general_options):
     """Handle exceptions in the criterion function.
 
@@ -3,8 +3,6 @@ from collections import OrderedDict
 from itertools import product
 
 import numpy as np
-from joblib import delayed
-from joblib import Parallel
 
 from estimagic.decorators import de_scalarize
 from estimagic.decorators import nan_if_exception
@@ -28,6 +26,7 @@ def first_derivative(
     min_steps=None,
     f0=None,
     n_cores=1,
+    worker_pool=None,
     return_richardson_info=False,
 ):
 
@@ -72,6 +71,8 @@ def first_derivative(
         f0 (np.ndarray): 1d numpy array with func(x), optional.
         n_cores (int): Number of processes used to parallelize the function
             evaluations. Default 1.
+        worker_pool (estimagic.worker_pool.WorkerPool): Pool of processes that is
+            reused across calls. If given, it is used instead of n_cores.
         return_richardson_info (bool): Should additional information on the Richardson
             extrapolation be returned. Has no effect if n_steps = 1.
 
@@ -126,7 +127,9 @@ def first_derivative(
                 point[j] += step_arr[i, j]
                 evaluation_points.append(point)
 
-    raw_evals = _nan_skipping_batch_evaluator(internal_func, evaluation_points, n_cores)
+    raw_evals = _nan_skipping_batch_evaluator(
+        internal_func, evaluation_points, n_cores, worker_pool
+    )
 
     evals = np.array(raw_evals).reshape(2, n_steps, len(x), -1)
     evals = np.transpose(evals, axes=(0, 1, 3, 2))
@@ -134,7 +137,7 @@ def first_derivative(
 
     jac_candidates = {}
     for m in ["forward", "backward", "central"]:
-        jac_candidates[m] = finite_differences.jacobian(evals, steps, f0, method)
+        jac_candidates[m] = finite_differences.jacobian(evals, steps, f0, m)
 
     orders = {
         "central": ["central", "forward", "backward"],
@@ -330,7 +333,7 @@ def _get_best_estimate_along_methods(derivatives, errors):
     return jac_minimal
 
 
-def _nan_skipping_batch_evaluator(func, arglist, n_cores):
+def _nan_skipping_batch_evaluator(func, arglist, n_cores, worker_pool=None):
     """Evaluate func at each entry in arglist, skipping np.nan entries.
 
     The function is only evaluated at inputs that are not a scalar np.nan.
@@ -343,6 +346,8 @@ def _nan_skipping_batch_evaluator(func, arglist, n_cores):
             of the output of func has to be the same for all elements in arglist.
         arglist (list): List with inputs for func.
         n_cores (int): Number of processes.
+        worker_pool (estimagic.worker_pool.WorkerPool): Pool of processes. If given, it
+            is used instead of n_cores.
 
     Returns
         evaluations (list): The function evaluations, same length as arglist.
@@ -355,7 +360,16 @@ def _nan_skipping_batch_evaluator(func, arglist, n_cores):
     real_args = [arg for i, arg in enumerate(arglist) if i not in nan_indices]
 
     # evaluate function
-    evaluations = Parallel(n_jobs=n_cores)(delayed(func)(point) for point in real_args)
+    if worker_pool is not None:
+        evaluations = worker_pool.map(func, real_args)
+    else:
+        from joblib import delayed
+        from joblib import Parallel
+
+        # large arrays in func are shared with the workers as read-only memory maps
+        evaluations = Parallel(n_jobs=n_cores, max_nbytes="1M", mmap_mode="r")(
+            delayed(func)(point) for point in real_args
+        )
 
     # combine results
     evaluations = iter(evaluations)
@@ -1,11 +1,12 @@
 import numpy as np
-from scipy import stats
 from scipy.linalg import pinv
 from scipy.ndimage.filters import convolve1d
 
 
 EPS = np.finfo(float).eps
-TQUANTILE = stats.t(df=1).ppf(0.975)  # 12.7062047361747 in numdifftools
+# 0.975 quantile of the t distribution with one degree of freedom, i.e. the standard
+# cauchy distribution. The closed form avoids importing scipy.stats.
+TQUANTILE = np.tan(np.pi * 0.475)  # 12.7062047361747 in numdifftools
 
 
 def richardson_extrapolation(sequence, steps, method="central", num_terms=None):
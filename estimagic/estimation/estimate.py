@@ -65,7 +65,8 @@ def maximize_log_likelihood(
             list with constraint dictionaries. See for details.
 
         general_options (dict):
-            additional configurations for the optimization
+            additional configurations for the optimization. Can contain a
+            :class:`~estimagic.worker_pool.WorkerPool` under the key "worker_pool".
 
         algo_options (dict or list of dicts):
             algorithm specific configurations for the optimization
@@ -114,18 +115,18 @@ def maximize_log_likelihood(
         wrapped_loglikeobs = aggregate_criterion_output(np.mean)(extended_loglikelobs)
 
     results = maximize(
-        wrapped_loglikeobs,
-        params,
-        algorithm,
-        criterion_kwargs,
-        constraints,
-        general_options,
-        algo_options,
-        gradient_options,
-        logging,
-        log_options,
-        dashboard,
-        dash_options,
+        criterion=wrapped_loglikeobs,
+        params=params,
+        algorithm=algorithm,
+        criterion_kwargs=criterion_kwargs,
+        constraints=constraints,
+        general_options=general_options,
+        algo_options=algo_options,
+        gradient_options=gradient_options,
+        logging=logging,
+        log_options=log_options,
+        dashboard=dashboard,
+        dash_options=dash_options,
     )
 
     # To convert the mean log likelihood in the results dictionary to the log
@@ -4,6 +4,7 @@ Note: Most functions in this module change their arguments in place since this i
 recommended way of doing things in sqlalchemy and makes sense for database code.
 
 """
+import os
 from pathlib import Path
 
 import numpy as np
@@ -11,18 +12,38 @@ import pandas as pd
 from sqlalchemy import Column
 from sqlalchemy import create_engine
 from sqlalchemy import event
+from sqlalchemy import exc
 from sqlalchemy import Float
 from sqlalchemy import Integer
+from sqlalchemy import LargeBinary
 from sqlalchemy import MetaData
 from sqlalchemy import PickleType
 from sqlalchemy import String
 from sqlalchemy import Table
 from sqlalchemy.dialects.sqlite import DATETIME
+from sqlalchemy.pool import SingletonThreadPool
 
 from estimagic.logging.update_database import append_rows
+from estimagic.logging.update_database import ComparisonPlotPolicy
+from estimagic.logging.update_database import delete_rows
+from estimagic.logging.update_database import RetentionPolicy
+from estimagic.logging.update_database import WriteBuffer
 
+# Pragmas that are set on each connection in wal mode. In WAL mode, synchronous=NORMAL
+# is safe against corruption and only loses the last transactions on a power failure.
+# The negative cache_size is measured in KiB, i.e. each connection caches 64 MiB.
+WAL_PRAGMAS = {"journal_mode": "WAL", "synchronous": "NORMAL", "cache_size": -65536}
 
-def load_database(path):
+# SQLite tables have at most 2000 columns by default, one of which is the iteration.
+MAX_HISTORY_COLUMNS = 1999
+
+# Seconds that a connection waits for the lock of another connection before a write
+# fails. The default of the sqlite3 module is 5 seconds, which is too short if many
+# processes write to a shared database at the same time.
+BUSY_TIMEOUT = 60
+
+
+def load_database(path, wal_mode=None):
     """Return database metadata object for the database stored in ``path``.
 
     This is the default way of loading a database for read-only purposes in estimagic.
@@ -30,6 +51,11 @@ def load_database(path):
     Args:
         path (str or pathlib.Path): location of the database file. If the file does
             not exist, it will be created.
+        wal_mode (bool, optional): Whether the database uses SQLite's write-ahead log
+            with the pragmas in ``WAL_PRAGMAS`` and one long-lived connection per
+            thread and process. In WAL mode, readers and the writer of a database do
+            not block each other. By default, the WAL settings are used if the database
+            file already uses a write-ahead log.
 
     Returns:
         database (sqlalchemy.MetaData). The engine that connects to the database can be
@@ -40,10 +66,11 @@ def load_database(path):
         path = Path(path)
 
     if isinstance(path, Path):
-        engine = create_engine(f"sqlite:///{path}")
-        _make_engine_thread_safe(engine)
-        database = MetaData()
-        database.bind = engine
+        if wal_mode is None:
+            wal_mode = _uses_write_ahead_log(path)
+        database = _PicklableMetaData()
+        database.bind = _create_engine(f"sqlite:///{path}", wal_mode)
+        database.wal_mode = wal_mode
         database.reflect()
     elif isinstance(path, MetaData):
         database = path
@@ -53,6 +80,80 @@ def load_database(path):
     return database
 
 
+class _PicklableMetaData(MetaData):
+    """MetaData that is still bound to its database after pickling.
+
+    sqlalchemy drops the engine when a MetaData object is pickled. This happens
+    whenever an optimization with logging is run in a separate process. Here, the url
+    of the database is pickled instead and a new engine is created on unpickling. The
+    write buffer is pickled without the buffered rows.
+
+    """
+
+    write_buffer = None
+    wal_mode = False
+    comparison_plot_policy = None
+    retention_policy = None
+    optimization_id = None
+
+    _pickled_attributes = [
+        "write_buffer",
+        "wal_mode",
+        "comparison_plot_policy",
+        "retention_policy",
+        "optimization_id",
+    ]
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state["url"] = None if self.bind is None else str(self.bind.url)
+        for attribute in self._pickled_attributes:
+            state[attribute] = getattr(self, attribute)
+        return state
+
+    def __setstate__(self, state):
+        state = state.copy()
+        url = state.pop("url", None)
+        attributes = {
+            attribute: state.pop(attribute, getattr(_PicklableMetaData, attribute))
+            for attribute in self._pickled_attributes
+        }
+        super().__setstate__(state)
+        if url is not None:
+            self.bind = _create_engine(url, attributes["wal_mode"])
+        for attribute, value in attributes.items():
+            setattr(self, attribute, value)
+
+
+def _create_engine(url, wal_mode=False):
+    connect_args = {"timeout": BUSY_TIMEOUT}
+    if wal_mode:
+        engine = create_engine(
+            url, connect_args=connect_args, poolclass=SingletonThreadPool
+        )
+    else:
+        engine = create_engine(url, connect_args=connect_args)
+    _make_engine_thread_safe(engine)
+    if wal_mode:
+        _use_write_ahead_log(engine)
+    return engine
+
+
+def _uses_write_ahead_log(path):
+    """Check if the database file in ``path`` uses a write-ahead log.
+
+    The journal mode is stored in the database file such that it applies to all later
+    connections. A file that does not exist yet does not use a write-ahead log.
+
+    """
+    if not path.exists():
+        return False
+    engine = create_engine(f"sqlite:///{path}")
+    journal_mode = engine.execute("PRAGMA journal_mode").scalar()
+    engine.dispose()
+    return journal_mode.lower() == "wal"
+
+
 def _make_engine_thread_safe(engine):
     """Make the engine even more thread safe than by default.
 
@@ -76,6 +177,34 @@ def _make_engine_thread_safe(engine):
         conn.execute("BEGIN DEFERRED")
 
 
+def _use_write_ahead_log(engine):
+    """Set the WAL pragmas on each new connection and keep connections per process.
+
+    The SingletonThreadPool of the engine keeps one connection per thread open such
+    that each read and write does not pay for opening a connection. Connections must
+    not be shared with processes that were forked after they were opened. Those
+    processes open their own connections instead, as recommended in the sqlalchemy
+    documentation on connection pools and multiprocessing.
+
+    """
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, value in WAL_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+        cursor.close()
+        connection_record.info["pid"] = os.getpid()
+
+    @event.listens_for(engine, "checkout")
+    def check_process(dbapi_connection, connection_record, connection_proxy):
+        if connection_record.info["pid"] != os.getpid():
+            connection_record.connection = connection_proxy.connection = None
+            raise exc.DisconnectionError(
+                "The connection was opened in another process."
+            )
+
+
 def prepare_database(
     path,
     params,
@@ -84,6 +213,19 @@ def prepare_database(
     constraints=None,
     optimization_status="scheduled",
     gradient_status=0,
+    buffer_size=100,
+    flush_interval=1,
+    queue_size=1000,
+    wal_mode=False,
+    history_format=None,
+    comparison_plot_every=1,
+    comparison_plot_only_improvements=False,
+    comparison_plot_storage="values",
+    comparison_plot_bins=20,
+    log_every=1,
+    log_only_improvements=False,
+    log_interval=0,
+    optimization_id=None,
 ):
     """Return database metadata object with all relevant tables for the optimization.
 
@@ -94,13 +236,27 @@ def prepare_database(
     existing database is loaded and all tables needed to log the optimization are
     overwritten. Other tables remain unchanged.
 
+    Several optimizations can log to one shared database if each of them passes its
+    own ``optimization_id``. Then, each table has an additional integer column
+    "optimization_id" and the tables are only overwritten for the optimization with id
+    0. The other optimizations add their rows to the existing tables after their old
+    rows are deleted. Thus, the optimization with id 0 has to be prepared first and
+    all optimizations must use the same ``comparison_plot_storage``. The iterations
+    are numbered across all optimizations and shared databases always use the "blob"
+    ``history_format``.
+
     The resulting database has the following tables:
 
     - params_history: the complete history of parameters from the optimization. The
       index column is "iteration", the remaining columns are parameter names taken
-      from params["name"].
+      from params["name"]. In the "blob" ``history_format``, the only other column is
+      "value" and contains the parameter vector as float64 bytes.
     - gradient_history: the complete history of gradient evaluations from the
-      optimization. Same columns as params_history.
+      optimization. Same columns as params_history. In the "blob" ``history_format``,
+      the vectors only contain the derivatives with respect to the free parameters.
+    - history_names: only in the "blob" ``history_format``. Table with the columns
+      "table" and "names" that contains the list of names of the values in the
+      vectors of params_history and gradient_history.
     - criterion_history: the complete history of criterion values from the optimization.
       The index column is "iteration", the second column is "value".
     - time_stamps: timestamps from the end of each criterion evaluation. Same columns as
@@ -110,6 +266,14 @@ def prepare_database(
       "gtol" and "xtol".
     - start_params: copy of user provided ``params``. This is not just the first entry
       of params_history because it contains all columns and has a different index.
+    - start_comparison_plot_data: table with one row and one column called "value". It
+      contains ``comparison_plot_data`` with its index and all columns.
+    - comparison_plot: the history of the "value" column of the comparison plot data.
+      The index column is "iteration", the column "evaluation" is the number of the
+      evaluation in the process that logged it. The other columns depend on
+      ``comparison_plot_storage``: "value" with the values as float64 bytes,
+      "mean", "std", "min", "median" and "max" or "edges" and "counts" with a
+      histogram as float64 bytes. Decode the bytes with ``np.frombuffer``.
     - optimization_status: table with one row and one column called "value" which takes
       the values "scheduled", "running", "success" or "failure". Initialized to
       ``optimization_status``.
@@ -138,22 +302,83 @@ def prepare_database(
         optimization_status (str): One of "scheduled", "running", "success", "failure".
         gradient_status (float): Progress of gradient calculation between 0 and 1.
         constraints (list): List of constraints.
+        buffer_size (int): The parameters, criterion values and gradients of that many
+            evaluations are collected in memory and written to the database in one
+            transaction by a background thread. 1 means that each evaluation is written
+            as soon as possible.
+        flush_interval (float): Maximal number of seconds that evaluations are kept in
+            memory before they are written to the database. The remaining evaluations
+            are always written when the optimization finishes or is interrupted by an
+            exception.
+        queue_size (int): Maximal number of evaluations that wait for the background
+            thread. If the queue is full, the optimization waits until the background
+            thread catches up.
+        wal_mode (bool): Use SQLite's write-ahead log and keep one connection per
+            thread and process open. This is faster and the dashboard does not block
+            the optimization while it reads, but the database must be on a local file
+            system. The database file keeps using the write-ahead log afterwards. See
+            :func:`load_database`.
+        history_format (str, optional): "columns" stores params_history and
+            gradient_history with one column per parameter. "blob" stores each
+            parameter vector or gradient as one binary column, which is faster for many
+            parameters. By default, "blob" is used if params has more than
+            ``MAX_HISTORY_COLUMNS`` rows. SQLite cannot store more columns.
+        comparison_plot_every (int): Only the comparison plot data of every
+            ``comparison_plot_every``-th evaluation is logged, starting with the first.
+        comparison_plot_only_improvements (bool): Only log the comparison plot data
+            of evaluations that improve the criterion value.
+        comparison_plot_storage (str): "values", "summary" or "histogram". See the
+            comparison_plot table above.
+        comparison_plot_bins (int): Number of bins of the comparison plot histograms.
+        log_every (int): Only every ``log_every``-th evaluation is logged in
+            params_history, criterion_history, comparison_plot and timestamps,
+            starting with the first.
+        log_only_improvements (bool): Only log evaluations that improve the criterion
+            value.
+        log_interval (float): Minimal number of seconds between two logged
+            evaluations. The last evaluation of an optimization is always logged.
+        optimization_id (int, optional): Id of the optimization in a database that is
+            shared by several optimizations. By default, the database belongs to one
+            optimization and has no "optimization_id" columns.
 
     Returns:
         database (sqlalchemy.MetaData). The engine that connects
-        to the database can be accessed via ``database.bind``.
+        to the database can be accessed via ``database.bind``. The write buffer can
+        be accessed via ``database.write_buffer``.
 
     """
     gradient_status = float(gradient_status)
-    database = load_database(path)
+    database = load_database(path, wal_mode)
+    database.optimization_id = optimization_id
+    database.write_buffer = WriteBuffer(buffer_size, flush_interval, queue_size)
+    database.retention_policy = RetentionPolicy(
+        every=log_every, only_improvements=log_only_improvements, interval=log_interval
+    )
+    database.comparison_plot_policy = ComparisonPlotPolicy(
+        every=comparison_plot_every,
+        only_improvements=comparison_plot_only_improvements,
+        storage=comparison_plot_storage,
+        bins=comparison_plot_bins,
+    )
+
+    if optimization_id is not None:
+        if history_format not in [None, "blob"]:
+            raise ValueError("Shared databases only support the 'blob' history_format.")
+        history_format = "blob"
+    elif history_format is None:
+        history_format = "blob" if len(params) > MAX_HISTORY_COLUMNS else "columns"
+    if history_format not in ["columns", "blob"]:
+        raise ValueError("history_format must be 'columns' or 'blob'.")
 
     opt_tables = [
         "params_history",
         "gradient_history",
+        "history_names",
         "criterion_history",
         "timestamps",
         "convergence_history",
         "start_params",
+        "start_comparison_plot_data",
         "comparison_plot",
         "optimization_status",
         "gradient_status",
@@ -162,17 +387,43 @@ def prepare_database(
         "constraints",
     ]
 
-    for table in opt_tables:
-        if table in database.tables:
+    # The tables of other optimizations in a shared database are only removed from the
+    # metadata, such that they are defined with the types of this module below.
+    drop = optimization_id in [None, 0]
+    existing_tables = [table for table in opt_tables if table in database.tables]
+    if not drop and "comparison_plot" in existing_tables:
+        existing_columns = set(database.tables["comparison_plot"].columns.keys())
+        expected_columns = {
+            "iteration",
+            "evaluation",
+            "optimization_id",
+            *_comparison_plot_columns(comparison_plot_storage),
+        }
+        if existing_columns != expected_columns:
+            raise ValueError(
+                "The comparison_plot table of the shared database does not match the "
+                f"comparison_plot_storage '{comparison_plot_storage}'. All "
+                "optimizations of a shared database must use the same "
+                "comparison_plot_storage."
+            )
+    for table in existing_tables:
+        if drop:
             database.tables[table].drop(database.bind)
+        database.remove(database.tables[table])
 
-    _define_table_formatted_with_params(database, params, "params_history")
-    _define_table_formatted_with_params(database, params, "gradient_history")
+    if history_format == "columns":
+        _define_table_formatted_with_params(database, params, "params_history")
+        _define_table_formatted_with_params(database, params, "gradient_history")
+    else:
+        _define_blob_history_table(database, "params_history")
+        _define_blob_history_table(database, "gradient_history")
+        _define_history_names_table(database)
     _define_fitness_history_table(database, "criterion_history")
     _define_time_stamps_table(database)
     _define_convergence_history_table(database)
     _define_start_params_table(database)
-    _define_one_column_pickle_table(database, "comparison_plot")
+    _define_scalar_pickle_table(database, "start_comparison_plot_data")
+    _define_comparison_plot_table(database, comparison_plot_storage)
     _define_optimization_status_table(database)
     _define_gradient_status_table(database)
     _define_scalar_pickle_table(database, "dash_options")
@@ -180,16 +431,31 @@ def prepare_database(
     _define_scalar_pickle_table(database, "constraints")
     engine = database.bind
     database.create_all(engine)
+    if not drop:
+        delete_rows(database, existing_tables, optimization_id)
 
     append_rows(database, "start_params", {"value": params})
     append_rows(database, "optimization_status", {"value": optimization_status})
     append_rows(database, "gradient_status", {"value": gradient_status})
     append_rows(database, "dash_options", {"value": dash_options})
     append_rows(database, "constraints", {"value": constraints})
+    if history_format == "blob":
+        if "_internal_free" in params:
+            free_names = params.query("_internal_free")["name"].tolist()
+        else:
+            free_names = params["name"].tolist()
+        append_rows(
+            database,
+            ["history_names", "history_names"],
+            [
+                {"table": "params_history", "names": params["name"].tolist()},
+                {"table": "gradient_history", "names": free_names},
+            ],
+        )
 
     if comparison_plot_data is None:
         comparison_plot_data = pd.DataFrame({"value": [np.nan]})
-    append_rows(database, "comparison_plot", {"value": comparison_plot_data})
+    append_rows(database, "start_comparison_plot_data", {"value": comparison_plot_data})
 
     return database
 
@@ -201,18 +467,45 @@ def _define_table_formatted_with_params(database, params, table_name):
         database,
         Column("iteration", Integer, primary_key=True),
         *cols,
+        *_optimization_id_columns(database),
         sqlite_autoincrement=True,
         extend_existing=True,
     )
     return values
 
 
+def _define_blob_history_table(database, table_name):
+    vectors = Table(
+        table_name,
+        database,
+        Column("iteration", Integer, primary_key=True),
+        Column("value", LargeBinary),
+        *_optimization_id_columns(database),
+        sqlite_autoincrement=True,
+        extend_existing=True,
+    )
+    return vectors
+
+
+def _define_history_names_table(database):
+    names = Table(
+        "history_names",
+        database,
+        Column("table", String),
+        Column("names", PickleType),
+        *_optimization_id_columns(database),
+        extend_existing=True,
+    )
+    return names
+
+
 def _define_fitness_history_table(database, table_name):
     critvals = Table(
         table_name,
         database,
         Column("iteration", Integer, primary_key=True),
         Column("value", Float),
+        *_optimization_id_columns(database),
         sqlite_autoincrement=True,
         extend_existing=True,
     )
@@ -225,6 +518,7 @@ def _define_time_stamps_table(database):
         database,
         Column("iteration", Integer, primary_key=True),
         Column("value", DATETIME),
+        *_optimization_id_columns(database),
         sqlite_autoincrement=True,
         extend_existing=True,
     )
@@ -239,6 +533,7 @@ def _define_convergence_history_table(database):
         database,
         Column("iteration", Integer, primary_key=True),
         *cols,
+        *_optimization_id_columns(database),
         sqlite_autoincrement=True,
         extend_existing=True,
     )
@@ -247,47 +542,94 @@ def _define_convergence_history_table(database):
 
 def _define_start_params_table(database):
     start_params_table = Table(
-        "start_params", database, Column("value", PickleType), extend_existing=True
+        "start_params",
+        database,
+        Column("value", PickleType),
+        *_optimization_id_columns(database),
+        extend_existing=True,
     )
     return start_params_table
 
 
-def _define_one_column_pickle_table(database, table):
-    params_table = Table(
-        table,
+def _comparison_plot_columns(storage):
+    if storage == "values":
+        cols = [Column("value", LargeBinary)]
+    elif storage == "summary":
+        cols = [Column(name, Float) for name in ["mean", "std", "min", "median", "max"]]
+    else:
+        cols = [Column("edges", LargeBinary), Column("counts", LargeBinary)]
+    return {col.name: col for col in cols}
+
+
+def _define_comparison_plot_table(database, storage):
+    cols = _comparison_plot_columns(storage).values()
+    comparison_plot = Table(
+        "comparison_plot",
         database,
         Column("iteration", Integer, primary_key=True),
-        Column("value", PickleType),
+        Column("evaluation", Integer),
+        *cols,
+        *_optimization_id_columns(database),
         sqlite_autoincrement=True,
         extend_existing=True,
     )
-    return params_table
+    return comparison_plot
 
 
 def _define_optimization_status_table(database):
     optstat = Table(
-        "optimization_status", database, Column("value", String), extend_existing=True
+        "optimization_status",
+        database,
+        Column("value", String),
+        *_optimization_id_columns(database),
+        extend_existing=True,
     )
     return optstat
 
 
 def _define_gradient_status_table(database):
     gradstat = Table(
-        "gradient_status", database, Column("value", Float), extend_existing=True
+        "gradient_status",
+        database,
+        Column("value", Float),
+        *_optimization_id_columns(database),
+        extend_existing=True,
     )
     return gradstat
 
 
 def _define_scalar_pickle_table(database, name):
     dash_options = Table(
-        name, database, Column("value", PickleType), extend_existing=True
+        name,
+        database,
+        Column("value", PickleType),
+        *_optimization_id_columns(database),
+        extend_existing=True,
     )
     return dash_options
 
 
 def _define_string_table(database, name):
     exception_table = Table(
-        name, database, Column("value", String), extend_existing=True
+        name,
+        database,
+        Column("value", String),
+        *_optimization_id_columns(database),
+        extend_existing=True,
     )
 
     return exception_table
+
+
+def _optimization_id_columns(database):
+    """Return the optimization_id column if several optimizations share the database.
+
+    The column is indexed such that the rows of one optimization can be selected
+    without scanning the rows of all other optimizations.
+
+    """
+    if getattr(database, "optimization_id", None) is None:
+        columns = []
+    else:
+        columns = [Column("optimization_id", Integer, index=True)]
+    return columns
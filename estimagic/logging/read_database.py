@@ -3,15 +3,21 @@ import io
 import traceback
 import warnings
 
+import numpy as np
 import pandas as pd
+from sqlalchemy import select
 from sqlalchemy.sql.sqltypes import BLOB
+from sqlalchemy.sql.sqltypes import LargeBinary
 
 
-def read_last_iterations(database, tables, n, return_type):
+def read_last_iterations(database, tables, n, return_type, optimization_id=None):
     """Read the last n iterations from all tables.
 
     If a table has less than n obervations, all observations are returned.
 
+    In a database that is shared by several optimizations, only the iterations of the
+    optimization with ``optimization_id`` are read.
+
     Args:
         database (sqlalchemy.MetaData)
         tables (list): List of tables names.
@@ -23,6 +29,8 @@ def read_last_iterations(database, tables, n, return_type):
             - "bokeh": A dictionary that can be used to stream to a ColumnDataSource.
               It has one key per column and the corresponding values are lists that
               contain the data of that column.
+        optimization_id (int, optional): Id of the optimization in a shared database.
+            By default, the id of ``database`` is used if it has one.
 
     Returns:
         result (dict or return_type):
@@ -39,25 +47,35 @@ def read_last_iterations(database, tables, n, return_type):
     selects = []
     for table in tables:
         tab = database.tables[table]
-        sel = tab.select().order_by(tab.c.iteration.desc()).limit(n)
+        sel = _select_columns(database, table, optimization_id)
+        sel = sel.order_by(tab.c.iteration.desc()).limit(n)
         selects.append(sel)
 
     raw_results = _execute_select_statements(selects, database)
     ordered_results = [res[::-1] for res in raw_results]
 
-    result = _process_selection_result(database, tables, ordered_results, return_type)
+    result = _process_selection_result(
+        database, tables, ordered_results, return_type, optimization_id
+    )
     return result
 
 
-def read_new_iterations(database, tables, last_retrieved, return_type, limit=None):
+def read_new_iterations(
+    database, tables, last_retrieved, return_type, limit=None, optimization_id=None
+):
     """Read all iterations after last_retrieved.
 
+    In a database that is shared by several optimizations, only the iterations of the
+    optimization with ``optimization_id`` are read. Their numbers are not consecutive.
+
     Args:
         database (sqlalchemy.MetaData)
         tables (list): List of tables names.
         last_retrieved (int): The last iteration that was retrieved.
         return_type (str): one of "list", "pandas", "bokeh"
         limit (int): Only the first ``limit`` rows will be retrieved. Default None.
+        optimization_id (int, optional): Id of the optimization in a shared database.
+            By default, the id of ``database`` is used if it has one.
 
     Returns:
         result (dict or return_type):
@@ -76,7 +94,8 @@ def read_new_iterations(database, tables, last_retrieved, return_type, limit=Non
     selects = []
     for table in tables:
         tab = database.tables[table]
-        sel = tab.select().where(tab.c.iteration > last_retrieved).limit(limit)
+        sel = _select_columns(database, table, optimization_id)
+        sel = sel.where(tab.c.iteration > last_retrieved).limit(limit)
         selects.append(sel)
 
     raw_results = _execute_select_statements(selects, database)
@@ -84,25 +103,76 @@ def read_new_iterations(database, tables, last_retrieved, return_type, limit=Non
         new_last = raw_results[0][-1][0]
     else:
         new_last = last_retrieved
-    result = _process_selection_result(database, tables, raw_results, return_type)
+    result = _process_selection_result(
+        database, tables, raw_results, return_type, optimization_id
+    )
     return result, new_last
 
 
-def read_scalar_field(database, table):
+def read_scalar_field(database, table, optimization_id=None):
     """Read the value of a table with one row and one column called "value".
 
     Args:
         database (sqlalchemy.MetaData)
         table (str): Name of the table.
+        optimization_id (int, optional): Id of the optimization in a shared database.
+            By default, the id of ``database`` is used if it has one.
 
     """
-    sel = database.tables[table].select()
+    sel = _select_columns(database, table, optimization_id)
     res = _execute_select_statements(sel, database)[0][0][0]
     if isinstance(database.tables[table].c.value.type, BLOB):
         res = pd.read_pickle(io.BytesIO(res), compression=None)
     return res
 
 
+def read_optimization_ids(database):
+    """Read the ids of the optimizations that log to a shared database.
+
+    Args:
+        database (sqlalchemy.MetaData)
+
+    Returns:
+        list: The sorted ids. Empty if the database belongs to one optimization.
+
+    """
+    tab = database.tables["optimization_status"]
+    if "optimization_id" not in tab.columns:
+        return []
+    sel = select([tab.c.optimization_id]).distinct().order_by(tab.c.optimization_id)
+    rows = _execute_select_statements(sel, database)[0]
+    return [row[0] for row in rows]
+
+
+def _select_columns(database, table, optimization_id=None):
+    """Select all columns of a table except for the optimization_id.
+
+    If the table has an "optimization_id" column, only the rows of the optimization
+    with ``optimization_id`` are selected. Without ``optimization_id``, the id of the
+    database is used if it has one. Otherwise, a ValueError is raised because the rows
+    of different optimizations cannot be combined.
+
+    """
+    tab = database.tables[table]
+    if optimization_id is None:
+        optimization_id = getattr(database, "optimization_id", None)
+    sel = select(_columns(database, table))
+    if "optimization_id" in tab.columns:
+        if optimization_id is None:
+            raise ValueError(
+                f"The table {table} is shared by several optimizations. Pass the "
+                "optimization_id of the optimization you want to read."
+            )
+        sel = sel.where(tab.c.optimization_id == int(optimization_id))
+    return sel
+
+
+def _columns(database, table):
+    """Return the columns of a table except for the optimization_id."""
+    tab = database.tables[table]
+    return [col for col in tab.columns if col.name != "optimization_id"]
+
+
 def _execute_select_statements(statements, database):
     """Execute a list of select statements in one atomic transaction.
 
@@ -157,11 +227,21 @@ def _transpose_nested_list(nested_list):
     return list(map(list, zip(*nested_list)))
 
 
-def _process_selection_result(database, tables, raw_results, return_type):
+def _process_selection_result(
+    database, tables, raw_results, return_type, optimization_id=None
+):
     """Convert sqlalchemy selection results to desired return_type."""
+    history_names = None
     result = {}
     for table, raw_res in zip(tables, raw_results):
-        columns = database.tables[table].columns.keys()
+        if _is_blob_history(database, table):
+            if history_names is None:
+                history_names = _read_history_names(database, optimization_id)
+            names = history_names[table]
+            result[table] = _process_blob_history(raw_res, names, return_type)
+            continue
+
+        columns = [col.name for col in _columns(database, table)]
         if return_type == "list":
             res = [columns]
             for row in raw_res:
@@ -177,3 +257,49 @@ def _process_selection_result(database, tables, raw_results, return_type):
     if len(tables) == 1:
         result = list(result.values())[0]
     return result
+
+
+def _is_blob_history(database, table):
+    """Check if ``table`` stores one vector of float64 bytes per iteration."""
+    columns = database.tables[table].columns
+    return (
+        "history_names" in database.tables
+        and "value" in columns
+        and isinstance(columns["value"].type, LargeBinary)
+        and table in ["params_history", "gradient_history"]
+    )
+
+
+def _read_history_names(database, optimization_id=None):
+    """Read the names of the values in the vectors of blob histories."""
+    table = database.tables["history_names"]
+    sel = _select_columns(database, "history_names", optimization_id)
+    rows = _execute_select_statements(sel, database)[0]
+    history_names = {}
+    for table_name, names in rows:
+        if isinstance(table.c.names.type, BLOB):
+            names = pd.read_pickle(io.BytesIO(names), compression=None)
+        history_names[table_name] = names
+    return history_names
+
+
+def _process_blob_history(raw_res, names, return_type):
+    """Decode the vectors of a blob history at once and convert them to return_type."""
+    iterations = [row[0] for row in raw_res]
+    data = bytearray().join(row[1] for row in raw_res)
+    values = np.frombuffer(data, dtype=np.float64).reshape(len(iterations), len(names))
+
+    columns = ["iteration"] + list(names)
+    if return_type == "list":
+        res = [columns]
+        for iteration, row in zip(iterations, values.tolist()):
+            res.append([iteration] + row)
+    elif return_type == "bokeh":
+        res = dict(zip(columns, [iterations] + values.T.tolist()))
+    elif return_type == "pandas":
+        res = pd.DataFrame(
+            data=values,
+            columns=names,
+            index=pd.Index(iterations, name="iteration", dtype=int),
+        )
+    return res
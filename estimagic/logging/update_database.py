@@ -7,12 +7,25 @@ Public functions in this module should not require any knowledge of sqlalchemy o
 sql in general. This is also the reason why _execute_write_statements is not a public
 function.
 
+Writing to the database once per criterion evaluation can take longer than the
+evaluation itself, e.g. on network file systems. Therefore, the rows that are logged
+during an optimization are passed to a :class:`WriteBuffer` whose writer thread writes
+them in one transaction every few evaluations or seconds.
+
 """
+import atexit
 import datetime as dt
+import functools
+import math
+import queue
+import threading
+import time
 import traceback
 import warnings
+import weakref
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import sqlalchemy
 
@@ -32,6 +45,581 @@ def append_rows(database, tables, rows):
         rows (dict, pd.Series or list): The data to append.
 
     """
+    tables, rows = _harmonize_tables_and_rows(database, tables, rows)
+
+    inserts = [
+        database.tables[tab].insert().values(**row) for tab, row in zip(tables, rows)
+    ]
+
+    _execute_write_statements(inserts, database)
+
+
+def history_row(database, table, names, values):
+    """Return the row of params_history or gradient_history that stores ``values``.
+
+    If the table has one column per parameter, the row maps the names to the values.
+    Otherwise, the values are stored as float64 bytes in the "value" column and the
+    names are already stored in the history_names table.
+
+    Args:
+        database (sqlalchemy.MetaData)
+        table (str): "params_history" or "gradient_history".
+        names (list): Names of the values.
+        values (np.ndarray or list): Parameter values or gradient.
+
+    Returns:
+        row (dict)
+
+    """
+    columns = database.tables[table].columns
+    if "value" in columns and isinstance(columns["value"].type, sqlalchemy.LargeBinary):
+        row = {"value": np.asarray(values, dtype=np.float64).tobytes()}
+    else:
+        row = dict(zip(names, values))
+    return row
+
+
+def comparison_plot_row(database, evaluation, criterion_value, values):
+    """Return the row of the comparison_plot table or None if it is not logged.
+
+    Which evaluations are logged and in which form is determined by the
+    :class:`ComparisonPlotPolicy` of the database. Without policy, the values of each
+    evaluation are logged.
+
+    Args:
+        database (sqlalchemy.MetaData)
+        evaluation (int): Number of the evaluation. See :class:`RetentionPolicy`.
+        criterion_value (float or np.ndarray): Criterion value that is minimized or
+            residuals of a least squares problem.
+        values (np.ndarray or pd.Series): The "value" column of the comparison plot
+            data, e.g. the likelihood contributions.
+
+    Returns:
+        row (dict or None)
+
+    """
+    policy = getattr(database, "comparison_plot_policy", None)
+    if policy is None:
+        row = {"value": np.asarray(values, dtype=np.float64).tobytes()}
+    else:
+        row = policy.row(evaluation, criterion_value, values)
+    return row
+
+
+class ComparisonPlotPolicy:
+    """Policy that decides which comparison plot data are logged and how.
+
+    The comparison plot data often have one value per observation, e.g. the likelihood
+    contributions. Logging them for each evaluation can take longer than the
+    evaluation itself and let the database grow very large.
+
+    The policy is attached to a database as ``database.comparison_plot_policy``. It
+    only sees the evaluations that are logged by the :class:`RetentionPolicy`.
+
+    Args:
+        every (int): Only every ``every``-th evaluation is logged, starting with the
+            first.
+        only_improvements (bool): Only log evaluations whose criterion value is lower
+            than in all previously logged evaluations.
+        storage (str): "values" stores all values as float64 bytes. "summary" stores
+            the mean, standard deviation, minimum, median and maximum. "histogram"
+            stores the edges and counts of a histogram of the finite values as float64
+            bytes.
+        bins (int): Number of bins of the histograms.
+
+    """
+
+    def __init__(self, every=1, only_improvements=False, storage="values", bins=20):
+        if every < 1:
+            raise ValueError("every must be a positive integer.")
+        if storage not in ["values", "summary", "histogram"]:
+            raise ValueError("storage must be 'values', 'summary' or 'histogram'.")
+        self.every = every
+        self.only_improvements = only_improvements
+        self.storage = storage
+        self.bins = bins
+        self._best_fitness = np.inf
+
+    def row(self, evaluation, criterion_value, values):
+        """Return the row of the comparison_plot table or None if it is not logged."""
+        if self.only_improvements:
+            fitness = _fitness(criterion_value)
+            if not fitness < self._best_fitness:
+                return None
+            self._best_fitness = fitness
+
+        if (evaluation - 1) % self.every != 0:
+            return None
+
+        values = np.asarray(values, dtype=np.float64)
+        if self.storage == "values":
+            row = {"value": values.tobytes()}
+        elif self.storage == "summary":
+            row = {
+                "mean": values.mean(),
+                "std": values.std(),
+                "min": values.min(),
+                "median": np.median(values),
+                "max": values.max(),
+            }
+        else:
+            counts, edges = np.histogram(values[np.isfinite(values)], bins=self.bins)
+            row = {
+                "edges": edges.tobytes(),
+                "counts": counts.astype(np.float64).tobytes(),
+            }
+        row["evaluation"] = evaluation
+        return row
+
+    def __getstate__(self):
+        return {
+            "every": self.every,
+            "only_improvements": self.only_improvements,
+            "storage": self.storage,
+            "bins": self.bins,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+class RetentionPolicy:
+    """Policy that decides which evaluations of the criterion are logged.
+
+    Logging each evaluation of a long optimization produces huge databases and can take
+    longer than the evaluations. The policy numbers the evaluations and keeps only
+    those that fulfill all of its conditions. The rows of the last evaluation that was
+    not logged are held by the write buffer and written when the buffer is flushed,
+    such that the final state of the optimization is always logged.
+
+    The policy is attached to a database as ``database.retention_policy``. Each process
+    that logs to the database numbers its evaluations separately.
+
+    Args:
+        every (int): Only every ``every``-th evaluation is logged, starting with the
+            first.
+        only_improvements (bool): Only log evaluations whose criterion value is lower
+            than in all previous evaluations.
+        interval (float): Minimal number of seconds between two logged evaluations.
+
+    """
+
+    def __init__(self, every=1, only_improvements=False, interval=0):
+        if every < 1:
+            raise ValueError("every must be a positive integer.")
+        self.every = every
+        self.only_improvements = only_improvements
+        self.interval = interval
+        self._n_evaluations = 0
+        self._best_fitness = np.inf
+        self._last_logged = -np.inf
+
+    def evaluate(self, criterion_value):
+        """Number the next evaluation and decide whether it is logged.
+
+        Returns:
+            evaluation (int): Number of the evaluation, starting with 1.
+            retain (bool): Whether the evaluation is logged.
+
+        """
+        self._n_evaluations += 1
+        evaluation = self._n_evaluations
+        retain = (evaluation - 1) % self.every == 0
+
+        if self.only_improvements:
+            fitness = _fitness(criterion_value)
+            retain = retain and fitness < self._best_fitness
+            self._best_fitness = min(fitness, self._best_fitness)
+
+        if self.interval > 0:
+            now = time.monotonic()
+            retain = retain and now - self._last_logged >= self.interval
+            if retain:
+                self._last_logged = now
+
+        return evaluation, retain
+
+    def __getstate__(self):
+        return {
+            "every": self.every,
+            "only_improvements": self.only_improvements,
+            "interval": self.interval,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+def _fitness(criterion_value):
+    """Return the scalar value that is minimized, also for least squares problems."""
+    if np.isscalar(criterion_value):
+        fitness = criterion_value
+    else:
+        fitness = np.mean(np.square(criterion_value))
+    return fitness
+
+
+def buffer_evaluation(database, criterion_value, make_rows):
+    """Buffer the rows of an evaluation if the retention policy of the database logs it.
+
+    If the evaluation is not logged, the write buffer holds ``make_rows`` instead, such
+    that the rows can be written if the evaluation turns out to be the last one. Without
+    retention policy, all evaluations are logged.
+
+    Args:
+        database (sqlalchemy.MetaData)
+        criterion_value (float or np.ndarray): Criterion value that is minimized or
+            residuals of a least squares problem.
+        make_rows (callable): Function that takes the number of the evaluation and
+            returns the tables and rows that are passed to :func:`buffer_rows`.
+
+    """
+    policy = getattr(database, "retention_policy", None)
+    buffer = getattr(database, "write_buffer", None)
+    if policy is None:
+        evaluation, retain = None, True
+    else:
+        evaluation, retain = policy.evaluate(criterion_value)
+
+    if retain:
+        if buffer is not None:
+            buffer.hold(database, None)
+        tables, rows = make_rows(evaluation)
+        buffer_rows(database, tables, rows)
+    elif buffer is not None:
+        buffer.hold(database, functools.partial(make_rows, evaluation))
+
+
+def buffer_rows(database, tables, rows):
+    """Append rows to one or several tables via the write buffer of the database.
+
+    The rows are passed to a writer thread that writes the rows of all tables in one
+    transaction once it holds the rows of ``buffer_size`` calls or ``flush_interval``
+    seconds have passed since the last write. The rows of one call are always written
+    in the same transaction. If the database has no write buffer, the rows are
+    appended immediately.
+
+    Args:
+        database (sqlalchemy.MetaData):
+        tables (str or list): A table name or list of table names.
+        rows (dict, pd.Series or list): The data to append.
+
+    """
+    buffer = getattr(database, "write_buffer", None)
+    if buffer is None:
+        append_rows(database, tables, rows)
+    else:
+        tables, rows = _harmonize_tables_and_rows(database, tables, rows)
+        buffer.put(database, ("rows", tables, rows))
+
+
+def buffer_scalar_field(database, table, value):
+    """Update a table with one row and one column via the write buffer.
+
+    Only the last value is written with the next batch of rows. Updates do not count
+    towards the ``buffer_size`` of the buffer.
+
+    Args:
+        database (sqlalchemy.MetaData)
+        table (string): Name of the table to be updated.
+        value: The new value of the table.
+
+    """
+    buffer = getattr(database, "write_buffer", None)
+    if buffer is None:
+        update_scalar_field(database, table, value)
+    else:
+        buffer.put(database, ("scalar", table, value))
+
+
+def flush_buffer(database):
+    """Write everything in the write buffer of the database and stop its writer thread.
+
+    This includes the rows of the last evaluation that was not logged due to the
+    :class:`RetentionPolicy`.
+
+    The writer thread is started again when new rows are buffered.
+
+    Args:
+        database (sqlalchemy.MetaData)
+
+    """
+    buffer = getattr(database, "write_buffer", None)
+    if buffer is not None:
+        buffer.stop()
+
+
+class WriteBuffer:
+    """Queue of rows and scalar updates that are written to a database in a thread.
+
+    The criterion evaluations put their rows into a bounded queue. A writer thread with
+    its own long-lived connection collects them and writes them in batches, such that
+    the optimization never waits for the database unless the queue is full.
+
+    The buffer is attached to a database as ``database.write_buffer``. Only the
+    options are pickled such that each process that logs to the database has its own
+    buffer and writer thread.
+
+    Args:
+        buffer_size (int): Number of calls of :func:`buffer_rows` after which the
+            rows are written to the database. 1 means that all rows are written as
+            soon as possible.
+        flush_interval (float): Maximal number of seconds that rows are kept in the
+            buffer.
+        queue_size (int): Maximal number of calls of :func:`buffer_rows` and
+            :func:`buffer_scalar_field` that wait for the writer thread. Further calls
+            block until the writer thread catches up.
+
+    """
+
+    def __init__(self, buffer_size=1, flush_interval=float("inf"), queue_size=1000):
+        if buffer_size < 1:
+            raise ValueError("buffer_size must be a positive integer.")
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self._queue = None
+        self._thread = None
+        self._database = None
+        self._writer_errors = []
+        self._held = None
+        self._lock = threading.Lock()
+
+    def put(self, database, item):
+        """Put an item on the queue and start the writer thread if necessary.
+
+        The lock is released before the item is put on the queue, such that
+        :meth:`stop` is not blocked while a full queue blocks this call. If the writer
+        thread died, the item and the items left in its queue are written directly.
+
+        """
+        with self._lock:
+            if self._thread is None:
+                self._queue = queue.Queue(maxsize=self.queue_size)
+                self._database = database
+                self._writer_errors = []
+                self._thread = threading.Thread(
+                    target=_run_writer,
+                    args=(
+                        self._writer_errors,
+                        database,
+                        self._queue,
+                        self.buffer_size,
+                        self.flush_interval,
+                    ),
+                    name="estimagic-database-writer",
+                    daemon=True,
+                )
+                self._thread.start()
+                _UNFLUSHED_BUFFERS.add(self)
+            items, thread, errors = self._queue, self._thread, self._writer_errors
+
+        # blocks if the queue is full.
+        if not _put_while_alive(items, item, thread):
+            with self._lock:
+                if self._thread is thread:
+                    self._thread, self._queue = None, None
+            _write_items_directly(database, _drain(items) + [item], errors)
+
+    def hold(self, database, make_rows):
+        """Hold rows that are only written when the buffer is stopped.
+
+        Args:
+            database (sqlalchemy.MetaData)
+            make_rows (callable or None): Function without arguments that returns
+                tables and rows. It replaces the previously held function. None only
+                discards the previously held function.
+
+        """
+        with self._lock:
+            self._held = None if make_rows is None else (database, make_rows)
+            if make_rows is not None:
+                _UNFLUSHED_BUFFERS.add(self)
+
+    def stop(self):
+        """Write all items in the queue and wait until the writer thread is finished."""
+        with self._lock:
+            held, self._held = self._held, None
+        if held is not None:
+            database, make_rows = held
+            tables, rows = make_rows()
+            tables, rows = _harmonize_tables_and_rows(database, tables, rows)
+            self.put(database, ("rows", tables, rows))
+
+        with self._lock:
+            thread, items = self._thread, self._queue
+            database, errors = self._database, self._writer_errors
+            if thread is not None:
+                if _put_while_alive(items, ("stop", None, None), thread):
+                    thread.join()
+                self._thread, self._queue = None, None
+            _UNFLUSHED_BUFFERS.discard(self)
+
+        if thread is not None:
+            # items are only left if the writer thread died.
+            pending = _drain(items)
+            if pending:
+                _write_items_directly(database, pending, errors)
+
+    def __getstate__(self):
+        return {
+            "buffer_size": self.buffer_size,
+            "flush_interval": self.flush_interval,
+            "queue_size": self.queue_size,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+_UNFLUSHED_BUFFERS = weakref.WeakSet()
+
+
+@atexit.register
+def _stop_unflushed_buffers():
+    """Write the buffers that were not flushed before the interpreter exits."""
+    for buffer in list(_UNFLUSHED_BUFFERS):
+        buffer.stop()
+
+
+def _put_while_alive(items, item, thread, timeout=0.1):
+    """Put an item on the queue unless the thread that consumes the queue died.
+
+    Returns:
+        bool: Whether the item was put on the queue.
+
+    """
+    while thread.is_alive():
+        try:
+            items.put(item, timeout=timeout)
+        except queue.Full:
+            continue
+        return True
+    return False
+
+
+def _drain(items):
+    """Remove and return all items of a queue."""
+    drained = []
+    while True:
+        try:
+            drained.append(items.get_nowait())
+        except queue.Empty:
+            return drained
+
+
+def _write_items_directly(database, items, writer_errors):
+    """Write the items of a write buffer whose writer thread stopped.
+
+    If the writer thread failed, a warning with its traceback is issued. Failed writes
+    are handled like any other write, see :func:`_execute_write_statements`.
+
+    """
+    if writer_errors:
+        warnings.warn(
+            "The writer thread of the database stopped unexpectedly. The buffered "
+            "data is written directly instead. The traceback was:\n\n"
+            f"{writer_errors[0]}"
+        )
+    for kind, first, second in items:
+        if kind == "rows":
+            append_rows(database, first, second)
+        elif kind == "scalar":
+            update_scalar_field(database, first, second)
+
+
+def _run_writer(errors, *args):
+    """Run :func:`_write_in_background` and record the traceback if it fails.
+
+    The traceback is issued as warning by the thread that writes the remaining items.
+
+    """
+    try:
+        _write_in_background(*args)
+    except Exception:
+        errors.append(traceback.format_exc())
+
+
+def _write_in_background(database, items, buffer_size, flush_interval):
+    """Collect items from the queue and write them in batches until "stop" arrives.
+
+    Args:
+        database (sqlalchemy.MetaData)
+        items (queue.Queue): Queue of tuples. The first entry is "rows", "scalar" or
+            "stop". For "rows" the other entries are lists of table names and rows.
+            For "scalar" they are a table name and a value.
+        buffer_size (int): See :class:`WriteBuffer`.
+        flush_interval (float): See :class:`WriteBuffer`.
+
+    """
+    connection = None
+    rows, scalars, n_calls = {}, {}, 0
+    deadline = time.monotonic() + flush_interval
+    stop = False
+    try:
+        while not stop:
+            timeout = deadline - time.monotonic()
+            try:
+                kind, first, second = items.get(
+                    timeout=None if math.isinf(timeout) else max(timeout, 0)
+                )
+            except queue.Empty:
+                kind = None
+
+            if kind == "rows":
+                for tab, row in zip(first, second):
+                    rows.setdefault(tab, []).append(row)
+                n_calls += 1
+            elif kind == "scalar":
+                scalars[first] = second
+            elif kind == "stop":
+                stop = True
+
+            if stop or n_calls >= buffer_size or time.monotonic() >= deadline:
+                if rows or scalars:
+                    connection = _write_batch(database, rows, scalars, connection)
+                rows, scalars, n_calls = {}, {}, 0
+                deadline = time.monotonic() + flush_interval
+    finally:
+        if connection is not None:
+            connection.close()
+
+
+def _write_batch(database, rows, scalars, connection):
+    """Write rows and scalar updates in one transaction.
+
+    If the connection cannot be opened or the statements cannot be created, the data is
+    pickled and a warning is issued, like for failed writes.
+
+    Args:
+        database (sqlalchemy.MetaData)
+        rows (dict): Maps table names to lists of rows.
+        scalars (dict): Maps table names to values.
+        connection (sqlalchemy.engine.Connection or None): Open connection of the
+            writer thread. If None, a new connection is opened.
+
+    Returns:
+        connection (sqlalchemy.engine.Connection or None): The open connection.
+
+    """
+    try:
+        statements = [
+            (database.tables[tab].insert(), tab_rows) for tab, tab_rows in rows.items()
+        ]
+        statements += [
+            _scalar_update(database, tab, value) for tab, value in scalars.items()
+        ]
+        if connection is None:
+            connection = database.bind.connect()
+    except Exception:
+        _save_batch(database, rows, scalars, traceback.format_exc())
+    else:
+        _execute_write_statements(statements, database, connection)
+    return connection
+
+
+def _harmonize_tables_and_rows(database, tables, rows):
+    """Convert rows to dictionaries and add the optimization_id in shared databases."""
     if isinstance(tables, str):
         tables = [tables]
     if isinstance(rows, (dict, pd.Series)):
@@ -41,11 +629,13 @@ def append_rows(database, tables, rows):
 
     rows = [dict(val) for val in rows]
 
-    inserts = [
-        database.tables[tab].insert().values(**row) for tab, row in zip(tables, rows)
-    ]
+    optimization_id = getattr(database, "optimization_id", None)
+    if optimization_id is not None:
+        for tab, row in zip(tables, rows):
+            if "optimization_id" in database.tables[tab].columns:
+                row["optimization_id"] = optimization_id
 
-    _execute_write_statements(inserts, database)
+    return tables, rows
 
 
 def update_scalar_field(database, table, value):
@@ -57,12 +647,47 @@ def update_scalar_field(database, table, value):
         value: The new value of the table.
 
     """
-    value = {"value": value}
-    upd = database.tables[table].update().values(**value)
+    upd = _scalar_update(database, table, value)
     _execute_write_statements(upd, database)
 
 
-def _execute_write_statements(statements, database):
+def _scalar_update(database, table, value):
+    """Return the update of a scalar field, restricted to the rows of the optimization.
+
+    In a database that is shared by several optimizations, each optimization has its
+    own row in the table.
+
+    """
+    tab = database.tables[table]
+    upd = tab.update().values(value=value)
+    optimization_id = getattr(database, "optimization_id", None)
+    if optimization_id is not None and "optimization_id" in tab.columns:
+        upd = upd.where(tab.c.optimization_id == optimization_id)
+    return upd
+
+
+def delete_rows(database, tables, optimization_id):
+    """Delete the rows of one optimization from tables of a shared database.
+
+    Args:
+        database (sqlalchemy.MetaData)
+        tables (str or list): A table name or list of table names. Each table must have
+            an "optimization_id" column.
+        optimization_id (int): Id of the optimization whose rows are deleted.
+
+    """
+    if isinstance(tables, str):
+        tables = [tables]
+    deletes = [
+        database.tables[tab]
+        .delete()
+        .where(database.tables[tab].c.optimization_id == optimization_id)
+        for tab in tables
+    ]
+    _execute_write_statements(deletes, database)
+
+
+def _execute_write_statements(statements, database, connection=None):
     """Execute all statements in one atomic transaction.
 
     If any statement fails, the transaction is rolled back, and a warning is issued.
@@ -73,50 +698,78 @@ def _execute_write_statements(statements, database):
     Args:
         statements (list or sqlalchemy statement): List of sqlalchemy statements
             or single statement that entail a write operation. Examples are Insert,
-            Update and Delete.
+            Update and Delete. A statement can also be a tuple of an Insert without
+            values and a list of dictionaries with one dictionary per row.
         database (sqlalchemy.MetaData): The bind argument must be set.
+        connection (sqlalchemy.engine.Connection, optional): Open connection to the
+            database that is used and left open. By default, a new connection is
+            opened and closed.
 
     """
-    if not isinstance(statements, (list, tuple)):
+    if not isinstance(statements, list):
         statements = [statements]
 
-    engine = database.bind
-    conn = engine.connect()
+    conn = database.bind.connect() if connection is None else connection
     # acquire lock
     trans = conn.begin()
     try:
         for stat in statements:
-            conn.execute(stat)
+            if isinstance(stat, tuple):
+                conn.execute(*stat)
+            else:
+                conn.execute(stat)
         # release lock
         trans.commit()
-        conn.close()
     except (KeyboardInterrupt, SystemExit):
         exception_info = traceback.format_exc()
         trans.rollback()
-        conn.close()
         _handle_exception(statements, database, exception_info)
         raise
     except Exception:
         exception_info = traceback.format_exc()
         trans.rollback()
-        conn.close()
         _handle_exception(statements, database, exception_info)
+    finally:
+        if connection is None:
+            conn.close()
 
 
 def _handle_exception(statements, database, exception_info):
-    directory = Path(str(database.bind.url)[10:])
-    if not directory.is_dir():
-        directory = Path(".")
-    directory = directory.resolve()
+    directory = _fallback_directory(database)
 
     for stat in statements:
-        if isinstance(stat, (sqlalchemy.sql.dml.Insert, sqlalchemy.sql.dml.Update)):
+        if isinstance(stat, tuple):
+            stat, values = stat
+        elif isinstance(stat, (sqlalchemy.sql.dml.Insert, sqlalchemy.sql.dml.Update)):
             values = stat.compile().params
-            timestamp = dt.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
-            filename = f"{stat.table.name}_{timestamp}.pickle"
-            pd.to_pickle(values, directory / filename)
+        else:
+            continue
+        timestamp = dt.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        filename = f"{stat.table.name}_{timestamp}.pickle"
+        pd.to_pickle(values, directory / filename)
 
     warnings.warn(
         f"Unable to write to database. The data was saved in {directory} instead. The "
         f"traceback was:\n\n{exception_info}"
     )
+
+
+def _save_batch(database, rows, scalars, exception_info):
+    """Pickle a batch of the write buffer that could not be written and warn."""
+    directory = _fallback_directory(database)
+    timestamp = dt.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    filename = f"write_buffer_{timestamp}.pickle"
+    pd.to_pickle({"rows": rows, "scalars": scalars}, directory / filename)
+
+    warnings.warn(
+        f"Unable to write to database. The data was saved in {directory} instead. The "
+        f"traceback was:\n\n{exception_info}"
+    )
+
+
+def _fallback_directory(database):
+    """Return the directory in which data is saved if it cannot be written."""
+    directory = Path(str(database.bind.url)[10:])
+    if not directory.is_dir():
+        directory = Path(".")
+    return directory.resolve()
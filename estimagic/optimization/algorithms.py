@@ -0,0 +1,229 @@
+"""Registry of the optimization algorithms and their capabilities.
+
+Each algorithm is identified by a string of the form ``{origin}_{algo_name}`` where
+origin is the package that implements the algorithm. The registry describes what an
+algorithm can do such that :func:`~estimagic.optimization.optimize.minimize` can
+prepare the problem accordingly, e.g. evaluate populations of pygmo algorithms in
+batches or check that a least-squares algorithm receives residuals.
+
+Algorithms of other packages can be added with :func:`register_algorithm`.
+
+"""
+from collections import namedtuple
+
+from estimagic.optimization.utilities import propose_algorithms
+
+AlgorithmInfo = namedtuple(
+    "AlgorithmInfo",
+    [
+        "origin",
+        "algo_name",
+        "supports_bounds",
+        "uses_gradient",
+        "supports_batch_evaluation",
+        "least_squares",
+        "parallelizable",
+        "minimize",
+    ],
+)
+AlgorithmInfo.__doc__ = """Capabilities of an optimization algorithm.
+
+Attributes:
+    origin (str): Name of the package to which the algorithm belongs.
+    algo_name (str): Name of the algorithm in the package.
+    supports_bounds (bool): Whether the algorithm respects bounds on the parameters.
+    uses_gradient (bool): Whether the algorithm evaluates the gradient.
+    supports_batch_evaluation (bool): Whether the algorithm can evaluate several
+        parameter vectors with one call of the batch criterion.
+    least_squares (bool): Whether the algorithm minimizes the sum of squared residuals
+        and thus requires a criterion function that returns an array of residuals.
+    parallelizable (bool): Whether the batch evaluations can be distributed over
+        several cores with ``general_options={"population_n_cores": n}``.
+    minimize (callable or None): Function that runs the optimization. It is None for
+        the algorithms of the packages that estimagic wraps itself. See
+        :func:`register_algorithm` for the interface.
+
+"""
+
+_NLOPT_GRADIENT_BASED = [
+    "mma",
+    "ccsaq",
+    "slsqp",
+    "lbfgs",
+    "tnewton_precond_restart",
+    "tnewton_precond",
+    "tnewton_restart",
+    "tnewton",
+    "var2",
+    "var1",
+]
+
+_NLOPT_DERIVATIVE_FREE = [
+    "cobyla",
+    "bobyqa",
+    "newuoa",
+    "newuoa_bound",
+    "praxis",
+    "neldermead",
+    "sbplx",
+    "auglag",
+    "auglag_eq",
+]
+
+_PYGMO = [
+    "de",
+    "sade",
+    "de1220",
+    "ihs",
+    "pso",
+    "pso_gen",
+    "sea",
+    "sga",
+    "simulated_annealing",
+    "bee_colony",
+    "cmaes",
+    "xnes",
+    "nsga2",
+    "moead",
+]
+
+
+def _builtin_algorithms():
+    infos = []
+    for algo_name in _NLOPT_DERIVATIVE_FREE + _NLOPT_GRADIENT_BASED:
+        infos.append(
+            AlgorithmInfo(
+                origin="nlopt",
+                algo_name=algo_name,
+                supports_bounds=True,
+                uses_gradient=algo_name in _NLOPT_GRADIENT_BASED,
+                supports_batch_evaluation=False,
+                least_squares=False,
+                parallelizable=False,
+                minimize=None,
+            )
+        )
+
+    # all pygmo algorithms evaluate the initial population in one batch. pso_gen,
+    # cmaes and nsga2 also evaluate each generation in one batch.
+    for algo_name in _PYGMO:
+        infos.append(
+            AlgorithmInfo(
+                origin="pygmo",
+                algo_name=algo_name,
+                supports_bounds=True,
+                uses_gradient=False,
+                supports_batch_evaluation=True,
+                least_squares=False,
+                parallelizable=True,
+                minimize=None,
+            )
+        )
+
+    for algo_name in ["L-BFGS-B", "TNC", "SLSQP"]:
+        infos.append(
+            AlgorithmInfo(
+                origin="scipy",
+                algo_name=algo_name,
+                supports_bounds=True,
+                uses_gradient=True,
+                supports_batch_evaluation=False,
+                least_squares=False,
+                parallelizable=False,
+                minimize=None,
+            )
+        )
+
+    infos.append(
+        AlgorithmInfo(
+            origin="tao",
+            algo_name="pounders",
+            supports_bounds=True,
+            uses_gradient=False,
+            supports_batch_evaluation=False,
+            least_squares=True,
+            parallelizable=False,
+            minimize=None,
+        )
+    )
+
+    return {f"{info.origin}_{info.algo_name}": info for info in infos}
+
+
+ALGORITHMS = _builtin_algorithms()
+
+
+def get_algorithm_info(algorithm):
+    """Look up the capabilities of an algorithm.
+
+    Args:
+        algorithm (str): Package and name of the algorithm. It should be of the format
+            {pkg}_{name}.
+
+    Returns:
+        info (AlgorithmInfo): Capabilities of the algorithm.
+
+    Raises:
+        NotImplementedError: If the algorithm is not registered. The error message
+            proposes similar algorithms.
+
+    """
+    if algorithm not in ALGORITHMS:
+        algos = {}
+        for info in ALGORITHMS.values():
+            algos.setdefault(info.origin, []).append(info.algo_name)
+        proposals = propose_algorithms(algorithm, algos)
+        raise NotImplementedError(
+            f"{algorithm} is not a valid choice. Did you mean one of {proposals}?"
+        )
+    return ALGORITHMS[algorithm]
+
+
+def register_algorithm(
+    algorithm,
+    minimize,
+    supports_bounds=False,
+    uses_gradient=False,
+    supports_batch_evaluation=False,
+    least_squares=False,
+    parallelizable=False,
+):
+    """Make an optimization algorithm of another package available in estimagic.
+
+    Args:
+        algorithm (str): Identifier of the format {pkg}_{name} under which the
+            algorithm can be requested in :func:`~estimagic.minimize`. The package name
+            must not contain underscores.
+        minimize (callable): Function with the signature ``minimize(criterion, x,
+            bounds, algo_options, gradient=None, batch_criterion=None)``. criterion
+            takes a 1d numpy array and returns the criterion value, bounds is a tuple
+            of arrays with lower and upper bounds, algo_options is the dictionary of
+            options passed to :func:`~estimagic.minimize`, gradient takes a 1d array
+            and returns the gradient and batch_criterion takes a 2d array with one
+            parameter vector per row and returns a 1d array with criterion values. The
+            function returns a dictionary with at least the entries "status",
+            "fitness", "x" and "n_evaluations".
+        supports_bounds (bool): Whether the algorithm respects bounds. If False,
+            optimizations with finite bounds raise an error.
+        uses_gradient (bool): Whether the algorithm evaluates the gradient.
+        supports_batch_evaluation (bool): Whether the algorithm calls batch_criterion.
+        least_squares (bool): Whether criterion returns an array of residuals instead
+            of a scalar.
+        parallelizable (bool): Whether batch evaluations can be distributed over
+            several cores with ``general_options={"population_n_cores": n}``.
+
+    """
+    origin, algo_name = algorithm.split("_", 1)
+    if origin in ["nlopt", "pygmo", "scipy", "tao"]:
+        raise ValueError(f"The package name {origin} is reserved for estimagic.")
+
+    ALGORITHMS[algorithm] = AlgorithmInfo(
+        origin=origin,
+        algo_name=algo_name,
+        supports_bounds=supports_bounds,
+        uses_gradient=uses_gradient,
+        supports_batch_evaluation=supports_batch_evaluation,
+        least_squares=least_squares,
+        parallelizable=parallelizable,
+        minimize=minimize,
+    )
@@ -57,7 +57,17 @@ def broadcast_arguments(**arguments):
                 "optimizations."
             )
 
-    logging = _process_path_or_metadata_for_logging(logging, n_optimizations)
+    shared_database = "log_options" in arguments and any(
+        options.get("shared_database", False) for options in arguments["log_options"]
+    )
+    if "log_options" in arguments:
+        arguments["log_options"] = _process_log_options(
+            arguments["log_options"], shared_database
+        )
+
+    logging = _process_path_or_metadata_for_logging(
+        logging, n_optimizations, shared_database
+    )
     arguments.update({"logging": logging})
 
     # Convert arguments from dictionary of lists to lists of dictionaries.
@@ -69,7 +79,29 @@ def broadcast_arguments(**arguments):
     return arguments
 
 
-def _process_path_or_metadata_for_logging(logging, n_optimizations):
+def _process_log_options(log_options, shared_database):
+    """Remove "shared_database" from the log options and add optimization ids.
+
+    If the optimizations share a database, the n-th optimization logs with
+    ``optimization_id=n``. New dictionaries are created such that the options of the
+    user are not changed.
+
+    Example
+    -------
+    >>> _process_log_options([{"shared_database": True}] * 2, True)
+    [{'optimization_id': 0}, {'optimization_id': 1}]
+
+    """
+    processed = []
+    for i, options in enumerate(log_options):
+        options = {k: v for k, v in options.items() if k != "shared_database"}
+        if shared_database:
+            options["optimization_id"] = i
+        processed.append(options)
+    return processed
+
+
+def _process_path_or_metadata_for_logging(logging, n_optimizations, shared=False):
     """Process paths or sqlalchemy.MetaData object to databases.
 
     `logging` can be a single value in which case it becomes an iterable with a single
@@ -77,7 +109,8 @@ def _process_path_or_metadata_for_logging(logging, n_optimizations):
 
     `logging` can also be a `list` or a `tuple` in which case
 
-    - a single path receives a number as a suffix for more than one optimizations.
+    - a single path receives a number as a suffix for more than one optimizations,
+      unless the optimizations share the database.
     - everything else is parsed according to the following transformation rules.
 
     Every candidate value for `logging` is transformed according to the following rules.
@@ -104,8 +137,8 @@ def _process_path_or_metadata_for_logging(logging, n_optimizations):
     """
     if not isinstance(logging, (tuple, list)):
         # Handle the special case, where we have one path and multiple optimizations.
-        # Then, add numbers as suffixes to the path.
-        if n_optimizations >= 2 and isinstance(logging, (str, Path)):
+        # Then, add numbers as suffixes to the path unless the database is shared.
+        if n_optimizations >= 2 and isinstance(logging, (str, Path)) and not shared:
             path = Path(logging).absolute()
             logging = [
                 path.parent / (path.stem + f"_{i}.db") for i in range(n_optimizations)
@@ -30,8 +30,12 @@ def check_arguments(arguments):
                 )
 
     # Sanity check if there some False and some paths that the paths are not the same.
-    only_paths = [
-        args["logging"] for args in arguments if isinstance(args["logging"], Path)
-    ]
-    if len(set(only_paths)) != len(only_paths):
-        raise ValueError("Paths to databases cannot be identical.")
+    # Only optimizations with distinct ids can share a database.
+    path_to_ids = {}
+    for args in arguments:
+        if isinstance(args["logging"], Path):
+            optimization_id = args.get("log_options", {}).get("optimization_id")
+            path_to_ids.setdefault(args["logging"], []).append(optimization_id)
+    for ids in path_to_ids.values():
+        if len(ids) > 1 and (None in ids or len(set(ids)) != len(ids)):
+            raise ValueError("Paths to databases cannot be identical.")
@@ -29,57 +29,80 @@ def check_constraints_are_satisfied(pc, params):
 
     """
 
-    if params["value"].notnull().any():
+    values = params["value"].to_numpy()
+    if not np.isnan(values).all():
         for constr in pc:
             typ = constr["type"]
-            subset = params.iloc[constr["index"]]["value"]
-            msg = f"{{}}:\n{subset.to_frame()}"
+            subset = values[constr["index"]]
             if typ == "covariance":
                 cov = cov_params_to_matrix(subset)
                 e, v = np.linalg.eigh(cov)
                 if not np.all(e > -1e-8):
-                    raise ValueError(msg.format("Invalid covariance parameters."))
+                    raise ValueError(
+                        _msg("Invalid covariance parameters.", params, constr)
+                    )
             elif typ == "sdcorr":
                 cov = sdcorr_params_to_matrix(subset)
                 dim = len(cov)
-                if (subset.iloc[:dim] < 0).any():
-                    raise ValueError(msg.format("Invalid standard deviations."))
-                if ((subset.iloc[dim:] < -1) | (subset.iloc[dim:] > 1)).any():
-                    raise ValueError(msg.format("Invalid correlations."))
+                if (subset[:dim] < 0).any():
+                    raise ValueError(
+                        _msg("Invalid standard deviations.", params, constr)
+                    )
+                if ((subset[dim:] < -1) | (subset[dim:] > 1)).any():
+                    raise ValueError(_msg("Invalid correlations.", params, constr))
                 e, v = np.linalg.eigh(cov)
                 if not np.all(e > -1e-8):
-                    raise ValueError(msg.format("Invalid sdcorr parameters."))
+                    raise ValueError(_msg("Invalid sdcorr parameters.", params, constr))
             elif typ == "probability":
                 if not np.isclose(subset.sum(), 1, rtol=0.01):
-                    raise ValueError(msg.format("Probabilities do not sum to 1"))
+                    raise ValueError(
+                        _msg("Probabilities do not sum to 1", params, constr)
+                    )
                 if np.any(subset < 0):
-                    raise ValueError(msg.format("Negative Probability."))
+                    raise ValueError(_msg("Negative Probability.", params, constr))
                 if np.any(subset > 1):
-                    raise ValueError(msg.format("Probability larger than 1."))
+                    raise ValueError(_msg("Probability larger than 1.", params, constr))
             elif typ == "increasing":
                 if np.any(np.diff(subset) < 0):
-                    raise ValueError(msg.format("Increasing constraint violated."))
+                    raise ValueError(
+                        _msg("Increasing constraint violated.", params, constr)
+                    )
             elif typ == "decreasing":
                 if np.any(np.diff(subset) > 0):
-                    raise ValueError(msg.format("Decreasing constraint violated"))
+                    raise ValueError(
+                        _msg("Decreasing constraint violated", params, constr)
+                    )
             elif typ == "linear":
-                # using sr.dot is important in case weights are a series in wrong order
-                wsum = subset.dot(constr["weights"])
+                wsum = subset @ constr["weights"]
                 if "lower" in constr and wsum < constr["lower"]:
                     raise ValueError(
-                        msg.format("Lower bound of linear constraint violated")
+                        _msg(
+                            "Lower bound of linear constraint violated",
+                            params,
+                            constr,
+                        )
                     )
                 elif "upper" in constr and wsum > constr["upper"]:
                     raise ValueError(
-                        msg.format("Upper bound of linear constraint violated")
+                        _msg(
+                            "Upper bound of linear constraint violated",
+                            params,
+                            constr,
+                        )
                     )
                 elif "value" in constr and not np.isclose(wsum, constr["value"]):
                     raise ValueError(
-                        msg.format("Equality condition of linear constraint violated")
+                        _msg(
+                            "Equality condition of linear constraint violated",
+                            params,
+                            constr,
+                        )
                     )
             elif typ == "equality":
-                if len(subset.unique()) != 1:
-                    raise ValueError(msg.format("Equality constraint violated."))
+                if len(np.unique(subset)) != 1:
+                    raise ValueError(
+                        _msg("Equality constraint violated.", params, constr)
+                    )
 
 
 def check_types(constraints):
@@ -203,3 +226,8 @@ def check_fixes_and_bounds(pp, pc):
     msg = f"lower must be strictly smaller than upper. This is violated for:\n{invalid}"
     if len(invalid) > 0:
         raise ValueError(msg)
+
+
+def _msg(problem, params, constr):
+    # the DataFrame repr is expensive, so it is only built when a check fails
+    return f"{problem}:\n{params.iloc[constr['index']][['value']]}"
@@ -6,11 +6,20 @@ and other constraints are collected in meaningful bundles.
 Check the module docstring of process_constraints for naming conventions.
 
 """
+import heapq
+
 import numpy as np
 import pandas as pd
+from scipy import sparse
+from scipy.linalg import qr
+from scipy.linalg import solve_triangular
 
 from estimagic.optimization.utilities import number_of_triangular_elements_to_dimension
 
+# bundles of linear constraints that involve at least this many parameters are
+# consolidated with sparse weights and transformation matrices.
+_MIN_PARAMS_FOR_SPARSE = 100
+
 
 def consolidate_constraints(pc, params):
     """Consolidate constraints with each other and remove redundant ones.
@@ -41,9 +50,8 @@ def consolidate_constraints(pc, params):
     pp["_fixed_value"] = fixed_value
     pp["_is_fixed_to_value"] = pp["_fixed_value"].notnull()
 
-    other_pc = [
-        c for c in other_pc if not pp.iloc[c["index"]]["_is_fixed_to_value"].all()
-    ]
+    is_fixed_to_value = pp["_is_fixed_to_value"].to_numpy()
+    other_pc = [c for c in other_pc if not is_fixed_to_value[c["index"]].all()]
 
     other_pc, pp = simplify_covariance_and_sdcorr_constraints(other_pc, pp)
 
@@ -94,44 +102,69 @@ def _consolidate_equality_constraints(equality_pc):
 def _join_overlapping_lists(candidates):
     """Bundle all candidates with with non-empty intersection.
 
+    The bundles are the connected components of the graph in which each candidate
+    connects its elements. They are found with a disjoint set forest, such that the
+    runtime is almost linear in the total length of the candidates.
+
     Args:
-        candidates (list): List of potentially overlapping lists.
+        candidates (list): List of potentially overlapping, non-empty lists.
 
     Returns:
         bundles (list): List of lists where all overlapping lists have been joined
-            and sorted.
+            and sorted. The bundles are ordered by their first candidate.
 
     """
-    bundles = []
+    parent, size = {}, {}
+    for candidate in candidates:
+        root = _find_root(parent, size, candidate[0])
+        for element in candidate[1:]:
+            root = _union(parent, size, root, _find_root(parent, size, element))
 
-    while len(candidates) > 0:
-        new_candidates = _unite_first_with_all_intersecting_elements(candidates)
-        if len(candidates) == len(new_candidates):
-            bundles.append(sorted(new_candidates[0]))
-            candidates = candidates[1:]
-        else:
-            candidates = new_candidates
+    bundles = {}
+    for candidate in candidates:
+        root = _find_root(parent, size, candidate[0])
+        bundles.setdefault(root, set()).update(candidate)
+
+    return [sorted(bundle) for bundle in bundles.values()]
 
-    return bundles
 
+def _find_root(parent, size, element):
+    """Find the representative of element in a disjoint set forest.
 
-def _unite_first_with_all_intersecting_elements(indices):
-    """Helper function to bundle overlapping indices.
+    Unknown elements are added as new sets. Path halving keeps the trees flat.
 
     Args:
-        indices (list): A list lists with indices.
+        parent (dict): Maps each element to its parent. Roots are their own parent.
+        size (dict): Maps each root to the number of elements in its set.
+        element: Hashable element.
+
+    Returns:
+        root: The representative of the set that contains element.
 
     """
-    first = set(indices[0])
-    new_first = first
-    new_others = []
-    for idx in indices[1:]:
-        if len(first.intersection(idx)) > 0:
-            new_first = new_first.union(idx)
-        else:
-            new_others.append(idx)
+    if element not in parent:
+        parent[element] = element
+        size[element] = 1
+    while parent[element] != element:
+        parent[element] = parent[parent[element]]
+        element = parent[element]
+    return element
 
-    return [new_first] + new_others
+
+def _union(parent, size, first_root, second_root):
+    """Unite the sets of two roots by attaching the smaller to the larger tree.
+
+    Returns:
+        root: The representative of the united set.
+
+    """
+    if first_root == second_root:
+        return first_root
+    if size[first_root] < size[second_root]:
+        first_root, second_root = second_root, first_root
+    parent[second_root] = first_root
+    size[first_root] += size.pop(second_root)
+    return first_root
 
 
 def _consolidate_fixes_with_equality_constraints(fixed_pc, equality_pc, params):
@@ -150,20 +183,24 @@ def _consolidate_fixes_with_equality_constraints(fixed_pc, equality_pc, params):
             are fixed and np.nan everywhere else. Has the same index as params.
 
     """
-    fixed_value = pd.Series(index=params.index, data=np.nan)
+    values = params["value"].to_numpy()
+    fixed_value = np.full(len(params), np.nan)
     for fix in fixed_pc:
         if "value" in fix:
-            fixed_value.iloc[fix["index"]] = fix["value"]
+            fixed_value[fix["index"]] = fix["value"]
         else:
-            fixed_value.iloc[fix["index"]] = params["value"].iloc[fix["index"]]
+            fixed_value[fix["index"]] = values[fix["index"]]
 
     for eq in equality_pc:
-        if fixed_value.iloc[eq["index"]].notnull().any():
-            valcounts = fixed_value.iloc[eq["index"]].value_counts(dropna=True)
+        fixes = fixed_value[eq["index"]]
+        fixes = np.unique(fixes[~np.isnan(fixes)])
+        if len(fixes) > 0:
             assert (
-                len(valcounts) == 1
+                len(fixes) == 1
             ), "Equality constrained parameters cannot be fixed to different values."
-            fixed_value.iloc[eq["index"]] = valcounts.index[0]
+            fixed_value[eq["index"]] = fixes[0]
+
+    fixed_value = pd.Series(index=params.index, data=fixed_value)
 
     return fixed_value
 
@@ -184,11 +221,11 @@ def _consolidate_bounds_with_equality_constraints(equality_pc, params):
 
     """
     pp = params.copy()
-    lower = pp["lower"].copy()
-    upper = pp["upper"].copy()
+    lower = pp["lower"].to_numpy(dtype=float, copy=True)
+    upper = pp["upper"].to_numpy(dtype=float, copy=True)
     for eq in equality_pc:
-        lower.iloc[eq["index"]] = lower.iloc[eq["index"]].max()
-        upper.iloc[eq["index"]] = upper.iloc[eq["index"]].min()
+        lower[eq["index"]] = lower[eq["index"]].max()
+        upper[eq["index"]] = upper[eq["index"]].min()
 
     pp["lower"] = lower
     pp["upper"] = upper
@@ -217,8 +254,10 @@ def simplify_covariance_and_sdcorr_constraints(pc, pp):
     sdcorr_constraints, others = _split_constraints(others, "sdcorr")
     to_simplify = cov_constraints + sdcorr_constraints
     pp = pp.copy()
-    lower = pp["lower"].copy()
-    upper = pp["upper"].copy()
+    lower = pp["lower"].to_numpy(dtype=float, copy=True)
+    upper = pp["upper"].to_numpy(dtype=float, copy=True)
+    is_fixed_to_value = pp["_is_fixed_to_value"].to_numpy()
+    fixed_value = pp["_fixed_value"].to_numpy()
 
     not_simplifyable = []
     for constr in to_simplify:
@@ -232,16 +271,16 @@ def simplify_covariance_and_sdcorr_constraints(pc, pp):
             off_indices = constr["index"][dim:]
 
         uncorrelated = False
-        if pp.iloc[off_indices]["_is_fixed_to_value"].all():
-            if (pp.iloc[off_indices]["_fixed_value"] == 0).all():
+        if is_fixed_to_value[off_indices].all():
+            if (fixed_value[off_indices] == 0).all():
                 uncorrelated = True
 
         if uncorrelated:
-            lower.iloc[diag_indices] = np.maximum(0, lower.iloc[diag_indices])
+            lower[diag_indices] = np.maximum(0, lower[diag_indices])
         elif dim <= 2:
-            lower.iloc[diag_indices] = np.maximum(0, lower.iloc[diag_indices])
-            lower.iloc[off_indices] = -1
-            upper.iloc[off_indices] = 1
+            lower[diag_indices] = np.maximum(0, lower[diag_indices])
+            lower[off_indices] = -1
+            upper[off_indices] = 1
         else:
             not_simplifyable.append(constr)
 
@@ -271,25 +310,26 @@ def _plug_equality_constraints_into_selectors(equality_pc, other_pc, params):
 
     """
     pp = params.copy()
-    is_equal_to = pd.Series(index=params.index, data=-1, dtype=int)
+    is_equal_to = np.full(len(params), -1)
     for eq in equality_pc:
-        is_equal_to.iloc[sorted(eq["index"])[1:]] = sorted(eq["index"])[0]
+        is_equal_to[sorted(eq["index"])[1:]] = sorted(eq["index"])[0]
     pp["_post_replacements"] = is_equal_to
     pp["_is_fixed_to_other"] = is_equal_to >= 0
-    helper = pp["_post_replacements"].reset_index(drop=True)
-    replace_dict = helper[helper >= 0].to_dict()
+    plugged_iloc = np.where(is_equal_to >= 0, is_equal_to, np.arange(len(params)))
 
     plugged_in = []
     for constr in other_pc:
         new = constr.copy()
-        new["index"] = pd.Series(constr["index"]).replace(replace_dict).tolist()
+        new["index"] = plugged_iloc[constr["index"]].tolist()
         plugged_in.append(new)
 
     linear_constraints, others = _split_constraints(plugged_in, "linear")
 
-    pc = []
+    pc, seen = [], set()
     for constr in others:
-        if not _is_redundant(constr, pc):
+        key = (constr["type"], tuple(constr["index"]))
+        if key not in seen:
+            seen.add(key)
             pc.append(constr)
 
     pc += linear_constraints
@@ -312,6 +352,9 @@ def _consolidate_linear_constraints(linear_pc, pp):
     - Construct a list of consolidated constraint dictionaries that contain
         all matrices needed for the kernel transformations.
 
+    Bundles of overlapping constraints that involve many parameters are consolidated
+    with sparse matrices. See :func:`_consolidate_sparse_linear_constraints`.
+
     Args:
         linear_pc (list): Linear processed constraints.
         pp (pd.DataFrame): Processed params.
@@ -320,29 +363,33 @@ def _consolidate_linear_constraints(linear_pc, pp):
         pc (list): Processed and consolidated linear constraints.
 
     """
-    weights, right_hand_side = _transform_linear_constraints_to_pandas_objects(
+    plugged = _plug_equality_constraints_and_fixes_into_linear_constraints(
         linear_pc, pp
     )
+    # constraints that only involve fixed parameters are satisfied at the fixed values
+    plugged = [constr for constr in plugged if len(constr["index"]) > 0]
 
-    weights = _plug_equality_constraints_into_linear_weights(
-        weights, pp._post_replacements
-    )
-    weights, right_hand_side = _plug_fixes_into_linear_weights_and_rhs(
-        weights, right_hand_side, pp._is_fixed_to_value, pp._fixed_value
-    )
-
-    involved_parameters = []
-    for _, w in weights.iterrows():
-        involved_parameters.append(set(w[w != 0].index))
-
-    bundled_indices = _join_overlapping_lists(involved_parameters)
+    bundled_indices = _join_overlapping_lists([c["index"] for c in plugged])
+    bundle_of_param = {}
+    for i, bundle in enumerate(bundled_indices):
+        bundle_of_param.update(dict.fromkeys(bundle, i))
+    bundled_constraints = [[] for _ in bundled_indices]
+    for constr in plugged:
+        bundled_constraints[bundle_of_param[constr["index"][0]]].append(constr)
 
     pc = []
-    for involved_parameters in bundled_indices:
-        w = weights[involved_parameters][
-            (weights[involved_parameters] != 0).any(axis=1)
-        ].copy(deep=True)
-        rhs = right_hand_side.loc[w.index].copy(deep=True)
+    for involved_parameters, constraints in zip(bundled_indices, bundled_constraints):
+        if len(involved_parameters) >= _MIN_PARAMS_FOR_SPARSE:
+            pc.append(
+                _consolidate_sparse_linear_constraints(
+                    constraints, involved_parameters, pp
+                )
+            )
+            continue
+
+        w, rhs = _transform_linear_constraints_to_pandas_objects(
+            constraints, involved_parameters
+        )
         w, rhs = _express_bounds_as_linear_constraints(w, rhs, pp.lower, pp.upper)
         w, rhs = _rescale_linear_constraints(w, rhs)
         w, rhs = _drop_redundant_linear_constraints(w, rhs)
@@ -361,92 +408,96 @@ def _consolidate_linear_constraints(linear_pc, pp):
     return pc
 
 
-def _transform_linear_constraints_to_pandas_objects(linear_pc, pp):
-    """Collect information from the linear constraint dictionaries into pandas objects.
+def _plug_equality_constraints_and_fixes_into_linear_constraints(linear_pc, pp):
+    """Express linear constraints in terms of the parameters that are actually free.
+
+    The weights of equality constrained parameters are summed and attributed to the
+    parameter that is actually free. The contribution of fixed parameters is moved to
+    the right hand side. Parameters whose weights sum to zero are dropped.
 
     Args:
-        linear_pc (list): List of constraint of type "linear".
-        pp (pd.DataFrame): see :ref:`params`
+        linear_pc (list): List of constraints of type "linear".
+        pp (pd.DataFrame): Processed params.
 
     Returns:
-        weights (pd.DataFrame): DataFrame with one row per constraint and one column
-            per parameter. Columns names are the ilocs of the parameters in params.
-        rhs (pd.DataFrame): DataFrame with the columns "value", "lower" and
-            "upper" that collects the right hand sides of the constraints.
+        plugged (list): List of dictionaries with the entries "index", "weights",
+            "value", "lower" and "upper". "index" is a sorted array with the positions
+            of the involved free parameters and "weights" is aligned with it.
 
     """
-    all_weights, all_values, all_lbs, all_ubs = [], [], [], []
+    post_replacements = pp["_post_replacements"].to_numpy()
+    plugged_iloc = np.where(
+        post_replacements >= 0, post_replacements, np.arange(len(pp))
+    )
+    is_fixed = pp["_is_fixed_to_value"].to_numpy(dtype=bool)
+    fixed_value = pp["_fixed_value"].to_numpy()
+
+    plugged = []
     for constr in linear_pc:
-        all_weights.append(constr["weights"])
-        all_values.append(constr.get("value", np.nan))
-        all_lbs.append(constr.get("lower", -np.inf))
-        all_ubs.append(constr.get("upper", np.inf))
-
-    weights = pd.concat(all_weights, axis=1).T.reset_index()
-    weights = weights.reindex(columns=pp.index).fillna(0)
-    weights.columns = np.arange(len(weights.columns))
-    values = pd.Series(all_values, name="value")
-    lbs = pd.Series(all_lbs, name="lower")
-    ubs = pd.Series(all_ubs, name="upper")
-    rhs = pd.concat([values, lbs, ubs], axis=1)
+        index = np.asarray(constr["index"], dtype=int)
+        weights = np.asarray(constr["weights"], dtype=float)
+        fixed = is_fixed[index]
+        fixed_part = weights[fixed] @ fixed_value[index[fixed]]
 
-    return weights, rhs
+        free_index, position = np.unique(
+            plugged_iloc[index[~fixed]], return_inverse=True
+        )
+        free_weights = np.bincount(
+            position, weights=weights[~fixed], minlength=len(free_index)
+        )
+        nonzero = free_weights != 0
+
+        plugged.append(
+            {
+                "index": free_index[nonzero],
+                "weights": free_weights[nonzero],
+                "value": constr.get("value", np.nan) - fixed_part,
+                "lower": constr.get("lower", -np.inf) - fixed_part,
+                "upper": constr.get("upper", np.inf) - fixed_part,
+            }
+        )
 
+    return plugged
 
-def _plug_equality_constraints_into_linear_weights(weights, post_replacements):
-    """Sum the weights of equality constrained parameters.
 
-    The sum of the weights is then the new weight of the equality constrained parameter
-    that is actually free. The weights of the other parameters are set to zero.
+def _transform_linear_constraints_to_pandas_objects(linear_pc, involved_parameters):
+    """Collect information from the linear constraint dictionaries into pandas objects.
 
     Args:
-        weights (pd.DataFrame): Weight matrices for linear constraints.
-        post_replacements (pd.Series): The _post_replacements column of pp.
+        linear_pc (list): List of plugged linear constraints. See
+            :func:`_plug_equality_constraints_and_fixes_into_linear_constraints`.
+        involved_parameters (list): Sorted positions of all parameters that appear in
+            any of the constraints.
 
     Returns:
-        plugged_weights (pd.DataFrame)
+        weights (pd.DataFrame): DataFrame with one row per constraint and one column
+            per involved parameter. Columns names are the ilocs of the parameters in
+            params.
+        rhs (pd.DataFrame): DataFrame with the columns "value", "lower" and
+            "upper" that collects the right hand sides of the constraints.
 
     """
-    w = weights.T
-    plugged_iloc = post_replacements.reset_index(drop=True)
-    plugged_iloc = plugged_iloc.where(plugged_iloc >= 0, np.arange(len(plugged_iloc)))
-    w["plugged_iloc"] = plugged_iloc
+    weights = np.zeros((len(linear_pc), len(involved_parameters)))
+    for i, constr in enumerate(linear_pc):
+        columns = np.searchsorted(involved_parameters, constr["index"])
+        weights[i, columns] = constr["weights"]
+    weights = pd.DataFrame(weights, columns=involved_parameters)
+    rhs = _collect_right_hand_sides(linear_pc)
 
-    plugged_weights = w.groupby("plugged_iloc").sum()
-    plugged_weights = plugged_weights.reindex(w.index).fillna(0).T
-
-    return plugged_weights
-
-
-def _plug_fixes_into_linear_weights_and_rhs(
-    weights, rhs, is_fixed_to_value, fixed_value
-):
-    """Set weights of fixed parameters to 0 and adjust right hand sides accordingly.
-
-    Args:
-        weights (pd.DataFrame): Weight matrix for linear constraint.
-        rhs (pd.DataFrame): Right hand side of the linear constraint.
-        is_fixed_to_value (pd.Series): The _is_fixed_to_value column of pp.
-        fixed_value (pd.Series): The _fixed_value column of pp.
+    return weights, rhs
 
-    Returns:
-        new_weighs (pd.DataFrame)
-        new_rhs (pd.DataFrame)
-    """
-    ilocs = pd.Series(data=range(len(fixed_value)), index=fixed_value.index)
-    fixed_ilocs = ilocs[is_fixed_to_value].tolist()
-    new_rhs = rhs.copy()
-    new_weights = weights.copy()
-
-    if len(fixed_ilocs) > 0:
-        fixed_values = fixed_value.iloc[fixed_ilocs].to_numpy()
-        to_add = weights[fixed_ilocs] @ fixed_values
-        for column in ["lower", "upper", "value"]:
-            new_rhs[column] = new_rhs[column] + to_add
-        for i in fixed_ilocs:
-            new_weights[i] = 0
 
-    return new_weights, new_rhs
+def _collect_right_hand_sides(linear_pc):
+    """DataFrame with the columns "value", "lower" and "upper" of linear constraints."""
+    rhs = pd.DataFrame(
+        {
+            "value": [constr["value"] for constr in linear_pc],
+            "lower": [constr["lower"] for constr in linear_pc],
+            "upper": [constr["upper"] for constr in linear_pc],
+        },
+        dtype=float,
+    )
+    return rhs
 
 
 def _express_bounds_as_linear_constraints(weights, rhs, lower, upper):
@@ -468,23 +519,14 @@ def _express_bounds_as_linear_constraints(weights, rhs, lower, upper):
         extended_rhs (pd.DataFrame)
 
     """
-    additional_pc = []
-    for i in weights.columns:
-        new = {}
-        if np.isfinite(lower.iloc[i]):
-            new["lower"] = lower.iloc[i]
-        if np.isfinite(upper.iloc[i]):
-            new["upper"] = upper.iloc[i]
-        if new != {}:
-            new["weights"] = pd.Series([1], name="w", index=lower.iloc[[i]].index)
-            additional_pc.append(new)
-
-    if len(additional_pc) > 0:
-        new_weights, new_rhs = _transform_linear_constraints_to_pandas_objects(
-            additional_pc, lower
-        )
-        new_weights = new_weights[weights.columns]
+    is_bounded, new_rhs = _get_bounds_of_involved_parameters(
+        weights.columns, lower, upper
+    )
 
+    if is_bounded.any():
+        new_weights = pd.DataFrame(
+            np.eye(len(is_bounded))[is_bounded], columns=weights.columns
+        )
         extended_weights = pd.concat([weights, new_weights]).reset_index(drop=True)
         extended_rhs = pd.concat([rhs, new_rhs]).reset_index(drop=True)
     else:
@@ -493,6 +535,25 @@ def _express_bounds_as_linear_constraints(weights, rhs, lower, upper):
     return extended_weights, extended_rhs
 
 
+def _get_bounds_of_involved_parameters(involved_parameters, lower, upper):
+    """Collect the finite bounds of involved parameters as right hand sides.
+
+    Returns:
+        is_bounded (np.ndarray): Boolean array that is True for involved parameters
+            with at least one finite bound.
+        rhs (pd.DataFrame): Right hand sides with one row per bounded parameter.
+
+    """
+    columns = np.asarray(involved_parameters, dtype=int)
+    lb = lower.to_numpy(dtype=float)[columns]
+    ub = upper.to_numpy(dtype=float)[columns]
+    is_bounded = np.isfinite(lb) | np.isfinite(ub)
+    rhs = pd.DataFrame(
+        {"value": np.nan, "lower": lb[is_bounded], "upper": ub[is_bounded]}
+    )
+    return is_bounded, rhs
+
+
 def _rescale_linear_constraints(weights, rhs):
     """Rescale rows in weights such that the first nonzero element equals one.
 
@@ -507,25 +568,51 @@ def _rescale_linear_constraints(weights, rhs):
         new_rhs (pd.DataFrame)
 
     """
-    first_nonzero = weights.replace(0, np.nan).bfill(1).iloc[:, 0]
-    scaling_factor = 1 / first_nonzero.to_numpy().reshape(-1, 1)
-    new_weights = scaling_factor * weights
-    scaled_rhs = scaling_factor * rhs
-    new_rhs = scaled_rhs.copy()
-    new_rhs["lower"] = scaled_rhs["lower"].where(
-        scaling_factor.flatten() > 0, scaled_rhs["upper"]
-    )
-    new_rhs["upper"] = scaled_rhs["upper"].where(
-        scaling_factor.flatten() > 0, scaled_rhs["lower"]
+    w = weights.to_numpy()
+    is_nonzero = w != 0
+    first_nonzero = w[np.arange(len(w)), is_nonzero.argmax(axis=1)]
+    first_nonzero = np.where(is_nonzero.any(axis=1), first_nonzero, np.nan)
+    scaling_factor = 1 / first_nonzero
+
+    new_weights = pd.DataFrame(
+        scaling_factor.reshape(-1, 1) * w, index=weights.index, columns=weights.columns
     )
+    new_rhs = _rescale_right_hand_sides(rhs, scaling_factor)
 
     return new_weights, new_rhs
 
 
+def _rescale_right_hand_sides(rhs, scaling_factor):
+    """Multiply the right hand sides with scaling_factor and swap negated bounds."""
+    scaled_lower = scaling_factor * rhs["lower"].to_numpy()
+    scaled_upper = scaling_factor * rhs["upper"].to_numpy()
+    new_rhs = pd.DataFrame(
+        {
+            "value": scaling_factor * rhs["value"].to_numpy(),
+            "lower": np.where(scaling_factor > 0, scaled_lower, scaled_upper),
+            "upper": np.where(scaling_factor > 0, scaled_upper, scaled_lower),
+        },
+        index=rhs.index,
+    )
+
+    return new_rhs
+
+
 def _drop_redundant_linear_constraints(weights, rhs):
     """Drop linear constraints that are implied by other linear constraints.
 
-    This is not yet very smart. We just check for linearly dependent weights.
+    Two kinds of redundancy are detected:
+
+    - Constraints with identical rescaled weights. They are merged into one constraint
+      with the strictest bounds.
+    - Constraints whose weights are a linear combination of the weights of constraints
+      that fix a weighted sum. They are dropped if the implied value of the weighted
+      sum is compatible with their value or bounds.
+
+    Both are detected for all constraints at once: duplicates by sorting the rows and
+    linear combinations by a rank-revealing QR decomposition. Other linearly dependent
+    constraints are not dropped because their bounds are not implied by the other
+    constraints. They are reported by :func:`_check_consolidated_weights`.
 
     Args:
         weights (pd.DataFrame): The weight matrix of the linear constraint.
@@ -536,37 +623,143 @@ def _drop_redundant_linear_constraints(weights, rhs):
         new_rhs (pd.DataFrame)
 
     """
-    weights["dupl_group"] = weights.groupby(list(weights.columns)).grouper.group_info[0]
-    rhs["dupl_group"] = weights["dupl_group"]
-    weights.set_index("dupl_group", inplace=True)
-
-    new_weights = weights.drop_duplicates()
-
-    def _consolidate_fix(x):
-        vc = x.value_counts(dropna=True)
-        if len(vc) == 0:
-            return np.nan
-        elif len(vc) == 1:
-            return vc.index[0]
-        else:
-            raise ValueError
+    weights, rhs = _drop_duplicate_linear_constraints(weights, rhs)
+    weights, rhs = _drop_linear_constraints_implied_by_fixes(weights, rhs)
+
+    return weights, rhs
+
+
+def _drop_duplicate_linear_constraints(weights, rhs):
+    """Merge linear constraints with identical rescaled weights.
+
+    Args:
+        weights (pd.DataFrame): The rescaled weight matrix of the linear constraint.
+        rhs (pd.DataFrame): The right hand side of the linear constraint.
 
-    ub = rhs.groupby("dupl_group")["upper"].min()
-    lb = rhs.groupby("dupl_group")["lower"].max()
-    fix = rhs.groupby("dupl_group")["value"].apply(_consolidate_fix)
+    Returns:
+        new_weights (pd.DataFrame)
+        new_rhs (pd.DataFrame)
 
-    # remove the bounds for fixed parameters
-    ub = ub.where(fix.isnull(), np.inf)
-    lb = lb.where(fix.isnull(), -np.inf)
+    """
+    # adding zero replaces -0.0 by 0.0, such that equal rows have equal bytes.
+    w = weights.to_numpy() + 0.0
+    group, _ = pd.factorize([row.tobytes() for row in w])
+    _, first = np.unique(group, return_index=True)
+    n_groups = len(first)
+
+    lower = np.full(n_groups, -np.inf)
+    np.maximum.at(lower, group, rhs["lower"].to_numpy())
+    upper = np.full(n_groups, np.inf)
+    np.minimum.at(upper, group, rhs["upper"].to_numpy())
+    # fmin and fmax ignore the missing values of constraints that are not fixes.
+    min_value = np.full(n_groups, np.nan)
+    np.fmin.at(min_value, group, rhs["value"].to_numpy())
+    max_value = np.full(n_groups, np.nan)
+    np.fmax.at(max_value, group, rhs["value"].to_numpy())
+
+    is_incompatible = min_value != max_value
+    is_incompatible[np.isnan(min_value)] = False
+    if is_incompatible.any():
+        rows = np.flatnonzero(is_incompatible[group])
+        raise ValueError(
+            "Linear constraints with identical weights fix the weighted sum to "
+            f"different values:\n{weights.iloc[rows]}\n{rhs.iloc[rows]}"
+        )
 
-    new_rhs = pd.concat([lb, ub, fix], axis=1, names=["lower", "upper", "value"])
-    new_rhs = new_rhs.reindex(weights.index)
+    is_fixed = ~np.isnan(min_value)
+    new_rhs = pd.DataFrame(
+        {
+            "value": min_value,
+            "lower": np.where(is_fixed, -np.inf, lower),
+            "upper": np.where(is_fixed, np.inf, upper),
+        },
+        index=rhs.index[first],
+    )
+    new_weights = weights.iloc[first]
 
     return new_weights, new_rhs
 
 
-def _check_consolidated_weights(weights, pp):
-    """Check the rank condition on the linear weights."""
+def _drop_linear_constraints_implied_by_fixes(weights, rhs, tol=1e-10):
+    """Drop linear constraints that are implied by constraints that fix weighted sums.
+
+    A rank-revealing QR decomposition of the weights of all fixing constraints yields
+    an orthonormal basis of their row space and a subset of linearly independent
+    fixing constraints. Each other constraint whose weights lie in that row space is a
+    linear combination of the independent fixing constraints and its weighted sum is
+    implied by their values.
+
+    Args:
+        weights (pd.DataFrame): The weight matrix of the linear constraint.
+        rhs (pd.DataFrame): The right hand side of the linear constraint.
+        tol (float): Relative tolerance for the rank and for the distance of weights to
+            the row space of the fixing constraints.
+
+    Returns:
+        new_weights (pd.DataFrame)
+        new_rhs (pd.DataFrame)
+
+    Raises:
+        ValueError: If an implied value is incompatible with the value or bounds of
+            the implied constraint.
+
+    """
+    w = weights.to_numpy()
+    values = rhs["value"].to_numpy()
+    fixed_rows = np.flatnonzero(~np.isnan(values))
+    if len(fixed_rows) == 0:
+        return weights, rhs
+
+    q, r, permutation = qr(w[fixed_rows].T, mode="economic", pivoting=True)
+    diagonal = np.abs(np.diag(r))
+    rank = int((diagonal > tol * diagonal[0]).sum())
+    basis = fixed_rows[permutation[:rank]]
+    q, r = q[:, :rank], r[:rank, :rank]
+
+    others = np.setdiff1d(np.arange(len(w)), basis)
+    projected = w[others] @ q
+    distance = np.linalg.norm(w[others] - projected @ q.T, axis=1)
+    is_implied = distance <= tol * np.linalg.norm(w[others], axis=1)
+    implied = others[is_implied]
+    if len(implied) == 0:
+        return weights, rhs
+
+    # weights[basis].T @ coefficients = weights[implied].T with
+    # weights[basis].T = q @ r
+    coefficients = solve_triangular(r, projected[is_implied].T)
+    implied_values = values[basis] @ coefficients
+
+    implied_rhs = rhs.iloc[implied]
+    is_fixed = ~np.isnan(implied_rhs["value"].to_numpy())
+    is_compatible = np.where(
+        is_fixed,
+        np.isclose(implied_rhs["value"].to_numpy(), implied_values),
+        (implied_rhs["lower"].to_numpy() <= implied_values + tol)
+        & (implied_values - tol <= implied_rhs["upper"].to_numpy()),
+    )
+    if not is_compatible.all():
+        problems = implied_rhs[~is_compatible].assign(
+            implied_value=implied_values[~is_compatible]
+        )
+        raise ValueError(
+            "Linear constraints are incompatible with the values of weighted sums "
+            "that are implied by other linear constraints:\n"
+            f"{weights.iloc[implied[~is_compatible]]}\n{problems}"
+        )
+
+    keep = np.setdiff1d(np.arange(len(w)), implied)
+    return weights.iloc[keep], rhs.iloc[keep]
+
+
+def _check_consolidated_weights(weights, pp, rank=None):
+    """Check the rank condition on the linear weights.
+
+    Args:
+        weights (pd.DataFrame): The weight matrix of the linear constraint.
+        pp (pd.DataFrame): Processed params.
+        rank (int, optional): Rank of the weight matrix. It is calculated if None.
+
+    """
     n_constraints, n_params = weights.shape
 
     msg_too_many = (
@@ -588,7 +781,8 @@ def _check_consolidated_weights(weights, pp):
     if n_constraints > n_params:
         raise ValueError(msg_too_many + msg_general.format(ind, weights))
 
-    if np.linalg.matrix_rank(weights) < n_constraints:
+    rank = np.linalg.matrix_rank(weights) if rank is None else rank
+    if rank < n_constraints:
         raise ValueError(msg_rank + msg_general.format(ind, weights))
 
 
@@ -643,18 +837,224 @@ def _get_kernel_transformation_matrices(weights):
     return to_internal, from_internal
 
 
-def _is_redundant(candidate, others):
-    """Check if a constraint is redundant given other constraints.
+def _consolidate_sparse_linear_constraints(linear_pc, involved_parameters, pp):
+    """Consolidate one bundle of overlapping linear constraints with sparse matrices.
 
-    Applicable to all but linear constraints.
+    This does the same steps as :func:`_consolidate_linear_constraints` but the weights
+    and transformation matrices are scipy.sparse CSR matrices. Instead of trying unit
+    vectors until the weights are filled up to a matrix of full rank, a sparse Gaussian
+    elimination determines a set of pivot columns in which the weights are invertible.
+    The remaining parameters are the ones that are transformed by unit vectors. Thus
+    memory and computation time scale with the number of nonzero weights.
+
+    Args:
+        linear_pc (list): Plugged linear constraints of one bundle. See
+            :func:`_plug_equality_constraints_and_fixes_into_linear_constraints`.
+        involved_parameters (list): Sorted positions of the involved parameters.
+        pp (pd.DataFrame): Processed params.
+
+    Returns:
+        constr (dict): Consolidated linear constraint.
 
     """
-    assert candidate["type"] != "linear"
-    if len(others) == 0:
-        is_redundant = False
-    else:
-        same_type, _ = _split_constraints(others, candidate["type"])
-        duplicates = [c for c in same_type if c["index"] == candidate["index"]]
-        is_redundant = len(duplicates) > 0
+    n_params = len(involved_parameters)
+    rows = np.repeat(np.arange(len(linear_pc)), [len(c["index"]) for c in linear_pc])
+    columns = np.searchsorted(
+        involved_parameters, np.concatenate([c["index"] for c in linear_pc])
+    )
+    data = np.concatenate([c["weights"] for c in linear_pc])
+    weights = sparse.csr_matrix(
+        (data, (rows, columns)), shape=(len(linear_pc), n_params)
+    )
+    rhs = _collect_right_hand_sides(linear_pc)
+
+    is_bounded, bounds_rhs = _get_bounds_of_involved_parameters(
+        involved_parameters, pp.lower, pp.upper
+    )
+    if is_bounded.any():
+        bounds_weights = sparse.identity(n_params, format="csr")[is_bounded]
+        weights = sparse.vstack([weights, bounds_weights], format="csr")
+        rhs = pd.concat([rhs, bounds_rhs]).reset_index(drop=True)
+
+    weights.sort_indices()
+    first_nonzero = weights.data[weights.indptr[:-1]]
+    scaling_factor = 1 / first_nonzero
+    weights = sparse.csr_matrix(sparse.diags(scaling_factor) @ weights)
+    weights.sort_indices()
+    rhs = _rescale_right_hand_sides(rhs, scaling_factor)
+
+    weights, rhs = _drop_duplicate_sparse_linear_constraints(weights, rhs)
+
+    pivots = _find_pivot_columns(weights)
+    if len(pivots) < weights.shape[0]:
+        # linearly dependent constraints are rare and handled with dense matrices.
+        dense = pd.DataFrame(weights.toarray(), columns=involved_parameters)
+        dense, rhs = _drop_linear_constraints_implied_by_fixes(dense, rhs)
+        weights = sparse.csr_matrix(dense.to_numpy())
+        pivots = _find_pivot_columns(weights)
+        if len(pivots) < weights.shape[0]:
+            _check_consolidated_weights(dense, pp, rank=len(pivots))
+
+    to_internal, from_internal = _get_sparse_kernel_transformation_matrices(
+        weights, pivots
+    )
+    rhs_index = pp.iloc[involved_parameters[n_params - len(rhs) :]].index
+    rhs = pd.DataFrame(rhs.to_numpy(), columns=rhs.columns, index=rhs_index)
+
+    constr = {
+        "index": [int(i) for i in involved_parameters],
+        "type": "linear",
+        "to_internal": to_internal,
+        "from_internal": from_internal,
+        "right_hand_side": rhs,
+    }
+    return constr
+
+
+def _drop_duplicate_sparse_linear_constraints(weights, rhs):
+    """Merge rescaled linear constraints with identical weights.
+
+    The strictest bounds are kept. Constraints with identical weights that fix the
+    weighted sum to different values are incompatible.
+
+    Args:
+        weights (scipy.sparse.csr_matrix): Rescaled weights with sorted indices.
+        rhs (pd.DataFrame): The right hand sides of the linear constraints.
+
+    Returns:
+        new_weights (scipy.sparse.csr_matrix)
+        new_rhs (pd.DataFrame)
+
+    """
+    groups = {}
+    for i in range(weights.shape[0]):
+        start, stop = weights.indptr[i], weights.indptr[i + 1]
+        indices, data = weights.indices[start:stop], weights.data[start:stop]
+        key = (indices.tobytes(), data.tobytes())
+        groups.setdefault(key, []).append(i)
+
+    first_rows, new_rhs = [], []
+    for group in groups.values():
+        group_rhs = rhs.iloc[group]
+        values = group_rhs["value"].dropna().unique()
+        if len(values) > 1:
+            raise ValueError(
+                "Linear constraints with identical weights fix the weighted sum to "
+                f"different values:\n{group_rhs}"
+            )
+        elif len(values) == 1:
+            new_rhs.append({"value": values[0], "lower": -np.inf, "upper": np.inf})
+        else:
+            new_rhs.append(
+                {
+                    "value": np.nan,
+                    "lower": group_rhs["lower"].max(),
+                    "upper": group_rhs["upper"].min(),
+                }
+            )
+        first_rows.append(group[0])
+
+    new_weights = weights[first_rows]
+    new_rhs = pd.DataFrame(new_rhs, columns=["value", "lower", "upper"])
+
+    return new_weights, new_rhs
+
+
+def _find_pivot_columns(weights, tol=1e-10):
+    """Find columns in which the weights of linear constraints are invertible.
+
+    The rows are eliminated one after the other against the already reduced rows and
+    the last nonzero column of each reduced row becomes its pivot. The pivots are thus
+    the last linearly independent columns of the weights. Their complement are the
+    parameters for which :func:`_get_kernel_transformation_matrices` adds unit vectors.
+    Since elimination with sparse rows mostly creates few new nonzero entries, this is
+    much faster than a dense QR or SVD for large and sparse weight matrices.
+
+    Args:
+        weights (scipy.sparse.csr_matrix): The weight matrix of the linear constraint.
+        tol (float): Entries of reduced rows whose absolute value is smaller than tol
+            times the largest absolute weight of the original row are treated as zero.
+
+    Returns:
+        pivots (list): Pivot column for each row. If a row is linearly dependent on
+            the previous rows, the elimination stops and the pivots of the previous
+            rows are returned.
+
+    """
+    reduced_rows, pivots, order = {}, [], {}
+    for i in range(weights.shape[0]):
+        start, stop = weights.indptr[i], weights.indptr[i + 1]
+        row = dict(zip(weights.indices[start:stop], weights.data[start:stop]))
+        threshold = tol * max(abs(v) for v in row.values())
+
+        # eliminate the pivots in the order in which they were found, such that
+        # eliminating one pivot does not re-introduce an earlier one.
+        hits = [(order[col], col) for col in row if col in reduced_rows]
+        heapq.heapify(hits)
+        while hits:
+            _, col = heapq.heappop(hits)
+            factor = row.pop(col) / reduced_rows[col][col]
+            if abs(factor) * abs(reduced_rows[col][col]) <= threshold:
+                continue
+            for other_col, value in reduced_rows[col].items():
+                if other_col == col:
+                    continue
+                if other_col not in row and other_col in reduced_rows:
+                    heapq.heappush(hits, (order[other_col], other_col))
+                row[other_col] = row.get(other_col, 0) - factor * value
+
+        row = {c: v for c, v in row.items() if abs(v) > threshold}
+        if not row:
+            break
+        pivot = max(row)
+        order[pivot] = len(pivots)
+        reduced_rows[pivot] = row
+        pivots.append(pivot)
+
+    return pivots
+
+
+def _get_sparse_kernel_transformation_matrices(weights, pivots):
+    """Construct sparse matrices for the kernel transformations.
+
+    The internal parameters are the external parameters that are not pivot columns,
+    followed by the weighted sums of the constraints. As in
+    :func:`_get_kernel_transformation_matrices` the unit vectors are the first rows of
+    to_internal. The inverse is constructed blockwise, such that only the weights in
+    the pivot columns have to be inverted.
+
+    Args:
+        weights (scipy.sparse.csr_matrix): Weight matrix of a linear constraint.
+        pivots (list): Pivot columns. See :func:`_find_pivot_columns`.
+
+    Returns:
+        to_internal (scipy.sparse.csr_matrix)
+        from_internal (scipy.sparse.csr_matrix)
 
-    return is_redundant
+    """
+    n_params = weights.shape[1]
+    is_pivot = np.zeros(n_params, dtype=bool)
+    is_pivot[pivots] = True
+    free = np.flatnonzero(~is_pivot)
+    pivots = np.flatnonzero(is_pivot)
+    k = len(free)
+
+    unit_vectors = sparse.csr_matrix(
+        (np.ones(k), (np.arange(k), free)), shape=(k, n_params)
+    )
+    to_internal = sparse.vstack([unit_vectors, weights], format="csr")
+
+    # weights @ x = w_free @ x_free + w_pivot @ x_pivot, such that
+    # x_pivot = w_pivot^-1 @ (internal[k:] - w_free @ internal[:k])
+    weights = weights.tocsc()
+    # the inverse of the weights in the pivot columns is usually dense, even if the
+    # weights are sparse. Inverting them as dense array is therefore fastest.
+    inv_pivot = sparse.csr_matrix(np.linalg.inv(weights[:, pivots].toarray()))
+    pivot_rows = sparse.hstack([-inv_pivot @ weights[:, free], inv_pivot])
+    free_rows = sparse.identity(n_params, format="csr")[:k]
+    from_internal = sparse.vstack([free_rows, pivot_rows], format="csr")
+    # reorder the rows from [free, pivots] to the order of the external parameters
+    from_internal = from_internal[np.argsort(np.concatenate([free, pivots]))]
+    from_internal.eliminate_zeros()
+
+    return to_internal, from_internal
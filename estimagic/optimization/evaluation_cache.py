@@ -0,0 +1,78 @@
+"""A bounded cache for evaluations of the internal criterion function.
+
+Optimizers often request the criterion value at the same parameters more than once.
+For example, :func:`scipy.optimize._numdiff.approx_derivative` evaluates the criterion
+at the current parameters although the optimizer just did, line searches re-evaluate
+accepted points and pygmo re-evaluates champions. For expensive criterion functions,
+each avoided evaluation saves considerable time.
+
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+
+class EvaluationCache:
+    """Least recently used cache of criterion values keyed by internal parameters.
+
+    Two parameter vectors hit the same entry if their bytes are exactly equal, so the
+    cache never returns a value for slightly different parameters.
+
+    Args:
+        maxsize (int): Maximal number of stored evaluations. If it is zero, nothing is
+            stored. Default 100.
+
+    Examples:
+        >>> cache = EvaluationCache(maxsize=2)
+        >>> cache.store(np.ones(2), 3.0)
+        >>> cache.lookup(np.ones(2))
+        (True, 3.0)
+        >>> cache.lookup(np.zeros(2))
+        (False, None)
+        >>> cache.hits, cache.misses
+        (1, 1)
+
+    """
+
+    def __init__(self, maxsize=100):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def lookup(self, x):
+        """Look up the criterion value at x.
+
+        Args:
+            x (np.ndarray): One-dimensional array with internal parameters.
+
+        Returns:
+            found (bool): Whether x is in the cache.
+            value: The cached criterion value or None.
+
+        """
+        key = _make_key(x)
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return True, self._entries[key]
+        else:
+            self.misses += 1
+            return False, None
+
+    def store(self, x, value):
+        """Store the criterion value at x and evict the least recently used entry."""
+        if self.maxsize > 0:
+            self._entries[_make_key(x)] = value
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries and reset the hit and miss counts."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def _make_key(x):
+    return np.ascontiguousarray(x, dtype=float).tobytes()
@@ -1,55 +1,193 @@
+"""Kernel transformations of constrained parameters.
+
+All transformations take a 1d array with the values of the constrained parameters or a
+2d array with one such vector per row. In the latter case, each row is transformed
+separately.
+
+For each transformation from internal, there is a function that calculates its
+Jacobian, i.e. the derivative of the external values with respect to the internal
+values, at a 1d array of internal values. The Jacobians are used to convert the
+gradient of the criterion with respect to external parameters into a gradient with
+respect to internal parameters.
+
+The transformation matrices of linear constraints are either dense numpy arrays or
+scipy.sparse CSR matrices.
+
+"""
 import numpy as np
+from scipy import sparse
 
-from estimagic.optimization.utilities import chol_params_to_lower_triangular_matrix
-from estimagic.optimization.utilities import cov_matrix_to_sdcorr_params
 from estimagic.optimization.utilities import cov_params_to_matrix
+from estimagic.optimization.utilities import number_of_triangular_elements_to_dimension
 from estimagic.optimization.utilities import robust_cholesky
 from estimagic.optimization.utilities import sdcorr_params_to_matrix
 
 
 def covariance_to_internal(external_values, constr):
     """Do a cholesky reparametrization."""
-    cov = cov_params_to_matrix(external_values)
-    chol = robust_cholesky(cov)
-    return chol[np.tril_indices(len(cov))]
+    return _apply_along_rows(_covariance_to_internal_1d, external_values)
 
 
 def covariance_from_internal(internal_values, constr):
     """Undo a cholesky reparametrization."""
-    chol = chol_params_to_lower_triangular_matrix(internal_values)
-    cov = chol @ chol.T
-    return cov[np.tril_indices(len(chol))]
+    cov = _cov_from_chol_params(internal_values)
+    rows, cols = np.tril_indices(cov.shape[-1])
+    return cov[..., rows, cols]
+
+
+def covariance_from_internal_jacobian(internal_values, constr):
+    """Derivative of covariance_from_internal with respect to the internal values."""
+    dcov = _cov_from_chol_params_jacobian(internal_values)
+    rows, cols = np.tril_indices(dcov.shape[0])
+    return dcov[rows, cols]
 
 
 def sdcorr_to_internal(external_values, constr):
     """Convert sdcorr to cov and do a cholesky reparametrization."""
-    cov = sdcorr_params_to_matrix(external_values)
-    chol = robust_cholesky(cov)
-    return chol[np.tril_indices(len(cov))]
+    return _apply_along_rows(_sdcorr_to_internal_1d, external_values)
 
 
 def sdcorr_from_internal(internal_values, constr):
     """Undo a cholesky reparametrization."""
-    chol = chol_params_to_lower_triangular_matrix(internal_values)
-    cov = chol @ chol.T
-    return cov_matrix_to_sdcorr_params(cov)
+    cov = _cov_from_chol_params(internal_values)
+    sds = np.sqrt(np.diagonal(cov, axis1=-2, axis2=-1))
+    corr = cov / (sds[..., :, np.newaxis] * sds[..., np.newaxis, :])
+    rows, cols = np.tril_indices(cov.shape[-1], k=-1)
+    return np.concatenate([sds, corr[..., rows, cols]], axis=-1)
+
+
+def sdcorr_from_internal_jacobian(internal_values, constr):
+    """Derivative of sdcorr_from_internal with respect to the internal values."""
+    cov = _cov_from_chol_params(internal_values)
+    dcov = _cov_from_chol_params_jacobian(internal_values)
+    dim = len(cov)
+
+    sds = np.sqrt(np.diagonal(cov))
+    dsds = np.diagonal(dcov).T / (2 * sds.reshape(-1, 1))
+
+    sds_outer = np.outer(sds, sds)
+    corr = cov / sds_outer
+    relative_dsds = dsds / sds.reshape(-1, 1)
+    dcorr = (
+        dcov / sds_outer[:, :, np.newaxis]
+        - corr[:, :, np.newaxis]
+        * (relative_dsds[:, np.newaxis, :] + relative_dsds[np.newaxis, :, :])
+    )
+
+    rows, cols = np.tril_indices(dim, k=-1)
+    return np.vstack([dsds, dcorr[rows, cols]])
 
 
 def probability_to_internal(external_values, constr):
     """Reparametrize probability constrained parameters to internal."""
-    return external_values / external_values[-1]
+    return external_values / external_values[..., -1:]
 
 
 def probability_from_internal(internal_values, constr):
     """Reparametrize probability constrained parameters from internal."""
-    return internal_values / internal_values.sum()
+    return internal_values / internal_values.sum(axis=-1, keepdims=True)
+
+
+def probability_from_internal_jacobian(internal_values, constr):
+    """Derivative of probability_from_internal with respect to the internal values."""
+    total = internal_values.sum()
+    n = len(internal_values)
+    return np.eye(n) / total - np.outer(internal_values, np.ones(n)) / total ** 2
 
 
 def linear_to_internal(external_values, constr):
     """Reparametrize linear constraint to internal."""
-    return constr["to_internal"] @ external_values
+    return _multiply_rows(constr["to_internal"], external_values)
 
 
 def linear_from_internal(internal_values, constr):
     """Reparametrize linear constraint from internal."""
-    return constr["from_internal"] @ internal_values
+    return _multiply_rows(constr["from_internal"], internal_values)
+
+
+def linear_from_internal_jacobian(internal_values, constr):
+    """Derivative of linear_from_internal with respect to the internal values."""
+    matrix = constr["from_internal"]
+    if sparse.issparse(matrix):
+        matrix = matrix.toarray()
+    return np.asarray(matrix, dtype=float)
+
+
+def _multiply_rows(matrix, values):
+    """Multiply matrix with a 1d array or with each row of a 2d array."""
+    if sparse.issparse(matrix):
+        return (matrix @ values.T).T
+    return values @ np.asarray(matrix).T
+
+
+def _cov_from_chol_params(chol_params):
+    """Build covariance matrices from the lower triangular elements of cholesky factors.
+
+    Args:
+        chol_params (np.ndarray): Array where the last axis contains the lower
+            triangular elements of a cholesky factor (in C-order).
+
+    Returns:
+        cov (np.ndarray): Array with covariance matrices in the last two axes.
+
+    """
+    chol_params = np.asarray(chol_params)
+    dim = number_of_triangular_elements_to_dimension(chol_params.shape[-1])
+    chol = np.zeros(chol_params.shape[:-1] + (dim, dim))
+    rows, cols = np.tril_indices(dim)
+    chol[..., rows, cols] = chol_params
+    return chol @ np.swapaxes(chol, -1, -2)
+
+
+def _cov_from_chol_params_jacobian(chol_params):
+    """Derivative of a covariance matrix with respect to the cholesky parameters.
+
+    Args:
+        chol_params (np.ndarray): 1d array with the lower triangular elements of a
+            cholesky factor (in C-order).
+
+    Returns:
+        dcov (np.ndarray): Array of shape (dim, dim, len(chol_params)) where
+            ``dcov[i, j, k]`` is the derivative of ``cov[i, j]`` with respect to
+            ``chol_params[k]``.
+
+    """
+    dim = number_of_triangular_elements_to_dimension(len(chol_params))
+    chol = np.zeros((dim, dim))
+    rows, cols = np.tril_indices(dim)
+    chol[rows, cols] = chol_params
+
+    # cov[i, j] = sum_b chol[i, b] * chol[j, b], thus the derivative with respect to
+    # chol[a, b] is delta(i, a) * chol[j, b] + delta(j, a) * chol[i, b].
+    dcov = np.zeros((dim, dim, len(chol_params)))
+    for k, (a, b) in enumerate(zip(rows, cols)):
+        dcov[a, :, k] += chol[:, b]
+        dcov[:, a, k] += chol[:, b]
+    return dcov
+
+
+def _covariance_to_internal_1d(external_values):
+    cov = cov_params_to_matrix(external_values)
+    chol = robust_cholesky(cov)
+    return chol[np.tril_indices(len(cov))]
+
+
+def _sdcorr_to_internal_1d(external_values):
+    cov = sdcorr_params_to_matrix(external_values)
+    chol = robust_cholesky(cov)
+    return chol[np.tril_indices(len(cov))]
+
+
+def _apply_along_rows(func, values):
+    """Apply a transformation of 1d arrays to a 1d array or each row of a 2d array.
+
+    This is used for transformations that need a cholesky decomposition which cannot be
+    vectorized because :func:`robust_cholesky` handles each matrix separately.
+
+    """
+    values = np.asarray(values)
+    if values.ndim == 1:
+        out = func(values)
+    else:
+        out = np.array([func(row) for row in values])
+    return out
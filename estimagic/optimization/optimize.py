@@ -1,18 +1,16 @@
 """Functional wrapper around the pygmo, nlopt and scipy libraries."""
+import functools
+from concurrent.futures import as_completed
+
 import numpy as np
-from joblib import delayed
-from joblib import Parallel
 
 from estimagic.config import DEFAULT_DATABASE_NAME
-from estimagic.dashboard.run_dashboard import run_dashboard_in_separate_process
 from estimagic.decorators import negative_gradient
+from estimagic.logging.update_database import flush_buffer
 from estimagic.logging.update_database import update_scalar_field
 from estimagic.optimization.broadcast_arguments import broadcast_arguments
 from estimagic.optimization.check_arguments import check_arguments
-from estimagic.optimization.pounders import minimize_pounders_np
-from estimagic.optimization.pygmo import minimize_pygmo_np
 from estimagic.optimization.reparametrize import reparametrize_from_internal
-from estimagic.optimization.scipy import minimize_scipy_np
 from estimagic.optimization.transform_problem import transform_problem
 
 
@@ -55,15 +53,44 @@ def maximize(
         constraints (list or list of lists): List with constraint dictionaries.
             See :ref:`constraints`.
         general_options (dict): Additional configurations for the optimization.
-            Keys can include:
+            See :ref:`estimation_general_options`. Keys can include:
                 - keep_dashboard_alive (bool): Do not terminate the dashboard process
                     after the optimization(s) finish(es).
+                - n_cores (int): Number of processes used to run several
+                    optimizations in parallel.
+                - worker_pool (estimagic.worker_pool.WorkerPool): Pool of processes
+                    that is reused across calls. Replaces n_cores.
+                - stop_after_n_converged (int): Cancel the remaining optimizations
+                    as soon as this many optimizations converged to the best optimum.
+                - batch_criterion (bool): If True, criterion takes a DataFrame with
+                    one row per candidate and one column per parameter and returns
+                    one criterion value per candidate. See :ref:`batch_criterion`.
+                - population_n_cores (int): Number of processes used to evaluate
+                    the populations of pygmo algorithms in parallel.
+                - numpy_criterion (bool): If True, criterion takes a numpy array with
+                    the parameter values instead of a DataFrame.
+                    See :ref:`numpy_criterion`.
+                - criterion_cache_size (int): Number of criterion evaluations that
+                    are cached to avoid duplicate evaluations. Default 100.
         algo_options (dict or list of dicts): Algorithm specific configurations for the
             optimization.
         gradient (callable): Gradient of the criterion function. Takes params as first
             argument and returns the gradient as numpy array or pandas Series.
         gradient_kwargs (dict): Additional keyword arguments for the gradient.
-        gradient_options (dict): Options for the gradient function.
+        gradient_options (dict): Options for the numerical gradient which is used if
+            no gradient is given. Keys can include:
+                - method (str): One of "forward", "backward" and "central". Default
+                    "forward".
+                - n_steps (int): Number of steps per direction. If it is larger than
+                    one, Richardson extrapolation is used. Default 1.
+                - n_cores (int): Number of processes that evaluate the criterion at
+                    the perturbed parameters in parallel. Default 1.
+                - respect_bounds (bool): Whether the steps are adjusted such that the
+                    criterion is only evaluated within the bounds. Default True.
+            Other step options of
+            :func:`~estimagic.differentiation.numdiff_np.first_derivative` like
+            "base_steps", "scaling_factor", "min_steps" and "step_ratio" are passed
+            through.
         logging (str or pathlib.Path or list): Path(s) to (an) sqlite3 file(s) which
             typically has the file extension ``.db``. If the file does not exist,
             it will be created. See :ref:`logging` for details.
@@ -169,15 +196,44 @@ def minimize(
         constraints (list or list of lists): List with constraint dictionaries.
             See :ref:`constraints`.
         general_options (dict): Additional configurations for the optimization.
-            Keys can include:
+            See :ref:`estimation_general_options`. Keys can include:
                 - keep_dashboard_alive (bool): Do not terminate the dashboard process
                     after the optimization(s) finish(es).
+                - n_cores (int): Number of processes used to run several
+                    optimizations in parallel.
+                - worker_pool (estimagic.worker_pool.WorkerPool): Pool of processes
+                    that is reused across calls. Replaces n_cores.
+                - stop_after_n_converged (int): Cancel the remaining optimizations
+                    as soon as this many optimizations converged to the best optimum.
+                - batch_criterion (bool): If True, criterion takes a DataFrame with
+                    one row per candidate and one column per parameter and returns
+                    one criterion value per candidate. See :ref:`batch_criterion`.
+                - population_n_cores (int): Number of processes used to evaluate
+                    the populations of pygmo algorithms in parallel.
+                - numpy_criterion (bool): If True, criterion takes a numpy array with
+                    the parameter values instead of a DataFrame.
+                    See :ref:`numpy_criterion`.
+                - criterion_cache_size (int): Number of criterion evaluations that
+                    are cached to avoid duplicate evaluations. Default 100.
         algo_options (dict or list of dicts): Algorithm specific configurations for the
             optimization.
         gradient (callable): Gradient of the criterion function. Takes params as first
             argument and returns the gradient as numpy array or pandas Series.
         gradient_kwargs (dict): Additional keyword arguments for the gradient.
-        gradient_options (dict): Options for the gradient function.
+        gradient_options (dict): Options for the numerical gradient which is used if
+            no gradient is given. Keys can include:
+                - method (str): One of "forward", "backward" and "central". Default
+                    "forward".
+                - n_steps (int): Number of steps per direction. If it is larger than
+                    one, Richardson extrapolation is used. Default 1.
+                - n_cores (int): Number of processes that evaluate the criterion at
+                    the perturbed parameters in parallel. Default 1.
+                - respect_bounds (bool): Whether the steps are adjusted such that the
+                    criterion is only evaluated within the bounds. Default True.
+            Other step options of
+            :func:`~estimagic.differentiation.numdiff_np.first_derivative` like
+            "base_steps", "scaling_factor", "min_steps" and "step_ratio" are passed
+            through.
         logging (str or pathlib.Path or list): Path(s) to (an) sqlite3 file(s) which
             typically has the file extension ``.db``. If the file does not exist,
             it will be created. See :ref:`logging` for details.
@@ -214,6 +270,90 @@ def minimize(
 
     check_arguments(arguments)
 
+    results = [None] * len(arguments)
+    for index, res in _run_optimizations(arguments, dashboard):
+        results[index] = res
+
+    results = results[0] if len(results) == 1 else results
+
+    return results
+
+
+def minimize_as_completed(
+    criterion,
+    params,
+    algorithm,
+    criterion_kwargs=None,
+    constraints=None,
+    general_options=None,
+    algo_options=None,
+    gradient=None,
+    gradient_kwargs=None,
+    gradient_options=None,
+    logging=DEFAULT_DATABASE_NAME,
+    log_options=None,
+    dashboard=False,
+    dash_options=None,
+):
+    """Minimize *criterion* and yield the result of each optimization once it finishes.
+
+    This is a generator version of :func:`minimize` for several optimizations, e.g. a
+    multistart. It has exactly the same arguments but instead of waiting for the slowest
+    optimization, each result is yielded as soon as it is available. Leaving the loop
+    over the generator early cancels all optimizations that are still running or
+    scheduled and frees the cores.
+
+    If ``stop_after_n_converged`` is set in ``general_options``, the remaining
+    optimizations are cancelled as soon as the specified number of optimizations reached
+    the best optimum found so far. Cancelled optimizations are yielded last. Their
+    status is "cancelled" and their parameters are the start parameters.
+
+    Yields:
+        result (tuple): Tuple of the harmonized result info dictionary and the params
+            DataFrame with the minimizing parameter values of the untransformed problem
+            as specified of the user. The info dictionary has the additional entry
+            "optimization_index", the position of the optimization in the broadcasted
+            arguments.
+
+    """
+    arguments = broadcast_arguments(
+        criterion=criterion,
+        params=params,
+        algorithm=algorithm,
+        criterion_kwargs=criterion_kwargs,
+        constraints=constraints,
+        general_options=general_options,
+        algo_options=algo_options,
+        gradient=gradient,
+        gradient_kwargs=gradient_kwargs,
+        gradient_options=gradient_options,
+        logging=logging,
+        log_options=log_options,
+        dashboard=dashboard,
+        dash_options=dash_options,
+    )
+
+    check_arguments(arguments)
+
+    for index, (info, params) in _run_optimizations(arguments, dashboard):
+        info["optimization_index"] = index
+        yield info, params
+
+
+def _run_optimizations(arguments, dashboard):
+    """Transform and run the optimization problems.
+
+    Args:
+        arguments (list): List of dictionaries with the broadcasted arguments of each
+            optimization.
+        dashboard (bool or list): Whether a dashboard is started.
+
+    Yields:
+        index (int): Position of the optimization in ``arguments``.
+        result (tuple): Tuple of the harmonized result info dictionary and the params
+            DataFrame with the minimizing parameter values.
+
+    """
     optim_arguments = []
     results_arguments = []
     database_paths_for_dashboard = []
@@ -225,46 +365,176 @@ def minimize(
             database_paths_for_dashboard.append(database_path)
 
     if dashboard:
+        from estimagic.dashboard.run_dashboard import run_dashboard_in_separate_process
+
         dashboard_process = run_dashboard_in_separate_process(
             database_paths=database_paths_for_dashboard
         )
 
-    if len(arguments) == 1:
-        # Run only one optimization
-        results = [_internal_minimize(**optim_arguments[0])]
-    else:
-        # Run multiple optimizations
-        if "n_cores" not in optim_arguments[0]["general_options"]:
-            raise ValueError(
-                "n_cores need to be specified in general_options"
-                + " if multiple optimizations should be run."
+    results = []
+    shutdown_worker_pool = False
+    try:
+        if len(arguments) == 1:
+            # Run only one optimization
+            worker_pool = arguments[0]["general_options"].get("worker_pool")
+            results = [
+                (0, _internal_minimize(**optim_arguments[0], worker_pool=worker_pool))
+            ]
+        else:
+            # Run multiple optimizations
+            general_options = arguments[0]["general_options"]
+            worker_pool = general_options.get("worker_pool")
+            if worker_pool is None:
+                if "n_cores" not in general_options:
+                    raise ValueError(
+                        "n_cores need to be specified in general_options"
+                        + " if multiple optimizations should be run."
+                    )
+                from estimagic.worker_pool import WorkerPool
+
+                worker_pool = WorkerPool(n_cores=general_options["n_cores"])
+                shutdown_worker_pool = True
+
+            results = _run_optimizations_in_parallel(
+                optim_arguments=optim_arguments,
+                worker_pool=worker_pool,
+                stop_after_n_converged=general_options.get("stop_after_n_converged"),
+                tolerance=general_options.get("converged_fitness_tolerance", 1e-6),
             )
-        n_cores = optim_arguments[0]["general_options"]["n_cores"]
 
-        results = Parallel(n_jobs=n_cores)(
-            delayed(_internal_minimize)(**optim_kwargs)
-            for optim_kwargs in optim_arguments
-        )
+        for index, res in results:
+            yield index, _process_optimization_result(res, results_arguments[index])
+
+    finally:
+        # cancel unfinished optimizations before the worker pool is shut down.
+        if not isinstance(results, list):
+            results.close()
+        if shutdown_worker_pool:
+            worker_pool.shutdown(wait=False)
+        if dashboard and dashboard_process is not None:
+            if not results_arguments[0]["keep_dashboard_alive"]:
+                dashboard_process.terminate()
+
+
+def _run_optimizations_in_parallel(
+    optim_arguments, worker_pool, stop_after_n_converged, tolerance
+):
+    """Run several optimizations in parallel and yield results as they are finished.
+
+    A core is freed as soon as its optimization is finished and picks up the next
+    scheduled optimization. Optimizations that are not finished when the generator is
+    closed or enough optimizations converged to the same optimum are cancelled. Running
+    optimizations are cancelled by terminating and replacing the workers of the pool.
+
+    Args:
+        optim_arguments (list): List of dictionaries with the arguments of
+            :func:`_internal_minimize`.
+        worker_pool (estimagic.worker_pool.WorkerPool): Pool of processes.
+        stop_after_n_converged (int or None): Cancel the remaining optimizations once
+            this many optimizations converged to the best optimum. None means that all
+            optimizations are run until they finish.
+        tolerance (float): Two optimizations converged to the same optimum if their
+            fitness differs by at most ``tolerance`` times the absolute value of the
+            best fitness, or ``tolerance`` if the best fitness is smaller than one.
+
+    Yields:
+        index (int): Position of the optimization in ``optim_arguments``.
+        results (dict): The harmonized results of the optimization.
 
-    if dashboard and dashboard_process is not None:
-        if not results_arguments[0]["keep_dashboard_alive"]:
-            dashboard_process.terminate()
+    """
+    futures = worker_pool.submit_all(
+        _internal_minimize, [((), optim_kwargs) for optim_kwargs in optim_arguments]
+    )
+    future_to_index = {future: i for i, future in enumerate(futures)}
+
+    yielded = set()
+    fitness_values = []
+    try:
+        for future in as_completed(future_to_index):
+            index = future_to_index[future]
+            res = future.result()
+            yielded.add(index)
+            yield index, res
+
+            fitness_values.append(res["fitness"])
+            n_converged = _count_optimizations_at_best_optimum(
+                fitness_values, tolerance
+            )
+            if stop_after_n_converged is not None:
+                if n_converged >= stop_after_n_converged:
+                    break
+    finally:
+        worker_pool.cancel([f for f in futures if not f.done()])
+
+    for future, index in sorted(future_to_index.items(), key=lambda x: x[1]):
+        if index not in yielded:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                res = future.result()
+            else:
+                res = _cancel_optimization(**optim_arguments[index])
+            yield index, res
+
+
+def _count_optimizations_at_best_optimum(fitness_values, tolerance):
+    """Count how many optimizations converged to the best optimum.
+
+    Args:
+        fitness_values (list): Fitness values of the finished optimizations.
+        tolerance (float): See :func:`_run_optimizations_in_parallel`.
+
+    Returns:
+        n_converged (int)
+
+    Examples:
+        >>> _count_optimizations_at_best_optimum([1, 1.0000001, 3, 0.99999999], 1e-6)
+        3
+
+    """
+    fitness_values = np.array(fitness_values, dtype=float)
+    best = np.nanmin(fitness_values)
+    distance = np.abs(fitness_values - best)
+    n_converged = int((distance <= tolerance * max(1, np.abs(best))).sum())
+    return n_converged
+
+
+def _cancel_optimization(internal_params, database, **kwargs):
+    """Create the results of an optimization that was cancelled.
 
-    results = _process_optimization_results(results, results_arguments)
+    Args:
+        internal_params (np.array): One-dimensional array with the start values of the
+            free parameters.
+        database (sqlalchemy.MetaData or False).
+        kwargs: Other arguments of :func:`_internal_minimize`. They are ignored.
+
+    Returns:
+        results (dict): Dictionary with the harmonized results. The status is
+            "cancelled" and x are the start parameters.
 
+    """
+    if database:
+        update_scalar_field(database, "optimization_status", "cancelled")
+
+    results = {
+        "status": "cancelled",
+        "fitness": np.nan,
+        "x": internal_params,
+        "n_evaluations": None,
+    }
     return results
 
 
 def _internal_minimize(
     internal_criterion,
+    internal_batch_criterion,
     internal_params,
     bounds,
-    origin,
-    algo_name,
+    algo_info,
     algo_options,
     internal_gradient,
     database,
     general_options,
+    evaluation_cache,
+    worker_pool=None,
 ):
     """Run one optimization of the transformed optimization problem.
     The transformed optimization problem is converted from the original problem
@@ -287,19 +557,32 @@ def _internal_minimize(
             criterion function after the necessary reparametrizations.
             If logging is activated it protocols every call automatically to the
             specified database.
+        internal_batch_criterion (func or None): The transformed batch criterion
+            function. It takes a two-dimensional array with one row of internal params
+            per candidate and returns one criterion value per candidate. None if the
+            algorithm does not support batch evaluations or if the criterion is not a
+            batch criterion and the population is evaluated on one core.
         internal_params (np.array): One-dimenisonal array with the values of
             the free parameters.
         bounds (tuple): tuple of the length of internal_params. Every entry contains
             the lower and upper bound of the respective internal parameter.
-        origin (str): Name of the package to which the algorithm belongs.
-        algo_name (str): Name of the algorithm.
+        algo_info (estimagic.optimization.algorithms.AlgorithmInfo): Capabilities
+            of the algorithm.
         algo_options (dict): Algorithm specific configurations.
         internal_gradient (func): The internal gradient
         database (sqlalchemy.MetaData or False). The engine that connects to the
             database can be accessed via ``database.bind``. This is only used to record
             the start and end of the optimization
-        general_options (dict): Only used to pass the start_criterion_value in case
-            the tao pounders algorithm is used.
+        general_options (dict): Used to pass the start_criterion_value in case
+            the tao pounders algorithm is used and the number of processes that
+            evaluate the populations of pygmo algorithms.
+        evaluation_cache (estimagic.optimization.evaluation_cache.EvaluationCache):
+            The cache of the internal criterion. Its hits and misses are added to the
+            results.
+        worker_pool (estimagic.worker_pool.WorkerPool): Pool of processes that is used
+            to evaluate the populations of parallelizable algorithms if
+            "population_n_cores" in general_options is larger than one. By default,
+            a new pool is started.
     Returns:
         results (tuple): Tuple of the harmonized result info dictionary and the params
             DataFrame with the minimizing parameter values of the untransformed problem
@@ -308,7 +591,75 @@ def _internal_minimize(
     if database:
         update_scalar_field(database, "optimization_status", "running")
 
-    if origin in ["nlopt", "pygmo"]:
+    n_cores = general_options.get("population_n_cores", 1)
+    population_pool = None
+    if algo_info.parallelizable and n_cores > 1:
+        from estimagic.worker_pool import WorkerPool
+
+        population_pool = WorkerPool(n_cores) if worker_pool is None else worker_pool
+        internal_batch_criterion = functools.partial(
+            internal_batch_criterion, worker_pool=population_pool
+        )
+
+    try:
+        results = _run_algorithm(
+            internal_criterion=internal_criterion,
+            internal_batch_criterion=internal_batch_criterion,
+            internal_params=internal_params,
+            bounds=bounds,
+            algo_info=algo_info,
+            algo_options=algo_options,
+            internal_gradient=internal_gradient,
+            general_options=general_options,
+        )
+    finally:
+        if population_pool is not None and worker_pool is None:
+            population_pool.shutdown()
+        # write the buffered evaluations even if the optimization was interrupted.
+        if database:
+            flush_buffer(database)
+
+    results["n_cache_hits"] = evaluation_cache.hits
+    results["n_cache_misses"] = evaluation_cache.misses
+
+    if database:
+        update_scalar_field(database, "optimization_status", results["status"])
+
+    return results
+
+
+def _run_algorithm(
+    internal_criterion,
+    internal_batch_criterion,
+    internal_params,
+    bounds,
+    algo_info,
+    algo_options,
+    internal_gradient,
+    general_options,
+):
+    """Dispatch the transformed optimization problem to the optimizer.
+
+    Args:
+        See :func:`_internal_minimize`.
+
+    Returns:
+        results (dict): The results of the optimizer.
+
+    """
+    origin, algo_name = algo_info.origin, algo_info.algo_name
+    if algo_info.minimize is not None:
+        results = algo_info.minimize(
+            internal_criterion,
+            internal_params,
+            bounds,
+            algo_options,
+            gradient=internal_gradient,
+            batch_criterion=internal_batch_criterion,
+        )
+    elif origin in ["nlopt", "pygmo"]:
+        from estimagic.optimization.pygmo import minimize_pygmo_np
+
         results = minimize_pygmo_np(
             internal_criterion,
             internal_params,
@@ -317,8 +668,11 @@ def _internal_minimize(
             algo_name,
             algo_options,
             internal_gradient,
+            internal_batch_criterion,
         )
     elif origin == "scipy":
+        from estimagic.optimization.scipy import minimize_scipy_np
+
         results = minimize_scipy_np(
             internal_criterion,
             internal_params,
@@ -328,6 +682,8 @@ def _internal_minimize(
             gradient=internal_gradient,
         )
     elif origin == "tao":
+        from estimagic.optimization.pounders import minimize_pounders_np
+
         crit_val = general_options["_start_criterion_value"]
         len_criterion_value = 1 if np.isscalar(crit_val) else len(crit_val)
         results = minimize_pounders_np(
@@ -340,40 +696,32 @@ def _internal_minimize(
     else:
         raise NotImplementedError("Invalid algorithm requested.")
 
-    if database:
-        update_scalar_field(database, "optimization_status", results["status"])
-
     return results
 
 
-def _process_optimization_results(results, results_arguments):
-    """Expand the solutions back to the original problems.
+def _process_optimization_result(res, result_kwargs):
+    """Expand the solution back to the original problem.
+
     Args:
-        results (list):
-            list of dictionaries with the harmonized results objects.
-        results_arguments (list):
-            each element is a dictionary supplying the start params DataFrame
+        res (dict): Dictionary with the harmonized results.
+        result_kwargs (dict): Dictionary supplying the start params DataFrame
             and the constraints to the original problem.
             The keys are "params", "constraints" and "keep_dashboard_alive".
+
     Returns:
         results (tuple): Tuple of the harmonized result info dictionary and the params
             DataFrame with the minimizing parameter values of the untransformed problem
             as specified of the user.
-    """
-    new_results = []
-    for res, args in zip(results, results_arguments):
-        res["x"] = list(res["x"])
-        start_params = args["params"]
-        params = reparametrize_from_internal(
-            internal=np.array(res["x"]),
-            fixed_values=start_params["_internal_fixed_value"].to_numpy(),
-            pre_replacements=start_params["_pre_replacements"].to_numpy(dtype="int"),
-            processed_constraints=args["constraints"],
-            post_replacements=start_params["_post_replacements"].to_numpy(dtype="int"),
-            processed_params=start_params,
-        )
-        new_results.append((res, params))
 
-    if len(new_results) == 1:
-        new_results = new_results[0]
-    return new_results
+    """
+    res["x"] = list(res["x"])
+    start_params = result_kwargs["params"]
+    params = reparametrize_from_internal(
+        internal=np.array(res["x"]),
+        fixed_values=start_params["_internal_fixed_value"].to_numpy(),
+        pre_replacements=start_params["_pre_replacements"].to_numpy(dtype="int"),
+        processed_constraints=result_kwargs["constraints"],
+        post_replacements=start_params["_post_replacements"].to_numpy(dtype="int"),
+        processed_params=start_params,
+    )
+    return res, params
@@ -29,7 +29,11 @@ If only few columns of processed params are used in a function, it is better to
 pass them as Series, to make the flow of information more explicit.
 
 """
+import copy
+import hashlib
+import pickle
 import warnings
+from collections import OrderedDict
 
 import numpy as np
 import pandas as pd
@@ -41,6 +45,11 @@ from estimagic.optimization.check_constraints import check_types
 from estimagic.optimization.consolidate_constraints import consolidate_constraints
 from estimagic.optimization.utilities import number_of_triangular_elements_to_dimension
 
+# processed constraints of the most recently used combinations of params and
+# constraints. See :func:`process_constraints`.
+_PROCESSED_CONSTRAINTS_CACHE = OrderedDict()
+_CACHE_SIZE = 10
+
 
 def process_constraints(constraints, params):
     """Process, consolidate and check constraints.
@@ -74,6 +83,39 @@ def process_constraints(constraints, params):
             - _is_fixed_to_other: True for parameters that are fixed to another
               parameter
 
+    The results are cached for the most recent combinations of constraints and params.
+    If only the "value" column of params changed, e.g. in bootstrap loops, the cached
+    results are reused after the checks that depend on the values have been repeated.
+    The processing is not cached if a query refers to the "value" column.
+
+    """
+    fingerprint = _fingerprint(constraints, params)
+    cached = _PROCESSED_CONSTRAINTS_CACHE.get(fingerprint)
+    if cached is not None and _values_of_fixes_are_unchanged(cached, params):
+        _PROCESSED_CONSTRAINTS_CACHE.move_to_end(fingerprint)
+        pc, pp = _refresh_cached_processing(cached, params)
+    else:
+        cached = _process_constraints(constraints, params)
+        if fingerprint is not None:
+            _PROCESSED_CONSTRAINTS_CACHE[fingerprint] = cached
+            if len(_PROCESSED_CONSTRAINTS_CACHE) > _CACHE_SIZE:
+                _PROCESSED_CONSTRAINTS_CACHE.popitem(last=False)
+        pc, pp = copy.deepcopy(cached["pc"]), cached["pp"].copy()
+
+    return pc, pp
+
+
+def _process_constraints(constraints, params):
+    """Process constraints without using the cache.
+
+    Returns:
+        processed (dict): Dictionary with the entries "pc" and "pp" that are described
+            in :func:`process_constraints`, the entry "selected" with the constraints
+            whose selectors are processed and which are needed to check that new
+            values satisfy the constraints, and the entries "fix_positions" and
+            "fix_values" with the positions and values of parameters that are fixed to
+            their start values.
+
     """
     with warnings.catch_warnings():
         warnings.filterwarnings(
@@ -85,6 +127,7 @@ def process_constraints(constraints, params):
         pc = _replace_pairwise_equality_by_equality(pc)
         pc = _process_linear_weights(pc, params)
         check_constraints_are_satisfied(pc, params)
+        selected = pc
         pc = _replace_increasing_and_decreasing_by_linear(pc)
         pc = _process_linear_weights(pc, params)
         pc, pp = consolidate_constraints(pc, params)
@@ -100,7 +143,76 @@ def process_constraints(constraints, params):
         pp["_pre_replacements"] = _create_pre_replacements(pp._internal_free)
         pp["_internal_fixed_value"] = _create_internal_fixed_value(pp._fixed_value, pc)
 
-        return pc, pp
+    fix_positions = set()
+    for constr in selected:
+        if constr["type"] == "fixed" and "value" not in constr:
+            fix_positions.update(constr["index"])
+    fix_positions = sorted(fix_positions)
+
+    processed = {
+        "pc": pc,
+        "pp": pp,
+        "selected": selected,
+        "fix_positions": fix_positions,
+        "fix_values": params["value"].to_numpy()[fix_positions],
+    }
+
+    return processed
+
+
+def _fingerprint(constraints, params):
+    """Hash everything except the parameter values that influences the processing.
+
+    Returns None if the processing must not be cached. This is the case if a query
+    refers to the parameter values or if constraints or params contain objects that
+    cannot be hashed.
+
+    """
+    for constr in constraints:
+        queries = list(constr.get("queries", [])) + [constr.get("query", "")]
+        if any("value" in query for query in queries):
+            return None
+
+    other_columns = params.drop(columns="value")
+    try:
+        constraints_hash = hashlib.sha1(pickle.dumps(constraints)).hexdigest()
+        params_hash = hashlib.sha1(
+            pd.util.hash_pandas_object(other_columns, index=True).to_numpy()
+        ).hexdigest()
+    except (TypeError, AttributeError, pickle.PicklingError):
+        return None
+
+    return (
+        constraints_hash,
+        params_hash,
+        tuple(other_columns.columns),
+        tuple(params.index.names),
+    )
+
+
+def _values_of_fixes_are_unchanged(cached, params):
+    """Check that parameters that are fixed to their start values did not change."""
+    values = params["value"].to_numpy()[cached["fix_positions"]]
+    return np.array_equal(values, cached["fix_values"], equal_nan=True)
+
+
+def _refresh_cached_processing(cached, params):
+    """Combine cached processed constraints with new parameter values.
+
+    The checks that depend on the values are repeated.
+
+    """
+    check_constraints_are_satisfied(cached["selected"], params)
+    pc = copy.deepcopy(cached["pc"])
+    helper_columns = ["lower", "upper"] + [
+        col for col in cached["pp"].columns if col.startswith("_")
+    ]
+    pp = params.copy()
+    for col in helper_columns:
+        pp[col] = cached["pp"][col].to_numpy()
+    check_fixes_and_bounds(pp, pc)
+
+    return pc, pp
 
 
 def _apply_constraint_killers(constraints):
@@ -139,6 +251,7 @@ def _process_selectors(constraints, params):
 
     """
     pc = []
+    positions = pd.Series(data=np.arange(len(params)), index=params.index)
 
     for constr in constraints:
         new_constr = constr.copy()
@@ -150,8 +263,6 @@ def _process_selectors(constraints, params):
             locs = new_constr.pop("locs", [])
             queries = new_constr.pop("queries", [])
 
-        positions = pd.Series(data=np.arange(len(params)), index=params.index)
-
         indices = []
         for loc in locs:
             index = positions.loc[loc].astype(int).tolist()
@@ -159,10 +270,8 @@ def _process_selectors(constraints, params):
             assert len(set(index)) == len(index), "Duplicates in loc are not allowed."
             indices.append(index)
         for query in queries:
-            loc = params.query(query).index
-            index = positions.loc[loc].astype(int).tolist()
-            index = [index] if not isinstance(index, list) else index
-            indices.append(index)
+            is_selected = params.eval(query).to_numpy(dtype=bool)
+            indices.append(np.flatnonzero(is_selected).tolist())
 
         if constr["type"] == "pairwise_equality":
             assert (
@@ -215,30 +324,33 @@ def _process_linear_weights(pc, params):
         params (pd.DataFrame): see :ref:`params`.
 
     Returns:
-        processed (list): Constraints where all weights are Series.
+        processed (list): Constraints where all weights are 1d numpy arrays that are
+            aligned with the index of the constraint.
 
     """
     processed = []
     for constr in pc:
         if constr["type"] == "linear":
             raw_weights = constr["weights"]
-            params_subset = params.iloc[constr["index"]]
+            n_selected = len(constr["index"])
 
-            msg = f"Weights must be same length as selected parameters: {params_subset}"
             if isinstance(raw_weights, pd.Series):
-                weights = raw_weights.loc[params_subset.index].to_numpy()
+                selected = params.index[constr["index"]]
+                weights = raw_weights.loc[selected].to_numpy(dtype=float)
             elif isinstance(raw_weights, (np.ndarray, list, tuple)):
-                if len(raw_weights) != len(params_subset):
-                    raise ValueError(msg)
-                weights = np.asarray(raw_weights)
+                if len(raw_weights) != n_selected:
+                    raise ValueError(
+                        "Weights must be same length as selected parameters: "
+                        f"{params.iloc[constr['index']]}"
+                    )
+                weights = np.asarray(raw_weights, dtype=float)
             elif isinstance(raw_weights, (float, int)):
-                weights = np.full(len(params_subset), float(raw_weights))
+                weights = np.full(n_selected, float(raw_weights))
             else:
                 raise TypeError(f"Invalid type for linear weights {type(raw_weights)}.")
 
             new_constr = constr.copy()
-            weights_sr = pd.Series(weights, index=params_subset.index)
-            new_constr["weights"] = weights_sr
+            new_constr["weights"] = weights
             processed.append(new_constr)
         else:
             processed.append(constr)
@@ -296,7 +408,8 @@ def _create_internal_bounds(lower, upper, pc):
         int_upper (pd.Series): Upper bound of internal parameters.
 
     """
-    int_lower, int_upper = lower.copy(), upper.copy()
+    int_lower = lower.to_numpy(dtype=float, copy=True)
+    int_upper = upper.to_numpy(dtype=float, copy=True)
 
     for constr in pc:
         if constr["type"] in ["covariance", "sdcorr"]:
@@ -305,19 +418,23 @@ def _create_internal_bounds(lower, upper, pc):
             # covariance matrix in both cases.
             dim = number_of_triangular_elements_to_dimension(len(constr["index"]))
             diag_positions = [0] + np.cumsum(range(2, dim + 1)).tolist()
-            diag_indices = np.array(constr["index"])[diag_positions].tolist()
+            diag_indices = np.array(constr["index"])[diag_positions]
             bd = constr.get("bounds_distance", 0)
-            int_lower.iloc[diag_indices] = np.maximum(int_lower.iloc[diag_indices], bd)
+            int_lower[diag_indices] = np.maximum(int_lower[diag_indices], bd)
         elif constr["type"] == "probability":
-            int_lower.iloc[constr["index"]] = 0
+            int_lower[constr["index"]] = 0
         elif constr["type"] == "linear":
-            int_lower.iloc[constr["index"]] = -np.inf
-            int_upper.iloc[constr["index"]] = np.inf
-            int_lower.update(constr["right_hand_side"]["lower"])
-            int_upper.update(constr["right_hand_side"]["upper"])
+            int_lower[constr["index"]] = -np.inf
+            int_upper[constr["index"]] = np.inf
+            rhs_positions = _get_rhs_positions(constr)
+            _update(int_lower, rhs_positions, constr["right_hand_side"]["lower"])
+            _update(int_upper, rhs_positions, constr["right_hand_side"]["upper"])
         else:
             raise TypeError("Invalid constraint type {}".format(constr["type"]))
 
+    int_lower = pd.Series(int_lower, index=lower.index)
+    int_upper = pd.Series(int_upper, index=upper.index)
+
     return int_lower, int_upper
 
 
@@ -331,18 +448,17 @@ def _create_internal_free(is_fixed_to_value, is_fixed_to_other, pc):
     Returns:
         int_free (pd.Series)
     """
-    int_fixed = is_fixed_to_value | is_fixed_to_other
+    int_fixed = (is_fixed_to_value | is_fixed_to_other).to_numpy(dtype=bool)
 
     for constr in pc:
         if constr["type"] == "probability":
-            int_fixed.iloc[constr["index"][-1]] = True
+            int_fixed[constr["index"][-1]] = True
         elif constr["type"] == "linear":
-            int_fixed.iloc[constr["index"]] = False
-            int_fixed.update(constr["right_hand_side"]["value"].notnull())
-            # dtype gets messed up by update
-            int_fixed = int_fixed.astype(bool)
+            int_fixed[constr["index"]] = False
+            rhs_positions = _get_rhs_positions(constr)
+            int_fixed[rhs_positions] = constr["right_hand_side"]["value"].notnull()
 
-    int_free = ~int_fixed
+    int_free = pd.Series(~int_fixed, index=is_fixed_to_value.index)
 
     return int_free
 
@@ -380,14 +496,33 @@ def _create_internal_fixed_value(fixed_value, pc):
         pc (list): Processed and consolidated params.
 
     """
-    int_fix = fixed_value.copy()
+    int_fix = fixed_value.to_numpy(dtype=float, copy=True)
     for constr in pc:
         if constr["type"] == "probability":
-            int_fix.iloc[constr["index"][-1]] = 1
+            int_fix[constr["index"][-1]] = 1
         elif constr["type"] in ["covariance", "sdcorr"]:
-            int_fix.iloc[constr["index"][0]] = np.sqrt(int_fix.iloc[constr["index"][0]])
+            int_fix[constr["index"][0]] = np.sqrt(int_fix[constr["index"][0]])
         elif constr["type"] == "linear":
-            int_fix.iloc[constr["index"]] = np.nan
-            int_fix.update(constr["right_hand_side"]["value"])
+            int_fix[constr["index"]] = np.nan
+            rhs_positions = _get_rhs_positions(constr)
+            _update(int_fix, rhs_positions, constr["right_hand_side"]["value"])
+
+    int_fix = pd.Series(int_fix, index=fixed_value.index)
 
     return int_fix
+
+
+def _get_rhs_positions(constr):
+    """Positions of the parameters with which the right hand side is aligned."""
+    return constr["index"][len(constr["index"]) - len(constr["right_hand_side"]) :]
+
+
+def _update(arr, positions, values):
+    """Replace the entries of arr at positions by values, unless values are NaN.
+
+    This is the equivalent of :meth:`pandas.Series.update` for position based indices.
+
+    """
+    values = np.asarray(values, dtype=float)
+    not_null = ~np.isnan(values)
+    arr[np.asarray(positions)[not_null]] = values[not_null]
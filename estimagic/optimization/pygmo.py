@@ -3,7 +3,9 @@ import pygmo as pg
 from estimagic.config import DEFAULT_SEED
 
 
-def minimize_pygmo_np(func, x0, bounds, origin, algo_name, algo_options, gradient=None):
+def minimize_pygmo_np(
+    func, x0, bounds, origin, algo_name, algo_options, gradient=None, batch_func=None
+):
     """Minimize a function with pygmo.
 
     Args:
@@ -16,6 +18,11 @@ def minimize_pygmo_np(func, x0, bounds, origin, algo_name, algo_options, gradien
         origin ({"nlopt", "pygmo"}): Either an optimizer from NLOPT or pygmo.
         algo_name (str): One of the optimizers of the pygmo package.
         algo_options (dict): Options for the optimizer.
+        gradient (callable): Gradient of the objective function.
+        batch_func (callable): Function that takes a two-dimensional array with one
+            candidate per row and returns a one-dimensional array with the objective
+            values. If given, it is used to evaluate the initial population and by all
+            pygmo algorithms that support batch fitness evaluation.
 
     Returns:
         results (dict): Dictionary with processed optimization results.
@@ -29,16 +36,17 @@ def minimize_pygmo_np(func, x0, bounds, origin, algo_name, algo_options, gradien
             "gen" in algo_options
         ), f"For genetic optimizers like {algo_name}, gen is mandatory."
 
-    prob = _create_problem(func, bounds, origin, gradient)
-    algo = _create_algorithm(algo_name, algo_options, origin)
-    pop = _create_population(prob, algo_options, x0)
+    prob = _create_problem(func, bounds, origin, gradient, batch_func)
+    bfe = None if batch_func is None else pg.bfe(pg.member_bfe())
+    algo = _create_algorithm(algo_name, algo_options, origin, bfe)
+    pop = _create_population(prob, algo_options, x0, bfe)
     evolved = algo.evolve(pop)
     result = _process_pygmo_results(evolved)
 
     return result
 
 
-def _create_problem(func, bounds, origin, gradient_):
+def _create_problem(func, bounds, origin, gradient_, batch_func=None):
     class Problem:
         def fitness(self, x):
             return [func(x)]
@@ -49,12 +57,19 @@ def _create_problem(func, bounds, origin, gradient_):
         def gradient(self, dv):
             return gradient_(dv)
 
-    return Problem()
+    class BatchProblem(Problem):
+        def batch_fitness(self, dvs):
+            return batch_func(dvs.reshape(-1, len(bounds[0])))
 
+    return Problem() if batch_func is None else BatchProblem()
 
-def _create_algorithm(algo_name, algo_options, origin):
+
+def _create_algorithm(algo_name, algo_options, origin, bfe=None):
     """Create a pygmo algorithm.
 
+    If a batch fitness evaluator is given and the algorithm supports it, the algorithm
+    evaluates all candidates of a generation at once.
+
     Todo: There should be a simplification which works for both, pygmo and nlopt.
 
     """
@@ -67,18 +82,22 @@ def _create_algorithm(algo_name, algo_options, origin):
         algo_options = algo_options.copy()
         if "popsize" in algo_options:
             del algo_options["popsize"]
-        algo = pg.algorithm(pygmo_uda(**algo_options))
+        uda = pygmo_uda(**algo_options)
+        if bfe is not None and hasattr(uda, "set_bfe"):
+            uda.set_bfe(bfe)
+        algo = pg.algorithm(uda)
 
     return algo
 
 
-def _create_population(problem, algo_options, x0):
+def _create_population(problem, algo_options, x0, bfe=None):
     """Create a pygmo population object.
 
     Args:
         problem (pygmo.Problem)
         algo_options (dict)
         x0 (np.ndarray)
+        bfe (pygmo.bfe): Batch fitness evaluator for the initial population.
 
     Todo:
         - constrain random initial values to be in some bounds
@@ -86,7 +105,7 @@ def _create_population(problem, algo_options, x0):
     """
     popsize = algo_options.copy().pop("popsize", 1) - 1
     pop = pg.population(
-        problem, size=popsize, seed=algo_options.get("seed", DEFAULT_SEED)
+        problem, size=popsize, b=bfe, seed=algo_options.get("seed", DEFAULT_SEED)
     )
     pop.push_back(x0)
     return pop
@@ -1,8 +1,31 @@
 """Handle pc by reparametrizations."""
+from collections import namedtuple
+
 import numba as nb
+import numpy as np
+from scipy import sparse
 
 import estimagic.optimization.kernel_transformations as kt
 
+ReparametrizationPlan = namedtuple(
+    "ReparametrizationPlan",
+    [
+        "fixed_values",
+        "pre_replacements",
+        "post_replacements",
+        "type_codes",
+        "index_ptr",
+        "indices",
+        "matrix_ptr",
+        "row_ptr",
+        "col_indices",
+        "matrices",
+    ],
+)
+
+# Codes of the constraint types in a ReparametrizationPlan.
+_TYPE_CODES = {"linear": 0, "probability": 1, "covariance": 2, "sdcorr": 3}
+
 
 def reparametrize_to_internal(processed_params, processed_constraints):
     """Convert a params DataFrame into a numpy array of internal parameters.
@@ -50,6 +73,42 @@ def reparametrize_from_internal(
     Returns:
         updated_params (pd.DataFrame): Copy of pp with replaced values.
 
+    """
+    external_values = external_values_from_internal(
+        internal=internal,
+        fixed_values=fixed_values,
+        pre_replacements=pre_replacements,
+        processed_constraints=processed_constraints,
+        post_replacements=post_replacements,
+    )
+
+    external = processed_params.copy()
+    external["value"] = external_values
+
+    return external
+
+
+def external_values_from_internal(
+    internal, fixed_values, pre_replacements, processed_constraints, post_replacements
+):
+    """Convert a numpy array of internal parameters to the external parameter values.
+
+    This is the same as :func:`reparametrize_from_internal` but returns only the
+    "value" column of the params DataFrame as numpy array which is much faster.
+
+    Args:
+        internal (np.ndarray): 1d numpy array with internal parameters
+        fixed_values (np.ndarray): 1d numpy array with internal fixed values
+        pre_replacements (np.ndarray): 1d numpy array with positions of internal
+            parameters that have to be copied before transformations are applied.
+            Negative if no value has to be copied.
+        processed_constraints (list): List of processed and consolidated constraint
+            dictionaries.
+        post_replacments (np.ndarray): 1d numpy array with parameter positions.
+
+    Returns:
+        external_values (np.ndarray): 1d numpy array with the external parameters.
+
     """
     external_values = fixed_values.copy()
     external_values = _do_pre_replacements(internal, pre_replacements, external_values)
@@ -59,13 +118,257 @@ def reparametrize_from_internal(
         external_values[index] = func(external_values[index], constr)
     external_values = _do_post_replacements(post_replacements, external_values)
 
-    external = processed_params.copy()
-    external["value"] = external_values
+    return external_values
+
+
+def batch_external_values_from_internal(
+    internal_batch,
+    fixed_values,
+    pre_replacements,
+    processed_constraints,
+    post_replacements,
+):
+    """Convert many vectors of internal parameters to external parameter values.
+
+    This is the same as calling :func:`external_values_from_internal` for each row of
+    internal_batch, but the kernel transformations are applied to all rows at once.
+
+    Args:
+        internal_batch (np.ndarray): 2d numpy array of shape (k, n_internal) with one
+            vector of internal parameters per row.
+        fixed_values (np.ndarray): 1d numpy array with internal fixed values
+        pre_replacements (np.ndarray): 1d numpy array with positions of internal
+            parameters that have to be copied before transformations are applied.
+            Negative if no value has to be copied.
+        processed_constraints (list): List of processed and consolidated constraint
+            dictionaries.
+        post_replacments (np.ndarray): 1d numpy array with parameter positions.
+
+    Returns:
+        external_batch (np.ndarray): 2d numpy array of shape (k, n_external) with the
+            external parameters of each row of internal_batch.
+
+    """
+    internal_batch = np.atleast_2d(internal_batch)
+    pre_replacements = np.asarray(pre_replacements, dtype=int)
+    post_replacements = np.asarray(post_replacements, dtype=int)
+
+    fixed_values = np.asarray(fixed_values, dtype=float)
+    external_batch = np.tile(fixed_values, (len(internal_batch), 1))
+    is_replaced = pre_replacements >= 0
+    external_batch[:, is_replaced] = internal_batch[:, pre_replacements[is_replaced]]
+    for constr in processed_constraints:
+        func = getattr(kt, f"{constr['type']}_from_internal")
+        index = constr["index"]
+        external_batch[:, index] = func(external_batch[:, index], constr)
+    # post replacements are done sequentially as in _do_post_replacements.
+    for i in np.flatnonzero(post_replacements >= 0):
+        external_batch[:, i] = external_batch[:, post_replacements[i]]
+
+    return external_batch
+
+
+def reparametrization_jacobian(
+    internal, fixed_values, pre_replacements, processed_constraints, post_replacements
+):
+    """Calculate the derivative of the external parameters with respect to internal.
+
+    The reparametrization from internal consists of the pre replacements, the kernel
+    transformations and the post replacements. The Jacobian is the product of their
+    Jacobians. The gradient of a function with respect to the internal parameters is
+    the gradient with respect to the external parameters times this Jacobian.
+
+    Args:
+        internal (np.ndarray): 1d numpy array with internal parameters
+        fixed_values (np.ndarray): 1d numpy array with internal fixed values
+        pre_replacements (np.ndarray): 1d numpy array with positions of internal
+            parameters that have to be copied before transformations are applied.
+            Negative if no value has to be copied.
+        processed_constraints (list): List of processed and consolidated constraint
+            dictionaries.
+        post_replacments (np.ndarray): 1d numpy array with parameter positions.
+
+    Returns:
+        jacobian (np.ndarray): 2d numpy array of shape (n_external, n_internal).
+
+    """
+    pre_replacements = np.asarray(pre_replacements, dtype=int)
+    post_replacements = np.asarray(post_replacements, dtype=int)
+
+    external_values = np.asarray(fixed_values, dtype=float).copy()
+    jacobian = np.zeros((len(external_values), len(internal)))
+    is_replaced = pre_replacements >= 0
+    external_values[is_replaced] = internal[pre_replacements[is_replaced]]
+    jacobian[np.flatnonzero(is_replaced), pre_replacements[is_replaced]] = 1
+
+    for constr in processed_constraints:
+        func = getattr(kt, f"{constr['type']}_from_internal")
+        jac_func = getattr(kt, f"{constr['type']}_from_internal_jacobian")
+        index = constr["index"]
+        jacobian[index] = jac_func(external_values[index], constr) @ jacobian[index]
+        external_values[index] = func(external_values[index], constr)
+
+    for i in np.flatnonzero(post_replacements >= 0):
+        jacobian[i] = jacobian[post_replacements[i]]
+
+    return jacobian
+
+
+def compile_reparametrization_plan(processed_params, processed_constraints):
+    """Collect everything that is needed to reparametrize from internal in arrays.
+
+    :func:`reparametrize_from_internal` loops over the processed constraints, looks up
+    the kernel transformations and converts columns of processed params to numpy arrays
+    in each call. The plan does this once. The indices of all constraints are stored in
+    one contiguous array and the transformation matrices of all linear constraints are
+    stored in compressed sparse row format in three other arrays, such that
+    :func:`external_values_from_plan` can do the complete reparametrization in one numba
+    compiled function whose cost scales with the number of nonzero matrix entries.
+
+    Args:
+        processed_params (pd.DataFrame): Processed params. See
+            :func:`~estimagic.optimization.process_constraints.process_constraints`.
+        processed_constraints (list): Processed and consolidated constraints.
+
+    Returns:
+        plan (ReparametrizationPlan)
+
+    """
+    type_codes, index_ptr, indices = [], [0], []
+    matrix_ptr, row_ptr, col_indices, matrices = [0], [], [], []
+    n_nonzero = 0
+    for constr in processed_constraints:
+        if constr["type"] not in _TYPE_CODES:
+            raise ValueError(f"Invalid constraint type: {constr['type']}.")
+        index = np.asarray(constr["index"], dtype=np.int64)
+        type_codes.append(_TYPE_CODES[constr["type"]])
+        indices.append(index)
+        index_ptr.append(index_ptr[-1] + len(index))
+        if constr["type"] == "linear":
+            matrix = sparse.csr_matrix(constr["from_internal"], dtype=float)
+            row_ptr.append(matrix.indptr + n_nonzero)
+            col_indices.append(matrix.indices)
+            matrices.append(matrix.data)
+            n_nonzero += matrix.nnz
+            matrix_ptr.append(matrix_ptr[-1] + len(index) + 1)
+        else:
+            matrix_ptr.append(matrix_ptr[-1])
+
+    plan = ReparametrizationPlan(
+        fixed_values=processed_params["_internal_fixed_value"].to_numpy(dtype=float),
+        pre_replacements=processed_params["_pre_replacements"].to_numpy(dtype=np.int64),
+        post_replacements=processed_params["_post_replacements"].to_numpy(
+            dtype=np.int64
+        ),
+        type_codes=np.array(type_codes, dtype=np.int64),
+        index_ptr=np.array(index_ptr, dtype=np.int64),
+        indices=_concatenate(indices, dtype=np.int64),
+        matrix_ptr=np.array(matrix_ptr, dtype=np.int64),
+        row_ptr=_concatenate(row_ptr, dtype=np.int64),
+        col_indices=_concatenate(col_indices, dtype=np.int64),
+        matrices=_concatenate(matrices, dtype=float),
+    )
+    return plan
+
+
+def external_values_from_plan(internal, plan):
+    """Convert internal parameters to external parameter values with a compiled plan.
+
+    This gives the same result as :func:`external_values_from_internal`.
+
+    Args:
+        internal (np.ndarray): 1d numpy array with internal parameters.
+        plan (ReparametrizationPlan): See :func:`compile_reparametrization_plan`.
+
+    Returns:
+        external_values (np.ndarray): 1d numpy array with the external parameters.
+
+    """
+    return _external_values_from_plan(np.asarray(internal, dtype=float), *plan)
+
+
+@nb.jit(nopython=True, cache=True)
+def _external_values_from_plan(
+    internal,
+    fixed_values,
+    pre_replacements,
+    post_replacements,
+    type_codes,
+    index_ptr,
+    indices,
+    matrix_ptr,
+    row_ptr,
+    col_indices,
+    matrices,
+):
+    external = fixed_values.copy()
+    for i in range(len(pre_replacements)):
+        if pre_replacements[i] >= 0:
+            external[i] = internal[pre_replacements[i]]
+
+    for c in range(len(type_codes)):
+        index = indices[index_ptr[c] : index_ptr[c + 1]]
+        values = external[index]
+        if type_codes[c] == 0:
+            rows = row_ptr[matrix_ptr[c] : matrix_ptr[c + 1]]
+            transformed = np.zeros(len(index))
+            for i in range(len(index)):
+                for k in range(rows[i], rows[i + 1]):
+                    transformed[i] += matrices[k] * values[col_indices[k]]
+        elif type_codes[c] == 1:
+            transformed = values / values.sum()
+        else:
+            transformed = _covariance_from_cholesky_params(values, type_codes[c] == 3)
+        external[index] = transformed
+
+    for i in range(len(post_replacements)):
+        if post_replacements[i] >= 0:
+            external[i] = external[post_replacements[i]]
 
     return external
 
 
-@nb.jit
+def _concatenate(arrays, dtype):
+    return np.concatenate(arrays).astype(dtype) if arrays else np.zeros(0, dtype=dtype)
+
+
+@nb.jit(nopython=True, cache=True)
+def _covariance_from_cholesky_params(chol_params, as_sdcorr):
+    """Numba version of the covariance and sdcorr kernel transformations."""
+    dim = int((np.sqrt(8 * len(chol_params) + 1) - 1) / 2)
+    chol = np.zeros((dim, dim))
+    k = 0
+    for i in range(dim):
+        for j in range(i + 1):
+            chol[i, j] = chol_params[k]
+            k += 1
+    cov = np.zeros((dim, dim))
+    for i in range(dim):
+        for j in range(i + 1):
+            for m in range(j + 1):
+                cov[i, j] += chol[i, m] * chol[j, m]
+
+    out = np.zeros(len(chol_params))
+    k = 0
+    if as_sdcorr:
+        sds = np.zeros(dim)
+        for i in range(dim):
+            sds[i] = np.sqrt(cov[i, i])
+        out[:dim] = sds
+        k = dim
+        for i in range(dim):
+            for j in range(i):
+                out[k] = cov[i, j] / (sds[i] * sds[j])
+                k += 1
+    else:
+        for i in range(dim):
+            for j in range(i + 1):
+                out[k] = cov[i, j]
+                k += 1
+    return out
+
+
+@nb.jit(cache=True)
 def _do_pre_replacements(internal, pre_replacements, container):
     for external_pos, internal_pos in enumerate(pre_replacements):
         if internal_pos >= 0:
@@ -73,7 +376,7 @@ def _do_pre_replacements(internal, pre_replacements, container):
     return container
 
 
-@nb.jit
+@nb.jit(cache=True)
 def _do_post_replacements(post_replacements, container):
     for i, pos in enumerate(post_replacements):
         if pos >= 0:
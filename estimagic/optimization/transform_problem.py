@@ -1,12 +1,12 @@
 import functools
-import json
+import traceback
 import warnings
-from pathlib import Path
 
 import numpy as np
 import pandas as pd
-from scipy.optimize._numdiff import approx_derivative
 
+from estimagic.decorators import batch_numpy_interface
+from estimagic.decorators import cache_evaluations
 from estimagic.decorators import expand_criterion_output
 from estimagic.decorators import handle_exceptions
 from estimagic.decorators import log_evaluation
@@ -14,10 +14,13 @@ from estimagic.decorators import log_gradient
 from estimagic.decorators import log_gradient_status
 from estimagic.decorators import negative_criterion
 from estimagic.decorators import numpy_interface
+from estimagic.differentiation.numdiff_np import first_derivative
 from estimagic.logging.create_database import prepare_database
+from estimagic.optimization.algorithms import get_algorithm_info
+from estimagic.optimization.evaluation_cache import EvaluationCache
 from estimagic.optimization.process_constraints import process_constraints
+from estimagic.optimization.reparametrize import reparametrization_jacobian
 from estimagic.optimization.reparametrize import reparametrize_to_internal
-from estimagic.optimization.utilities import propose_algorithms
 
 
 def transform_problem(
@@ -112,18 +115,40 @@ def transform_problem(
     )
 
     # harmonize criterion interface
-    is_maximization = general_options.pop("_maximization", False)
+    is_maximization = general_options.get("_maximization", False)
+    if general_options.get("batch_criterion", False):
+        batch_criterion = criterion
+        criterion = _single_from_batch_criterion(batch_criterion)
+    else:
+        batch_criterion = None
     criterion = expand_criterion_output(criterion)
     criterion = negative_criterion(criterion) if is_maximization else criterion
 
     # first criterion evaluation for the database and the pounders algorithm
+    numpy_criterion = general_options.get("numpy_criterion", False)
     fitness_eval, comparison_plot_data, raw_result = _evaluate_criterion(
-        criterion=criterion, params=params, criterion_kwargs=criterion_kwargs
+        criterion=criterion,
+        params=params["value"].to_numpy() if numpy_criterion else params,
+        criterion_kwargs=criterion_kwargs,
     )
-    general_options = general_options.copy()
+    # the worker pool is only used to distribute optimizations and cannot be pickled.
+    general_options = {
+        key: val
+        for key, val in general_options.items()
+        if key not in ["_maximization", "worker_pool"]
+    }
     general_options["_start_criterion_value"] = raw_result
     general_options["start_criterion_value"] = fitness_eval
 
+    algo_info = optim_kwargs["algo_info"]
+    if algo_info.least_squares and np.isscalar(raw_result):
+        raise ValueError(
+            f"{algorithm} is a least-squares algorithm. The criterion function must "
+            "return an array of residuals instead of a scalar."
+        )
+    if gradient is not None and not algo_info.uses_gradient:
+        warnings.warn(f"{algorithm} does not use gradients. The gradient is ignored.")
+
     with warnings.catch_warnings():
         warnings.simplefilter(action="ignore", category=pd.errors.PerformanceWarning)
 
@@ -132,6 +157,12 @@ def transform_problem(
         internal_params = reparametrize_to_internal(params, constraints)
         bounds = _get_internal_bounds(params)
 
+    if not algo_info.supports_bounds and np.isfinite(bounds).any():
+        raise ValueError(
+            f"{algorithm} does not support bounds. Note that some constraints are "
+            "implemented with bounds on the internal parameters."
+        )
+
     # setup the database to pass it to the internal functions for logging
     if logging:
         database = prepare_database(
@@ -155,8 +186,12 @@ def transform_problem(
         log_evaluation,
         database=database,
         tables=["params_history", "criterion_history", "comparison_plot", "timestamps"],
+        names=params["name"].tolist() if numpy_criterion else None,
     )
 
+    # the cache is shared with the criterion of the internal gradient.
+    evaluation_cache = EvaluationCache(general_options.get("criterion_cache_size", 100))
+
     internal_criterion = _create_internal_criterion(
         criterion=criterion,
         params=params,
@@ -165,6 +200,7 @@ def transform_problem(
         logging_decorator=logging_decorator,
         general_options=general_options,
         database=database,
+        evaluation_cache=evaluation_cache,
     )
 
     internal_gradient = _create_internal_gradient(
@@ -177,15 +213,41 @@ def transform_problem(
         criterion_kwargs=criterion_kwargs,
         general_options=general_options,
         database=database,
+        evaluation_cache=evaluation_cache,
+    )
+
+    # batch evaluations are only worthwhile for a batch criterion or if they are
+    # distributed over several cores.
+    evaluate_in_parallel = (
+        algo_info.parallelizable and general_options.get("population_n_cores", 1) > 1
     )
+    if not algo_info.supports_batch_evaluation or (
+        batch_criterion is None and not evaluate_in_parallel
+    ):
+        internal_batch_criterion = None
+    else:
+        internal_batch_criterion = _create_internal_batch_criterion(
+            criterion=criterion,
+            batch_criterion=batch_criterion,
+            params=params,
+            constraints=constraints,
+            criterion_kwargs=criterion_kwargs,
+            is_maximization=is_maximization,
+            logging_decorator=logging_decorator,
+            general_options=general_options,
+            database=database,
+            numpy_criterion=numpy_criterion,
+        )
 
     internal_kwargs = {
         "internal_criterion": internal_criterion,
+        "internal_batch_criterion": internal_batch_criterion,
         "internal_params": internal_params,
         "bounds": bounds,
         "internal_gradient": internal_gradient,
         "database": database,
         "general_options": general_options,
+        "evaluation_cache": evaluation_cache,
     }
     optim_kwargs.update(internal_kwargs)
 
@@ -228,10 +290,8 @@ def _pre_process_arguments(
     # important for dash_options to be last for standards to be overwritten
     dash_options = {**standard_dash_options, **dash_options}
 
-    origin, algo_name = _process_algorithm(algorithm)
     optim_kwargs = {
-        "origin": origin,
-        "algo_name": algo_name,
+        "algo_info": get_algorithm_info(algorithm),
         "algo_options": algo_options,
     }
 
@@ -243,37 +303,6 @@ def _pre_process_arguments(
     return optim_kwargs, params, dash_options, database_path
 
 
-def _process_algorithm(algorithm):
-    """Identify the algorithm from the user-supplied string.
-
-    Args:
-        algorithm (str): Package and name of the algorithm. It should be of the format
-            {pkg}_{name}.
-
-    Returns:
-        origin (str): Name of the package.
-        algo_name (str): Name of the algorithm.
-
-    """
-    current_dir_path = Path(__file__).resolve().parent
-    with open(current_dir_path / "algo_dict.json") as j:
-        algos = json.load(j)
-
-    origin, algo_name = algorithm.split("_", 1)
-
-    try:
-        assert algo_name in algos[origin], "Invalid algorithm requested: {}".format(
-            algorithm
-        )
-    except (AssertionError, KeyError):
-        proposals = propose_algorithms(algorithm, algos)
-        raise NotImplementedError(
-            f"{algorithm} is not a valid choice. Did you mean one of {proposals}?"
-        )
-
-    return origin, algo_name
-
-
 def _set_params_defaults_if_missing(params):
     """Set defaults and run checks on the user-supplied params.
 
@@ -386,6 +415,7 @@ def _create_internal_criterion(
     logging_decorator,
     general_options,
     database,
+    evaluation_cache,
 ):
     """Create the internal criterion function.
 
@@ -421,6 +451,10 @@ def _create_internal_criterion(
         database (sqlalchemy.MetaData). The engine that connects to the
             database can be accessed via ``database.bind``.
 
+        evaluation_cache (EvaluationCache):
+            Cache of criterion values which is shared with the criterion function
+            of the internal gradient.
+
     Returns:
         internal_criterion (function):
             function that takes an internal_params np.array as only argument.
@@ -429,8 +463,12 @@ def _create_internal_criterion(
 
     """
 
-    @handle_exceptions(database, params, constraints, params, general_options)
-    @numpy_interface(params, constraints)
+    start_params = reparametrize_to_internal(params, constraints)
+    numpy_criterion = general_options.get("numpy_criterion", False)
+
+    @cache_evaluations(cache=evaluation_cache)
+    @handle_exceptions(database, params, constraints, start_params, general_options)
+    @numpy_interface(params, constraints, numpy_criterion)
     @logging_decorator
     def internal_criterion(p):
         """Criterion of the transformed problem."""
@@ -440,6 +478,223 @@ def _create_internal_criterion(
     return internal_criterion
 
 
+def _create_internal_batch_criterion(
+    criterion,
+    batch_criterion,
+    params,
+    constraints,
+    criterion_kwargs,
+    is_maximization,
+    logging_decorator,
+    general_options,
+    database,
+    numpy_criterion,
+):
+    """Create the internal batch criterion function.
+
+    The internal batch criterion function takes a two-dimensional numpy array where
+    each row are the internal parameters of one candidate and returns a
+    one-dimensional array with one criterion value per candidate.
+
+    If a worker pool is passed to the internal batch criterion, the candidates are
+    split into one chunk per worker and the chunks are evaluated in parallel. The
+    evaluations are logged by the calling process. Otherwise, a batch criterion is
+    called once for all candidates and a normal criterion is called for each candidate.
+
+    If the batch criterion raises an exception, a warning is issued and the candidates
+    are evaluated one by one. Exceptions of single candidates are handled by the
+    calling process as in the internal criterion, without evaluating the candidates
+    again.
+
+    Args:
+        criterion (callable): The criterion function with harmonized output. See
+            :func:`~estimagic.decorators.expand_criterion_output`.
+        batch_criterion (callable or None): Python function that takes a DataFrame with
+            one row per candidate and one column per parameter as the first argument
+            and returns a one-dimensional array with one criterion value per candidate.
+            None if the user did not supply a batch criterion.
+        params (pd.DataFrame): See :ref:`params`.
+        constraints (list): List with processed constraint dictionaries.
+        criterion_kwargs (dict): Additional keyword arguments for criterion.
+        is_maximization (bool): Whether the criterion is maximized.
+        logging_decorator (callable): Decorator used for logging the evaluations.
+        general_options (dict): Additional configurations for the optimization.
+        database (sqlalchemy.MetaData or False).
+        numpy_criterion (bool): Whether the criterion takes numpy arrays with the
+            parameter values instead of params DataFrames.
+
+    Returns:
+        internal_batch_criterion (function): Function that takes a two-dimensional
+            array and optionally a :class:`~estimagic.worker_pool.WorkerPool`.
+
+    """
+    start_params = reparametrize_to_internal(params, constraints)
+
+    @batch_numpy_interface(params, constraints, numpy_criterion)
+    def to_params_list(params_list):
+        return params_list
+
+    @logging_decorator
+    def log_result(p, result):
+        return result
+
+    @handle_exceptions(database, params, constraints, start_params, general_options)
+    def raise_exception(x, exception):
+        raise exception
+
+    evaluation_kwargs = {
+        "to_params_list": to_params_list,
+        "criterion": criterion,
+        "batch_criterion": batch_criterion,
+        "criterion_kwargs": criterion_kwargs,
+        "is_maximization": is_maximization,
+    }
+
+    def internal_batch_criterion(x_batch, worker_pool=None):
+        """Batch criterion of the transformed problem."""
+        if worker_pool is None:
+            results, batch_exception_info = _evaluate_chunk(
+                x_batch, **evaluation_kwargs
+            )
+        else:
+            chunks = np.array_split(x_batch, worker_pool.n_cores)
+            arguments = [
+                ((chunk,), evaluation_kwargs) for chunk in chunks if len(chunk)
+            ]
+            futures = worker_pool.submit_all(_evaluate_chunk, arguments)
+            results, batch_exception_info = [], None
+            for future in futures:
+                chunk_results, chunk_exception_info = future.result()
+                results += chunk_results
+                batch_exception_info = batch_exception_info or chunk_exception_info
+
+        if batch_exception_info is not None:
+            warnings.warn(
+                "The batch criterion raised an exception. The candidates are evaluated "
+                "one by one instead, which is much slower. The traceback was:\n\n"
+                f"{batch_exception_info}"
+            )
+
+        criterion_values = []
+        for x, res in zip(x_batch, results):
+            if isinstance(res, Exception):
+                criterion_values.append(raise_exception(x, res))
+            elif database:
+                criterion_values.append(log_result(to_params_list([x])[0], res))
+            else:
+                criterion_values.append(res[0])
+        return np.array(criterion_values, dtype=float)
+
+    return internal_batch_criterion
+
+
+def _evaluate_chunk(
+    x_chunk,
+    to_params_list,
+    criterion,
+    batch_criterion,
+    criterion_kwargs,
+    is_maximization,
+):
+    """Evaluate the criterion for several candidates.
+
+    Args:
+        x_chunk (np.ndarray): Two-dimensional array with one row of internal parameters
+            per candidate.
+        to_params_list (callable): Function that converts x_chunk to a list of params
+            DataFrames.
+        criterion (callable): See :func:`_create_internal_batch_criterion`.
+        batch_criterion (callable or None): See
+            :func:`_create_internal_batch_criterion`.
+        criterion_kwargs (dict): Additional keyword arguments for criterion.
+        is_maximization (bool): Whether the sign of the batch criterion is switched.
+
+    Returns:
+        results (list): One tuple of the criterion value and the comparison plot data
+            per candidate. The entry is the exception if the evaluation raised one.
+        batch_exception_info (str or None): The traceback if the batch criterion
+            raised an exception and the candidates were evaluated one by one.
+
+    """
+    params_list = to_params_list(x_chunk)
+    batch_exception_info = None
+    if batch_criterion is not None:
+        try:
+            criterion_values = batch_criterion(
+                _stack_params(params_list), **criterion_kwargs
+            )
+            criterion_values = np.asarray(criterion_values, dtype=float)
+            if criterion_values.shape != (len(params_list),):
+                raise ValueError(
+                    "A batch criterion has to return one value per row of its input."
+                )
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            batch_exception_info = traceback.format_exc()
+        else:
+            if is_maximization:
+                criterion_values = -criterion_values
+            comparison_plot_data = pd.DataFrame({"value": [np.nan]})
+            return [(val, comparison_plot_data) for val in criterion_values], None
+
+    results = []
+    for p in params_list:
+        try:
+            results.append(criterion(p, **criterion_kwargs))
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception as e:
+            results.append(e)
+    return results, batch_exception_info
+
+
+def _single_from_batch_criterion(batch_criterion):
+    """Create a criterion function that evaluates one params DataFrame.
+
+    Args:
+        batch_criterion (callable): See :func:`_create_internal_batch_criterion`.
+
+    Returns:
+        criterion (callable): Python function that takes a params DataFrame as first
+            argument and returns a scalar criterion value.
+
+    """
+
+    @functools.wraps(batch_criterion)
+    def criterion(params, *args, **kwargs):
+        return batch_criterion(_stack_params([params]), *args, **kwargs)[0]
+
+    return criterion
+
+
+def _stack_params(params_list):
+    """Stack the values of several params DataFrames.
+
+    Args:
+        params_list (list): List of params DataFrames with identical index or list of
+            one-dimensional numpy arrays with parameter values.
+
+    Returns:
+        stacked (pd.DataFrame or np.ndarray): DataFrame with one row per element of
+            params_list and the index of the params DataFrames as columns. If
+            params_list contains numpy arrays, a two-dimensional array is returned.
+
+    Examples:
+        >>> params = pd.DataFrame({"value": [1.0, 2.0]}, index=["a", "b"])
+        >>> _stack_params([params, params * 2])
+             a    b
+        0  1.0  2.0
+        1  2.0  4.0
+
+    """
+    if isinstance(params_list[0], np.ndarray):
+        return np.array(params_list, dtype=float)
+
+    values = np.array([p["value"].to_numpy() for p in params_list], dtype=float)
+    return pd.DataFrame(values, columns=params_list[0].index)
+
+
 def _create_internal_gradient(
     gradient,
     gradient_kwargs,
@@ -450,12 +705,19 @@ def _create_internal_gradient(
     criterion_kwargs,
     general_options,
     database,
+    evaluation_cache,
 ):
     """Create the internal gradient function.
 
     Args:
-        gradient (None): Gradients are currently not allowed to be passed to minimize.
-        gradient_options (dict): Options for the gradient function.
+        gradient (callable or None): Gradient of the criterion function with respect to
+            the external parameters. It is converted to a gradient with respect to the
+            internal parameters with the Jacobian of the reparametrization. If None,
+            the gradient is approximated with
+            :func:`~estimagic.differentiation.numdiff_np.first_derivative`.
+        gradient_options (dict): Options for the numerical gradient. Supported keys
+            are "method", "n_steps", "n_cores", "respect_bounds" and the step options
+            of :func:`~estimagic.differentiation.numdiff_np.first_derivative`.
         criterion (callable or list of callables): Python function that takes a pandas
             DataFrame with parameters as the first argument. Supported outputs are:
                 - scalar floating point
@@ -476,6 +738,8 @@ def _create_internal_gradient(
                     in which the dashboard is run is not terminated when maximize or
                     minimize finish.
         database (sqlalchemy.MetaData)
+        evaluation_cache (EvaluationCache): Cache of criterion values which is shared
+            with the internal criterion function.
 
     Returns:
         internal_gradient (function)
@@ -486,28 +750,33 @@ def _create_internal_gradient(
     names = params.query("_internal_free")["name"].tolist()
 
     if gradient is None:
-        gradient = approx_derivative
+        gradient = first_derivative
         default_options = {
-            "method": "2-point",
-            "rel_step": None,
-            "f0": None,
-            "sparsity": None,
-            "as_linear_operator": False,
+            "method": "forward",
+            "n_steps": 1,
+            "n_cores": 1,
+            "respect_bounds": True,
         }
         gradient_options = {**default_options, **gradient_options}
-
-        if gradient_options["method"] == "2-point":
-            n_gradient_evaluations = 2 * n_internal_params
-        elif gradient_options["method"] == "3-point":
-            n_gradient_evaluations = 3 * n_internal_params
-        else:
-            raise ValueError(
-                f"Gradient method '{gradient_options['method']} not supported."
-            )
-        logging_decorator = functools.partial(
-            log_gradient_status,
-            database=database,
-            n_gradient_evaluations=n_gradient_evaluations,
+        # the method names of scipy's approx_derivative are still supported.
+        method = gradient_options.pop("method")
+        method = {"2-point": "forward", "3-point": "central"}.get(method, method)
+        if method not in ["forward", "backward", "central"]:
+            raise ValueError(f"Gradient method '{method}' not supported.")
+        gradient_options["method"] = method
+
+        if gradient_options.pop("respect_bounds"):
+            lower_bounds, upper_bounds = _get_internal_bounds(params)
+            gradient_options["lower_bounds"] = lower_bounds
+            gradient_options["upper_bounds"] = upper_bounds
+
+        n_directions = 2 if method == "central" else 1
+        n_gradient_evaluations = (
+            n_directions * gradient_options["n_steps"] * n_internal_params
+        )
+        # all functions decorated with logging_decorator share one counter.
+        logging_decorator = log_gradient_status(
+            database=database, n_gradient_evaluations=n_gradient_evaluations
         )
 
         internal_criterion = _create_internal_criterion(
@@ -518,28 +787,136 @@ def _create_internal_gradient(
             logging_decorator=logging_decorator,
             general_options=general_options,
             database=database,
+            evaluation_cache=evaluation_cache,
         )
-        bounds = _get_internal_bounds(params)
 
-        @log_gradient(database, names)
-        def internal_gradient(x):
-            return gradient(internal_criterion, x, bounds=bounds, **gradient_options)
+        worker_pool = gradient_options.pop("worker_pool", None)
+        if gradient_options["n_cores"] == 1 and worker_pool is None:
+
+            @log_gradient(database, names)
+            def internal_gradient(x):
+                return gradient(internal_criterion, x, **gradient_options)
+
+        else:
+            # workers would only update their own copies of the database, the
+            # gradient status counter and the cache. Therefore, they evaluate a
+            # criterion without logging and cache.
+            worker_criterion = _create_internal_criterion(
+                criterion=criterion,
+                params=params,
+                constraints=constraints,
+                criterion_kwargs=criterion_kwargs,
+                logging_decorator=functools.partial(
+                    log_gradient_status, database=False, n_gradient_evaluations=None
+                ),
+                general_options=general_options,
+                database=False,
+                evaluation_cache=EvaluationCache(maxsize=0),
+            )
+
+            @logging_decorator
+            def count_evaluation(criterion_value):
+                return criterion_value, None
+
+            @log_gradient(database, names)
+            def internal_gradient(x):
+                f0 = internal_criterion(x)
+                pool = _GradientEvaluationPool(
+                    n_cores=gradient_options["n_cores"],
+                    worker_pool=worker_pool,
+                    evaluation_cache=evaluation_cache,
+                    count_evaluation=count_evaluation,
+                    scalar_criterion=np.isscalar(f0),
+                )
+                options = {**gradient_options, "f0": f0, "worker_pool": pool}
+                return gradient(worker_criterion, x, **options)
 
     else:
         gradient = functools.partial(gradient, **gradient_kwargs)
-        if constraints not in [[], None]:
-            raise NotImplementedError(
-                "A user provided gradient is not compatible with constraints."
-            )
+        numpy_criterion = general_options.get("numpy_criterion", False)
+        fixed_values = params["_internal_fixed_value"].to_numpy()
+        pre_replacements = params["_pre_replacements"].to_numpy().astype(int)
+        post_replacements = params["_post_replacements"].to_numpy().astype(int)
 
-        @log_gradient(database, names)
-        @numpy_interface(params, constraints)
-        def internal_gradient(p):
+        @numpy_interface(params, constraints, numpy_criterion)
+        def external_gradient(p):
             return gradient(p)
 
+        # the gradient with respect to the external parameters is chained with the
+        # derivative of the reparametrization.
+        @log_gradient(database, names)
+        def internal_gradient(x):
+            jacobian = reparametrization_jacobian(
+                internal=x,
+                fixed_values=fixed_values,
+                pre_replacements=pre_replacements,
+                processed_constraints=constraints,
+                post_replacements=post_replacements,
+            )
+            return np.asarray(external_gradient(x), dtype=float) @ jacobian
+
     return internal_gradient
 
 
+class _GradientEvaluationPool:
+    """Pool for the criterion evaluations of a numerical gradient in parallel.
+
+    :func:`~estimagic.differentiation.numdiff_np.first_derivative` passes the
+    criterion and the evaluation points to :meth:`map`. Points in the evaluation cache
+    are not evaluated again. The other points are evaluated by the workers and their
+    criterion values are stored in the cache and counted towards the gradient status
+    in this process.
+
+    Args:
+        n_cores (int): Number of processes if no worker_pool is given.
+        worker_pool (estimagic.worker_pool.WorkerPool or None): Pool of processes.
+        evaluation_cache (EvaluationCache): Cache of the internal criterion.
+        count_evaluation (callable): Function that updates the gradient status for one
+            criterion value.
+        scalar_criterion (bool): Whether the criterion returns a scalar. The
+            evaluated function of first_derivative returns one-dimensional arrays.
+
+    """
+
+    def __init__(
+        self, n_cores, worker_pool, evaluation_cache, count_evaluation, scalar_criterion
+    ):
+        self.n_cores = n_cores
+        self.worker_pool = worker_pool
+        self.evaluation_cache = evaluation_cache
+        self.count_evaluation = count_evaluation
+        self.scalar_criterion = scalar_criterion
+
+    def map(self, func, points):
+        """Return the evaluations of func at points in the order of points."""
+        results = [self.evaluation_cache.lookup(x) for x in points]
+        missing = [x for x, (found, _) in zip(points, results) if not found]
+
+        if self.worker_pool is not None:
+            evaluations = self.worker_pool.map(func, missing)
+        else:
+            from joblib import delayed
+            from joblib import Parallel
+
+            parallel = Parallel(n_jobs=self.n_cores, max_nbytes="1M", mmap_mode="r")
+            evaluations = parallel(delayed(func)(x) for x in missing)
+
+        evaluations = iter(evaluations)
+        out = []
+        for x, (found, criterion_value) in zip(points, results):
+            if found:
+                out.append(np.atleast_1d(criterion_value))
+                continue
+            evaluation = next(evaluations)
+            # func returns a scalar NaN if the criterion raised an exception.
+            if not np.isscalar(evaluation):
+                criterion_value = evaluation[0] if self.scalar_criterion else evaluation
+                self.evaluation_cache.store(x, criterion_value)
+                self.count_evaluation(criterion_value)
+            out.append(evaluation)
+        return out
+
+
 def _get_internal_bounds(params):
     """Extract the internal bounds from params.
 
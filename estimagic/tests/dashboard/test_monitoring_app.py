@@ -11,6 +11,9 @@ from bokeh.models import ColumnDataSource
 
 import estimagic.dashboard.monitoring_app as monitoring
 from estimagic.logging.create_database import load_database
+from estimagic.logging.create_database import prepare_database
+from estimagic.logging.update_database import append_rows
+from estimagic.logging.update_database import history_row
 
 
 @pytest.fixture()
@@ -34,6 +37,39 @@ def test_monitoring_app():
     )
 
 
+def test_monitoring_app_with_shared_database(tmp_path):
+    params = pd.DataFrame({"name": list("ab"), "value": [1.0, 2], "group": "x"})
+    databases = [
+        prepare_database(
+            tmp_path / "shared.db",
+            params,
+            dash_options={"rollover": 10},
+            optimization_id=i,
+        )
+        for i in range(2)
+    ]
+    for i in range(2):
+        for database in databases:
+            rows = [
+                history_row(database, "params_history", list("ab"), [i, i]),
+                {"value": float(i)},
+            ]
+            append_rows(database, ["params_history", "criterion_history"], rows)
+
+    doc = Document()
+    session_data = {
+        "last_retrieved": 0,
+        "database_path": tmp_path / "shared.db",
+        "optimization_id": 1,
+    }
+    monitoring.monitoring_app(
+        doc=doc, database_name="shared_1", session_data=session_data
+    )
+    assert session_data["last_retrieved"] == 2
+    params_history = doc.get_model_by_name("params_history_cds")
+    assert params_history.data == {"iteration": [2], "a": [0.0], "b": [0.0]}
+
+
 def test_create_bokeh_data_sources(database):
     tables = ["criterion_history", "params_history"]
     criterion_history, params_history = monitoring._create_bokeh_data_sources(
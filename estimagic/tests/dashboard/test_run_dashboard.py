@@ -2,11 +2,13 @@
 from pathlib import Path
 from time import sleep
 
+import pandas as pd
 import pytest
 from click.testing import CliRunner
 
 from estimagic.cli import cli
 from estimagic.dashboard import run_dashboard
+from estimagic.logging.create_database import prepare_database
 
 
 @pytest.fixture()
@@ -70,17 +72,59 @@ def test_create_session_data(database_paths, database_name_to_path):
         "db1": {
             "last_retrieved": 0,
             "database_path": database_paths[0],
+            "optimization_id": None,
             "callbacks": {},
         },
         "db2": {
             "last_retrieved": 0,
             "database_path": database_paths[1],
+            "optimization_id": None,
             "callbacks": {},
         },
     }
     assert res == expected
 
 
+def test_expand_shared_databases(tmp_path, database_paths):
+    params = pd.DataFrame({"name": list("ab")})
+    for i in range(2):
+        prepare_database(tmp_path / "shared.db", params, optimization_id=i)
+
+    name_to_path = {"shared": tmp_path / "shared.db", "db1": database_paths[0]}
+    res_paths, res_ids = run_dashboard._expand_shared_databases(name_to_path)
+    assert res_paths == {
+        "shared_0": tmp_path / "shared.db",
+        "shared_1": tmp_path / "shared.db",
+        "db1": database_paths[0],
+    }
+    assert res_ids == {"shared_0": 0, "shared_1": 1, "db1": None}
+
+    session_data = run_dashboard._create_session_data(res_paths, res_ids)
+    assert session_data["shared_1"]["optimization_id"] == 1
+
+
+def test_process_dashboard_args_with_shared_database(database_paths):
+    database_name_to_path, _, _ = run_dashboard._process_dashboard_args(
+        database_paths=[database_paths[0]] * 2, no_browser=True, port=1234
+    )
+    assert database_name_to_path == {"db1": database_paths[0]}
+
+
+def test_process_dashboard_args_reads_options_of_shared_database(tmp_path):
+    params = pd.DataFrame({"name": list("ab")})
+    for i in range(2):
+        prepare_database(
+            tmp_path / "shared.db",
+            params,
+            dash_options={"port": 4321},
+            optimization_id=i,
+        )
+    _, _, port = run_dashboard._process_dashboard_args(
+        database_paths=tmp_path / "shared.db", no_browser=True, port=None
+    )
+    assert port == 4321
+
+
 def test_dashboard_cli(monkeypatch):
     def fake_run_dashboard(database_paths, no_browser, port):
         assert len(database_paths) == 2
@@ -16,6 +16,7 @@ from estimagic.examples.numdiff_example_functions_np import logit_loglike
 from estimagic.examples.numdiff_example_functions_np import logit_loglike_gradient
 from estimagic.examples.numdiff_example_functions_np import logit_loglikeobs
 from estimagic.examples.numdiff_example_functions_np import logit_loglikeobs_jacobian
+from estimagic.worker_pool import WorkerPool
 
 
 @pytest.fixture
@@ -89,6 +90,22 @@ def test_first_derivative_scalar(method):
     aaae(calculated, expected)
 
 
+@pytest.mark.parametrize("n_steps", [1, 2])
+def test_first_derivative_central_at_bound(n_steps):
+    def f(x):
+        return (x ** 2).sum()
+
+    calculated = first_derivative(
+        f,
+        np.array([0.0, 1.0]),
+        method="central",
+        n_steps=n_steps,
+        lower_bounds=np.zeros(2),
+        upper_bounds=np.full(2, np.inf),
+    )
+    aaae(calculated, np.array([0.0, 2.0]))
+
+
 def test_get_output_shape():
     a = [np.nan, 7, np.ones((3, 4)), 5]
     assert _get_output_shape(a) == (3, 4)
@@ -179,3 +196,31 @@ def test_first_derivative_jacobian_richardson(example_function_jacobian_fixtures
 
     aaae(numdifftools_grad, grad)
     aaae(true_grad, grad)
+
+
+def test_first_derivative_with_worker_pool(binary_choice_inputs):
+    fix = binary_choice_inputs
+    func = partial(logit_loglike, y=fix["y"], x=fix["x"])
+    expected = logit_loglike_gradient(fix["params_np"], fix["y"], fix["x"])
+    with WorkerPool(n_cores=2) as pool:
+        for _ in range(2):
+            calculated = first_derivative(
+                func=func, x=fix["params_np"], worker_pool=pool
+            )
+            aaae(calculated, expected, decimal=4)
+
+
+def _is_memmap(x, data):
+    return np.array([float(isinstance(data, np.memmap))])
+
+
+def test_nan_skipping_batch_evaluator_memory_maps_large_arrays():
+    func = partial(_is_memmap, data=np.ones(200_000))
+    arglist = [np.nan, np.ones(2), np.ones(2)]
+    with WorkerPool(n_cores=2) as pool:
+        for n_cores, worker_pool in [(2, None), (1, pool)]:
+            calculated = _nan_skipping_batch_evaluator(
+                func, arglist, n_cores, worker_pool
+            )
+            assert np.isnan(calculated[0]).all()
+            aaae(np.array(calculated[1:]), np.ones((2, 1)))
@@ -1,14 +1,25 @@
+import os
+import pickle
+import threading
 from datetime import datetime
+from pathlib import Path
+from time import monotonic
 from time import sleep
 
+import numpy as np
 import pandas as pd
 import pytest
 from pandas.testing import assert_frame_equal
 
 import estimagic.logging.update_database as upd_db
+from estimagic.decorators import log_evaluation
+from estimagic.logging.create_database import load_database
+from estimagic.logging.create_database import MAX_HISTORY_COLUMNS
+from estimagic.logging.create_database import WAL_PRAGMAS
 from estimagic.logging.create_database import prepare_database
 from estimagic.logging.read_database import read_last_iterations
 from estimagic.logging.read_database import read_new_iterations
+from estimagic.logging.read_database import read_optimization_ids
 from estimagic.logging.read_database import read_scalar_field
 
 
@@ -126,3 +137,518 @@ def test_timestamp_reading(database):
         time = datetime(year=2020, month=4, day=9, hour=12, minute=41, second=i)
         expected_times.append(time)
     assert res["value"] == expected_times
+
+
+@pytest.fixture
+def buffered_database(tmp_path):
+    params = pd.DataFrame()
+    params["name"] = list("abc")
+    return prepare_database(
+        path=tmp_path / "test.db", params=params, buffer_size=3, flush_interval=60
+    )
+
+
+def _buffer_evaluation(database, i):
+    params = pd.Series(index=list("abc"), data=float(i))
+    tables = ["params_history", "criterion_history"]
+    upd_db.buffer_rows(database, tables, [params, {"value": i ** 2}])
+
+
+def _n_rows(database, table):
+    rows, _ = read_new_iterations(database, table, 0, "list", limit=100)
+    return len(rows) - 1
+
+
+def _wait_for_rows(database, table, n_rows, timeout=10):
+    start = monotonic()
+    while _n_rows(database, table) < n_rows and monotonic() - start < timeout:
+        sleep(0.01)
+    return _n_rows(database, table)
+
+
+def test_buffer_rows_writes_full_buffer(buffered_database):
+    for i in range(2):
+        _buffer_evaluation(buffered_database, i)
+    sleep(0.2)
+    assert _n_rows(buffered_database, "criterion_history") == 0
+
+    _buffer_evaluation(buffered_database, 2)
+    assert _wait_for_rows(buffered_database, "criterion_history", 3) == 3
+    res = read_last_iterations(buffered_database, "criterion_history", 5, "bokeh")
+    assert res["value"] == [0, 1, 4]
+    assert _n_rows(buffered_database, "params_history") == 3
+    upd_db.flush_buffer(buffered_database)
+
+
+def test_flush_buffer(buffered_database):
+    _buffer_evaluation(buffered_database, 0)
+    upd_db.buffer_scalar_field(buffered_database, "gradient_status", 0.5)
+    assert read_scalar_field(buffered_database, "gradient_status") == 0
+
+    upd_db.flush_buffer(buffered_database)
+    assert _n_rows(buffered_database, "params_history") == 1
+    assert read_scalar_field(buffered_database, "gradient_status") == 0.5
+    assert not any(
+        thread.name == "estimagic-database-writer" for thread in threading.enumerate()
+    )
+
+
+def test_buffer_rows_writes_after_flush_interval(buffered_database):
+    buffered_database.write_buffer.flush_interval = 0.1
+    _buffer_evaluation(buffered_database, 0)
+    assert _wait_for_rows(buffered_database, "params_history", 1) == 1
+    upd_db.flush_buffer(buffered_database)
+
+
+def test_buffer_rows_with_full_queue(buffered_database):
+    buffered_database.write_buffer.queue_size = 1
+    for i in range(50):
+        _buffer_evaluation(buffered_database, i)
+    upd_db.flush_buffer(buffered_database)
+
+    res = read_last_iterations(buffered_database, "criterion_history", 100, "bokeh")
+    assert res["value"] == [i ** 2 for i in range(50)]
+
+
+def test_buffer_rows_with_dead_writer_thread(buffered_database, monkeypatch):
+    def failing_writer(*args):
+        raise RuntimeError("Mocked")
+
+    monkeypatch.setattr(upd_db, "_write_in_background", failing_writer)
+    buffered_database.write_buffer.queue_size = 1
+    with pytest.warns(UserWarning, match="writer thread of the database stopped"):
+        for i in range(5):
+            _buffer_evaluation(buffered_database, i)
+        upd_db.flush_buffer(buffered_database)
+
+    res = read_last_iterations(buffered_database, "criterion_history", 10, "bokeh")
+    assert res["value"] == [i ** 2 for i in range(5)]
+
+
+def test_buffer_with_failing_statements_saves_batch(buffered_database):
+    upd_db.buffer_scalar_field(buffered_database, "no_such_table", 0.5)
+    with pytest.warns(UserWarning, match="Unable to write to database"):
+        upd_db.flush_buffer(buffered_database)
+
+    saved = list(Path(".").glob("write_buffer_*.pickle"))
+    assert len(saved) == 1
+    assert pd.read_pickle(saved[0])["scalars"] == {"no_such_table": 0.5}
+
+    upd_db.buffer_scalar_field(buffered_database, "gradient_status", 0.75)
+    upd_db.flush_buffer(buffered_database)
+    assert read_scalar_field(buffered_database, "gradient_status") == 0.75
+
+
+def test_buffer_rows_without_write_buffer(buffered_database, tmp_path):
+    database = load_database(tmp_path / "test.db")
+    _buffer_evaluation(database, 0)
+    assert _n_rows(database, "params_history") == 1
+
+
+def test_pickled_write_buffer_keeps_options_but_not_rows(buffered_database):
+    _buffer_evaluation(buffered_database, 0)
+    unpickled = pickle.loads(pickle.dumps(buffered_database))
+    upd_db.flush_buffer(buffered_database)
+
+    assert unpickled.write_buffer.buffer_size == 3
+    upd_db.flush_buffer(unpickled)
+    assert _n_rows(unpickled, "params_history") == 1
+
+
+@pytest.fixture
+def wal_database(tmp_path):
+    params = pd.DataFrame()
+    params["name"] = list("abc")
+    database = prepare_database(
+        path=tmp_path / "test.db", params=params, buffer_size=3, wal_mode=True
+    )
+    yield database
+    upd_db.flush_buffer(database)
+
+
+def _raw_connection(database):
+    conn = database.bind.connect()
+    raw_connection = conn.connection.connection
+    conn.close()
+    return raw_connection
+
+
+def test_wal_mode_sets_pragmas(wal_database):
+    conn = wal_database.bind.connect()
+    assert conn.execute("PRAGMA journal_mode").scalar() == "wal"
+    assert conn.execute("PRAGMA synchronous").scalar() == 1
+    assert conn.execute("PRAGMA cache_size").scalar() == WAL_PRAGMAS["cache_size"]
+    conn.close()
+
+
+def test_wal_mode_keeps_one_connection_per_thread(wal_database):
+    raw_connection = _raw_connection(wal_database)
+    assert _raw_connection(wal_database) is raw_connection
+
+    other_thread = []
+    thread = threading.Thread(
+        target=lambda: other_thread.append(_raw_connection(wal_database))
+    )
+    thread.start()
+    thread.join()
+    assert other_thread[0] is not raw_connection
+
+
+def test_wal_mode_opens_new_connection_in_other_process(wal_database, monkeypatch):
+    raw_connection = _raw_connection(wal_database)
+    monkeypatch.setattr(os, "getpid", lambda: -1)
+    assert _raw_connection(wal_database) is not raw_connection
+    assert _n_rows(wal_database, "params_history") == 0
+
+
+def test_wal_mode_is_detected_and_pickled(wal_database, tmp_path):
+    assert load_database(tmp_path / "test.db").wal_mode
+    assert pickle.loads(pickle.dumps(wal_database)).wal_mode
+    assert not load_database(tmp_path / "other.db").wal_mode
+
+
+def test_read_while_writing_in_wal_mode(wal_database, tmp_path):
+    reader = load_database(tmp_path / "test.db")
+    for i in range(30):
+        _buffer_evaluation(wal_database, i)
+        _n_rows(reader, "criterion_history")
+    upd_db.flush_buffer(wal_database)
+
+    res = read_last_iterations(reader, "criterion_history", 100, "bokeh")
+    assert res["value"] == [i ** 2 for i in range(30)]
+
+
+@pytest.fixture
+def blob_database(tmp_path):
+    params = pd.DataFrame()
+    params["name"] = list("abc")
+    params["_internal_free"] = [True, False, True]
+    database = prepare_database(
+        path=tmp_path / "test.db", params=params, history_format="blob"
+    )
+    for i in range(3):
+        rows = [
+            upd_db.history_row(database, "params_history", list("abc"), [i] * 3),
+            upd_db.history_row(database, "gradient_history", ["a", "c"], [i, -i]),
+        ]
+        upd_db.append_rows(database, ["params_history", "gradient_history"], rows)
+    return database
+
+
+def test_blob_history_tables(blob_database):
+    assert blob_database.tables["params_history"].columns.keys() == [
+        "iteration",
+        "value",
+    ]
+
+
+def test_read_blob_history_pandas(blob_database, tmp_path):
+    database = load_database(tmp_path / "test.db")
+    res = read_last_iterations(database, "params_history", 2, "pandas")
+    expected = pd.DataFrame(
+        data=[[1.0] * 3, [2.0] * 3],
+        columns=list("abc"),
+        index=pd.Index([2, 3], name="iteration"),
+    )
+    assert_frame_equal(res, expected)
+
+    res = read_last_iterations(database, "gradient_history", 3, "pandas")
+    assert list(res.columns) == ["a", "c"]
+    assert res["c"].tolist() == [0, -1, -2]
+
+
+def test_read_blob_history_list_and_bokeh(blob_database):
+    tables = ["params_history", "gradient_history"]
+    res, last = read_new_iterations(blob_database, tables, 1, "list", limit=1)
+    assert last == 2
+    assert res["params_history"] == [["iteration", "a", "b", "c"], [2, 1, 1, 1]]
+    assert res["gradient_history"] == [["iteration", "a", "c"], [2, 1, -1]]
+
+    res, _ = read_new_iterations(blob_database, tables, 3, "bokeh", limit=10)
+    assert res["params_history"] == {"iteration": [], "a": [], "b": [], "c": []}
+
+
+def test_blob_history_is_default_for_many_params(tmp_path):
+    params = pd.DataFrame()
+    params["name"] = [f"x_{i}" for i in range(MAX_HISTORY_COLUMNS + 1)]
+    database = prepare_database(path=tmp_path / "test.db", params=params)
+    values = np.arange(MAX_HISTORY_COLUMNS + 1, dtype=float)
+    upd_db.append_rows(
+        database,
+        "params_history",
+        upd_db.history_row(database, "params_history", params["name"], values),
+    )
+
+    res = read_last_iterations(database, "params_history", 1, "pandas")
+    np.testing.assert_array_equal(res.to_numpy(), values.reshape(1, -1))
+
+
+def test_prepare_database_changes_history_format(blob_database, tmp_path):
+    params = pd.DataFrame()
+    params["name"] = list("abc")
+    database = prepare_database(path=tmp_path / "test.db", params=params)
+    columns = database.tables["params_history"].columns.keys()
+    assert columns == ["iteration", "a", "b", "c"]
+    assert "history_names" not in load_database(tmp_path / "test.db").tables
+
+
+def test_prepare_database_with_invalid_history_format(tmp_path):
+    with pytest.raises(ValueError):
+        prepare_database(tmp_path / "test.db", pd.DataFrame(), history_format="json")
+
+
+@pytest.mark.parametrize(
+    "kwargs, expected_evaluations",
+    [
+        ({}, [1, 2, 3, 4, 5, 6]),
+        ({"every": 2}, [1, 3, 5]),
+        ({"only_improvements": True}, [1, 2, 4, 6]),
+        ({"every": 3, "only_improvements": True}, [1, 4]),
+    ],
+)
+def test_comparison_plot_policy_selects_evaluations(kwargs, expected_evaluations):
+    policy = upd_db.ComparisonPlotPolicy(**kwargs)
+    evaluations = []
+    for evaluation, criterion_value in enumerate([5, 4, 4, 3, 6, np.ones(2)], 1):
+        row = policy.row(evaluation, criterion_value, np.arange(3))
+        if row is not None:
+            evaluations.append(row["evaluation"])
+    assert evaluations == expected_evaluations
+
+
+def test_comparison_plot_policy_storage():
+    values = pd.Series([1.0, 2, 3, 10, np.nan])
+    row = upd_db.ComparisonPlotPolicy().row(1, 0, values)
+    np.testing.assert_array_equal(np.frombuffer(row["value"]), values.to_numpy())
+
+    row = upd_db.ComparisonPlotPolicy(storage="summary").row(1, 0, values.iloc[:4])
+    assert (row["mean"], row["min"], row["median"], row["max"]) == (4, 1, 2.5, 10)
+
+    row = upd_db.ComparisonPlotPolicy(storage="histogram", bins=3).row(1, 0, values)
+    np.testing.assert_array_equal(np.frombuffer(row["edges"]), [1, 4, 7, 10])
+    np.testing.assert_array_equal(np.frombuffer(row["counts"]), [3, 0, 1])
+
+
+def test_invalid_comparison_plot_storage(tmp_path):
+    with pytest.raises(ValueError):
+        prepare_database(
+            tmp_path / "test.db", pd.DataFrame(), comparison_plot_storage="pickle"
+        )
+
+
+def test_log_comparison_plot_summary_of_every_second_evaluation(tmp_path):
+    params = pd.DataFrame({"name": list("ab"), "value": [1.0, 2]})
+    comparison_plot_data = pd.DataFrame({"value": [1.0, 2, 6]}, index=list("xyz"))
+    database = prepare_database(
+        tmp_path / "test.db",
+        params,
+        comparison_plot_data=comparison_plot_data,
+        comparison_plot_every=2,
+        comparison_plot_storage="summary",
+    )
+    tables = ["params_history", "criterion_history", "comparison_plot", "timestamps"]
+
+    @log_evaluation(database=database, tables=tables)
+    def criterion(params):
+        return 1.0, comparison_plot_data
+
+    for _ in range(5):
+        criterion(params)
+    upd_db.flush_buffer(database)
+
+    res = read_last_iterations(database, "comparison_plot", 10, "pandas")
+    assert res["evaluation"].tolist() == [1, 3, 5]
+    assert res["mean"].tolist() == [3, 3, 3]
+    assert _n_rows(database, "criterion_history") == 5
+    start_data = read_scalar_field(database, "start_comparison_plot_data")
+    assert_frame_equal(start_data, comparison_plot_data)
+
+
+def test_pickled_database_keeps_comparison_plot_policy(tmp_path):
+    params = pd.DataFrame({"name": list("ab")})
+    database = prepare_database(tmp_path / "test.db", params, comparison_plot_every=7)
+    assert pickle.loads(pickle.dumps(database)).comparison_plot_policy.every == 7
+
+
+@pytest.mark.parametrize(
+    "kwargs, expected_retained",
+    [
+        ({}, [1, 2, 3, 4, 5, 6]),
+        ({"every": 2}, [1, 3, 5]),
+        ({"only_improvements": True}, [1, 2, 4, 6]),
+        ({"every": 3, "only_improvements": True}, [1, 4]),
+        ({"interval": 2}, [1, 3, 5]),
+    ],
+)
+def test_retention_policy(kwargs, expected_retained, monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr(upd_db.time, "monotonic", lambda: next(clock))
+    policy = upd_db.RetentionPolicy(**kwargs)
+    retained = []
+    for criterion_value in [5, 4, 4, 3, 6, np.ones(2)]:
+        evaluation, retain = policy.evaluate(criterion_value)
+        if retain:
+            retained.append(evaluation)
+    assert retained == expected_retained
+
+
+@pytest.fixture
+def logged_criterion(tmp_path):
+    params = pd.DataFrame({"name": list("ab"), "value": [1.0, 2]})
+    database = prepare_database(tmp_path / "test.db", params, log_every=3)
+    tables = ["params_history", "criterion_history", "comparison_plot", "timestamps"]
+
+    @log_evaluation(database=database, tables=tables)
+    def criterion(params):
+        return params["value"].sum(), pd.DataFrame({"value": [1.0, 2]})
+
+    return database, params, criterion
+
+
+@pytest.mark.parametrize(
+    "n_evaluations, expected_evaluations",
+    [(8, [1, 4, 7, 8]), (7, [1, 4, 7])],
+)
+def test_last_evaluation_is_logged_on_flush(
+    logged_criterion, n_evaluations, expected_evaluations
+):
+    database, params, criterion = logged_criterion
+    for i in range(n_evaluations):
+        params["value"] = [i, 1.0]
+        criterion(params)
+    upd_db.flush_buffer(database)
+
+    res = read_last_iterations(database, "comparison_plot", 10, "pandas")
+    assert res["evaluation"].tolist() == expected_evaluations
+    res = read_last_iterations(database, "params_history", 10, "pandas")
+    assert res["a"].tolist() == [evaluation - 1 for evaluation in expected_evaluations]
+
+
+def test_pickled_database_keeps_retention_policy(tmp_path):
+    params = pd.DataFrame({"name": list("ab")})
+    database = prepare_database(tmp_path / "test.db", params, log_interval=5)
+    assert pickle.loads(pickle.dumps(database)).retention_policy.interval == 5
+
+
+@pytest.fixture
+def shared_databases(tmp_path):
+    params = pd.DataFrame({"name": list("ab")})
+    databases = [
+        prepare_database(
+            tmp_path / "test.db", params, dash_options={"id": i}, optimization_id=i
+        )
+        for i in range(2)
+    ]
+    # the optimizations write alternately.
+    tables = ["params_history", "criterion_history"]
+    for i in range(3):
+        for optimization_id, database in enumerate(databases):
+            value = 10 * optimization_id + i
+            rows = [
+                upd_db.history_row(database, "params_history", list("ab"), [value] * 2),
+                {"value": value},
+            ]
+            upd_db.append_rows(database, tables, rows)
+    return databases
+
+
+def test_shared_database_has_optimization_id_columns(shared_databases, tmp_path):
+    database = load_database(tmp_path / "test.db")
+    for table in ["params_history", "criterion_history", "optimization_status"]:
+        assert "optimization_id" in database.tables[table].columns
+    assert read_optimization_ids(database) == [0, 1]
+
+
+def test_read_last_iterations_of_one_optimization(shared_databases, tmp_path):
+    database = load_database(tmp_path / "test.db")
+    res = read_last_iterations(
+        database, "criterion_history", 10, "pandas", optimization_id=1
+    )
+    expected = pd.DataFrame(
+        data={"value": [10.0, 11, 12]}, index=pd.Index([2, 4, 6], name="iteration")
+    )
+    assert_frame_equal(res, expected)
+
+    res = read_last_iterations(
+        database, "params_history", 2, "pandas", optimization_id=0
+    )
+    assert res["b"].tolist() == [1, 2]
+
+
+def test_read_new_iterations_uses_optimization_id_of_database(shared_databases):
+    res, last = read_new_iterations(
+        shared_databases[1], "criterion_history", 2, "list", limit=10
+    )
+    assert res == [["iteration", "value"], [4, 11], [6, 12]]
+    assert last == 6
+
+
+def test_shared_database_scalar_fields(shared_databases, tmp_path):
+    upd_db.update_scalar_field(shared_databases[1], "optimization_status", "running")
+    database = load_database(tmp_path / "test.db")
+    statuses = [
+        read_scalar_field(database, "optimization_status", optimization_id=i)
+        for i in range(2)
+    ]
+    assert statuses == ["scheduled", "running"]
+    assert read_scalar_field(shared_databases[1], "dash_options") == {"id": 1}
+
+
+def test_prepare_shared_database_deletes_old_rows_of_optimization(
+    shared_databases, tmp_path
+):
+    params = pd.DataFrame({"name": list("ab")})
+    prepare_database(tmp_path / "test.db", params, optimization_id=1)
+    database = load_database(tmp_path / "test.db")
+    for optimization_id, n_rows in [(0, 3), (1, 0)]:
+        res = read_last_iterations(
+            database, "criterion_history", 10, "list", optimization_id=optimization_id
+        )
+        assert len(res) == 1 + n_rows
+    assert read_optimization_ids(database) == [0, 1]
+
+
+def test_shared_database_requires_blob_history(tmp_path):
+    params = pd.DataFrame({"name": list("ab")})
+    with pytest.raises(ValueError):
+        prepare_database(
+            tmp_path / "test.db", params, history_format="columns", optimization_id=0
+        )
+
+
+def test_pickled_database_keeps_optimization_id(shared_databases):
+    assert pickle.loads(pickle.dumps(shared_databases[1])).optimization_id == 1
+
+
+def test_shared_database_with_different_number_of_params(tmp_path):
+    params = [pd.DataFrame({"name": list("ab")}), pd.DataFrame({"name": list("cde")})]
+    databases = [
+        prepare_database(tmp_path / "test.db", p, optimization_id=i)
+        for i, p in enumerate(params)
+    ]
+    for database, p in zip(databases, params):
+        names = p["name"].tolist()
+        row = upd_db.history_row(database, "params_history", names, [1.0] * len(names))
+        upd_db.append_rows(database, "params_history", row)
+
+    database = load_database(tmp_path / "test.db")
+    for optimization_id, p in enumerate(params):
+        res = read_last_iterations(
+            database, "params_history", 10, "pandas", optimization_id=optimization_id
+        )
+        assert res.columns.tolist() == p["name"].tolist()
+
+    with pytest.raises(ValueError, match="shared by several optimizations"):
+        read_last_iterations(database, "params_history", 10, "pandas")
+
+
+def test_shared_database_requires_same_comparison_plot_storage(tmp_path):
+    params = pd.DataFrame({"name": list("ab")})
+    prepare_database(tmp_path / "test.db", params, optimization_id=0)
+    with pytest.raises(ValueError, match="comparison_plot_storage"):
+        prepare_database(
+            tmp_path / "test.db",
+            params,
+            optimization_id=1,
+            comparison_plot_storage="summary",
+        )
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.testing import assert_array_almost_equal as aaae
+
+from estimagic import minimize
+from estimagic import register_algorithm
+from estimagic.optimization.algorithms import ALGORITHMS
+from estimagic.optimization.algorithms import get_algorithm_info
+
+
+def test_get_algorithm_info_correct_input():
+    info = get_algorithm_info("nlopt_neldermead")
+    assert (info.origin, info.algo_name) == ("nlopt", "neldermead")
+    assert not info.uses_gradient
+
+
+def test_get_algorithm_info_wrong_algo_name():
+    with pytest.raises(NotImplementedError):
+        get_algorithm_info("nlopt_neldremead")
+
+
+def test_get_algorithm_info_wrong_origin():
+    with pytest.raises(NotImplementedError):
+        get_algorithm_info("nlpot_neldermead")
+
+
+def test_capabilities_of_builtin_algorithms():
+    assert get_algorithm_info("scipy_L-BFGS-B").uses_gradient
+    assert get_algorithm_info("pygmo_de").supports_batch_evaluation
+    assert get_algorithm_info("tao_pounders").least_squares
+
+
+def _minimize_coordinate_search(criterion, x, bounds, algo_options, **kwargs):
+    x = x.copy()
+    step = algo_options.get("step", 0.5)
+    n_evaluations = 0
+    while step > 1e-8:
+        improved = False
+        for i in range(len(x)):
+            for direction in [-1, 1]:
+                candidate = x.copy()
+                candidate[i] += direction * step
+                n_evaluations += 1
+                if criterion(candidate) < criterion(x):
+                    x, improved = candidate, True
+        step = step if improved else step / 2
+
+    return {
+        "status": "success",
+        "fitness": criterion(x),
+        "x": x,
+        "n_evaluations": n_evaluations,
+    }
+
+
+@pytest.fixture
+def coordinate_search():
+    register_algorithm("mypkg_coordinate_search", _minimize_coordinate_search)
+    yield "mypkg_coordinate_search"
+    del ALGORITHMS["mypkg_coordinate_search"]
+
+
+def sum_of_squares(params):
+    return ((params["value"] - 1) ** 2).sum()
+
+
+def test_minimize_with_registered_algorithm(coordinate_search):
+    params = pd.DataFrame({"value": [3.0, -2.0, 0.5]})
+    info, final_params = minimize(
+        sum_of_squares, params, coordinate_search, logging=False
+    )
+    aaae(final_params["value"].to_numpy(), np.ones(3))
+    assert info["n_evaluations"] > 0
+
+
+def test_registered_algorithm_without_bound_support_rejects_bounds(
+    coordinate_search,
+):
+    params = pd.DataFrame({"value": [3.0, -2.0, 0.5], "lower": 0.0})
+    with pytest.raises(ValueError):
+        minimize(sum_of_squares, params, coordinate_search, logging=False)
+
+
+def test_register_algorithm_with_reserved_package_name():
+    with pytest.raises(ValueError):
+        register_algorithm("scipy_my_algorithm", _minimize_coordinate_search)
+
+
+def test_least_squares_algorithm_requires_residuals():
+    params = pd.DataFrame({"value": [3.0, -2.0, 0.5]})
+    with pytest.raises(ValueError):
+        minimize(sum_of_squares, params, "tao_pounders", logging=False)
@@ -134,3 +134,34 @@ def test_processing_multi_optim_with_non_standard_inputs_different_constraints(
     check_single_argument_types(res[0])
     assert res[0]["constraints"] == differing_constraints[0]
     assert res[1]["constraints"] == differing_constraints[1]
+
+
+def test_processing_multi_optim_with_shared_database(tmp_path):
+    log_options = {"shared_database": True, "buffer_size": 10}
+    res = broadcast_arguments(
+        criterion=np.mean,
+        params=pd.DataFrame(np.ones(12).reshape(4, 3)),
+        algorithm=["scipy_L-BFGS-B", "pygmo_xnes"],
+        logging=tmp_path / "logging.db",
+        log_options=log_options,
+    )
+
+    assert [r["logging"] for r in res] == [tmp_path / "logging.db"] * 2
+    assert [r["log_options"] for r in res] == [
+        {"buffer_size": 10, "optimization_id": 0},
+        {"buffer_size": 10, "optimization_id": 1},
+    ]
+    assert log_options == {"shared_database": True, "buffer_size": 10}
+
+
+def test_processing_multi_optim_without_shared_database(tmp_path):
+    res = broadcast_arguments(
+        criterion=np.mean,
+        params=pd.DataFrame(np.ones(12).reshape(4, 3)),
+        algorithm=["scipy_L-BFGS-B", "pygmo_xnes"],
+        logging=tmp_path / "logging.db",
+        log_options={"shared_database": False},
+    )
+
+    assert res[1]["logging"] == tmp_path / "logging_1.db"
+    assert res[1]["log_options"] == {}
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from estimagic.decorators import cache_evaluations
+from estimagic.optimization.evaluation_cache import EvaluationCache
+from estimagic.optimization.optimize import minimize
+
+
+def test_cache_evicts_least_recently_used_entry():
+    cache = EvaluationCache(maxsize=2)
+    cache.store(np.zeros(2), 0)
+    cache.store(np.ones(2), 1)
+    cache.lookup(np.zeros(2))
+    cache.store(np.full(2, 2.0), 2)
+
+    assert cache.lookup(np.zeros(2)) == (True, 0)
+    assert cache.lookup(np.ones(2)) == (False, None)
+    assert cache.lookup(np.full(2, 2.0)) == (True, 2)
+
+
+def test_cache_with_maxsize_zero_stores_nothing():
+    cache = EvaluationCache(maxsize=0)
+    cache.store(np.zeros(2), 0)
+    assert cache.lookup(np.zeros(2)) == (False, None)
+
+
+def test_cache_evaluations_calls_function_once_per_parameter_vector():
+    calls = []
+
+    @cache_evaluations(cache=EvaluationCache())
+    def f(x):
+        calls.append(x)
+        return x.sum()
+
+    for x in [np.ones(3), np.ones(3), np.zeros(3), np.ones(3)]:
+        assert f(x) == x.sum()
+
+    assert len(calls) == 2
+
+
+def test_minimize_reports_cache_hits():
+    params = pd.DataFrame({"value": [1, 2.5, -1]})
+
+    def sum_of_squares(params):
+        return (params["value"] ** 2).sum()
+
+    info, _ = minimize(sum_of_squares, params, "scipy_L-BFGS-B", logging=False)
+    assert info["n_cache_hits"] > 0
+
+    info, _ = minimize(
+        sum_of_squares,
+        params,
+        "scipy_L-BFGS-B",
+        general_options={"criterion_cache_size": 0},
+        logging=False,
+    )
+    assert info["n_cache_hits"] == 0
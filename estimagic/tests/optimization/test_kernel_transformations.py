@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_array_almost_equal as aaae
+
+import estimagic.optimization.kernel_transformations as kt
+from estimagic.differentiation.numdiff_np import first_derivative
+from estimagic.optimization.utilities import cov_matrix_to_params
+from estimagic.optimization.utilities import cov_matrix_to_sdcorr_params
+
+
+def get_internal_values(type_):
+    cov = np.array([[2, 0.5, 0.2], [0.5, 3, -0.4], [0.2, -0.4, 1.5]])
+    if type_ == "covariance":
+        internal = kt.covariance_to_internal(cov_matrix_to_params(cov), {})
+    elif type_ == "sdcorr":
+        internal = kt.sdcorr_to_internal(cov_matrix_to_sdcorr_params(cov), {})
+    elif type_ == "probability":
+        internal = np.array([0.4, 1.5, 1])
+    else:
+        internal = np.array([0.5, -1, 2])
+    return internal
+
+
+@pytest.fixture
+def linear_constraint():
+    to_internal = np.array([[1, 2, 0], [0, 1, 0], [1, 1, 1.0]])
+    return {
+        "to_internal": to_internal,
+        "from_internal": np.linalg.inv(to_internal),
+    }
+
+
+types = ["covariance", "sdcorr", "probability", "linear"]
+
+
+@pytest.mark.parametrize("type_", types)
+def test_from_internal_jacobian(type_, linear_constraint):
+    internal = get_internal_values(type_)
+    func = getattr(kt, f"{type_}_from_internal")
+    jac_func = getattr(kt, f"{type_}_from_internal_jacobian")
+
+    calculated = jac_func(internal, linear_constraint)
+    expected = first_derivative(
+        func, internal, func_kwargs={"constr": linear_constraint}, method="central"
+    )
+    aaae(calculated, expected, decimal=6)
+
+
+@pytest.mark.parametrize("type_", types)
+def test_from_internal_with_batch(type_, linear_constraint):
+    internal = get_internal_values(type_)
+    func = getattr(kt, f"{type_}_from_internal")
+
+    batch = np.array([internal, 1.1 * internal])
+    calculated = func(batch, linear_constraint)
+    expected = np.array([func(row, linear_constraint) for row in batch])
+    aaae(calculated, expected)
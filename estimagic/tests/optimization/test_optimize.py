@@ -1,10 +1,16 @@
+import threading
+
 import numpy as np
 import pandas as pd
 import pytest
 from numpy.testing import assert_array_almost_equal as aaae
 
+from estimagic.logging.create_database import load_database
+from estimagic.logging.read_database import read_new_iterations
+from estimagic.logging.read_database import read_scalar_field
 from estimagic.optimization.optimize import maximize
 from estimagic.optimization.optimize import minimize
+from estimagic.worker_pool import WorkerPool
 
 
 # =====================================================================================
@@ -144,3 +150,339 @@ def test_maximize_with_gradient(algorithm):
     )
 
     aaae(info["x"], [0, 0, 0])
+
+
+def batch_f(params_batch):
+    x = params_batch.to_numpy()
+    return -(x ** 2).sum(axis=1)
+
+
+batch_algorithms = ["pygmo_cmaes", "pygmo_pso_gen", "pygmo_de", "scipy_L-BFGS-B"]
+
+
+@pytest.mark.parametrize("algorithm", batch_algorithms)
+def test_maximize_with_batch_criterion(algorithm):
+    params = pd.Series([1, -1, -1.5, 1.5], name="value").to_frame()
+    params["lower"] = -2
+    params["upper"] = 2
+    algo_options = {"popsize": 30, "gen": 150} if "pygmo" in algorithm else {}
+
+    _, final_params = maximize(
+        batch_f,
+        params,
+        algorithm,
+        algo_options=algo_options,
+        general_options={"batch_criterion": True},
+        logging=False,
+    )
+    aaae(final_params["value"].to_numpy(), np.zeros(len(final_params)), decimal=2)
+
+
+def test_batch_criterion_is_called_once_per_generation():
+    n_calls = []
+
+    def counting_batch_f(params_batch):
+        n_calls.append(len(params_batch))
+        return -batch_f(params_batch)
+
+    params = pd.Series([1, -1, -1.5, 1.5], name="value").to_frame()
+    params["lower"] = -2
+    params["upper"] = 2
+
+    minimize(
+        counting_batch_f,
+        params,
+        "pygmo_cmaes",
+        algo_options={"popsize": 20, "gen": 5},
+        general_options={"batch_criterion": True},
+        logging=False,
+    )
+    assert n_calls.count(20) == 5
+
+
+def test_batch_criterion_with_exceptions(tmp_path):
+    failed_single_evaluations = []
+
+    def failing_batch_f(params_batch):
+        if (params_batch.to_numpy() > 1.9).any():
+            if len(params_batch) == 1:
+                failed_single_evaluations.append(params_batch)
+            raise ValueError
+        return -batch_f(params_batch)
+
+    params = pd.Series([1, -1, -1.5, 1.5], name="value").to_frame()
+    params["lower"] = -2
+    params["upper"] = 2
+
+    with pytest.warns(UserWarning, match="The batch criterion raised an exception"):
+        info, final_params = minimize(
+            failing_batch_f,
+            params,
+            "pygmo_pso_gen",
+            algo_options={"popsize": 30, "gen": 100},
+            general_options={"batch_criterion": True},
+            logging=tmp_path / "log.db",
+        )
+    aaae(final_params["value"].to_numpy(), np.zeros(len(final_params)), decimal=2)
+
+    database = load_database(tmp_path / "log.db")
+    criterion_history, _ = read_new_iterations(
+        database, "criterion_history", 0, "list", limit=100_000
+    )
+    exceptions = database.bind.execute(database.tables["exceptions"].select())
+    n_logged = len(criterion_history) - 1
+    n_exceptions = len(exceptions.fetchall())
+    assert n_exceptions > 0
+    # evaluations that raise are logged as exceptions instead
+    assert n_logged + n_exceptions == info["n_evaluations"]
+    # candidates that raise are not evaluated again to compute the penalty
+    assert len(failed_single_evaluations) == n_exceptions
+
+
+@pytest.mark.parametrize("criterion, batch", [(f, False), (batch_f, True)])
+def test_maximize_with_parallel_population(criterion, batch):
+    params = pd.Series([1, -1, -1.5, 1.5], name="value").to_frame()
+    params["lower"] = -2
+    params["upper"] = 2
+
+    _, final_params = maximize(
+        criterion,
+        params,
+        "pygmo_pso_gen",
+        algo_options={"popsize": 30, "gen": 150},
+        general_options={"batch_criterion": batch, "population_n_cores": 2},
+        logging=False,
+    )
+    aaae(final_params["value"].to_numpy(), np.zeros(len(final_params)), decimal=2)
+
+
+@pytest.mark.parametrize("algorithm", ["pygmo_pso_gen", "pygmo_de"])
+def test_parallel_population_is_logged(tmp_path, algorithm):
+    params = pd.Series([1, -1, -1.5, 1.5], name="value").to_frame()
+    params["lower"] = -2
+    params["upper"] = 2
+
+    info, _ = maximize(
+        f,
+        params,
+        algorithm,
+        algo_options={"popsize": 10, "gen": 5},
+        general_options={"population_n_cores": 2},
+        logging=tmp_path / "log.db",
+    )
+
+    database = load_database(tmp_path / "log.db")
+    criterion_history, _ = read_new_iterations(
+        database, "criterion_history", 0, "list", limit=100_000
+    )
+    # cache hits are counted by pygmo but not logged.
+    n_logged = info["n_evaluations"] - info["n_cache_hits"]
+    assert len(criterion_history) - 1 == n_logged
+
+
+def test_parallel_population_with_worker_pool():
+    params = pd.Series([1, -1, -1.5, 1.5], name="value").to_frame()
+    params["lower"] = -2
+    params["upper"] = 2
+
+    with WorkerPool(n_cores=2) as pool:
+        for _ in range(2):
+            _, final_params = maximize(
+                f,
+                params,
+                "pygmo_pso_gen",
+                algo_options={"popsize": 30, "gen": 150},
+                general_options={"population_n_cores": 2, "worker_pool": pool},
+                logging=False,
+            )
+            aaae(final_params["value"], np.zeros(len(final_params)), decimal=2)
+
+
+@pytest.mark.parametrize(
+    "gradient_options",
+    [
+        {"n_cores": 2},
+        {"method": "central", "n_steps": 2},
+        {"method": "3-point", "respect_bounds": False},
+    ],
+)
+def test_minimize_with_numerical_gradient_options(gradient_options):
+    start_params = pd.DataFrame()
+    start_params["value"] = [1, 2.5, -1]
+    start_params["lower"] = [0, -5, -5]
+    info, params = minimize(
+        criterion=sum_of_squares,
+        params=start_params,
+        algorithm="scipy_L-BFGS-B",
+        gradient_options=gradient_options,
+        logging=False,
+    )
+    aaae(info["x"], [0, 0, 0])
+
+
+@pytest.mark.parametrize("n_cores", [1, 2])
+def test_gradient_status_is_logged_for_parallel_gradients(tmp_path, n_cores):
+    start_params = pd.DataFrame({"value": [1, 2.5, -1]})
+    minimize(
+        criterion=sum_of_squares,
+        params=start_params,
+        algorithm="scipy_L-BFGS-B",
+        gradient_options={"n_cores": n_cores},
+        logging=tmp_path / "log.db",
+    )
+    database = load_database(tmp_path / "log.db")
+    assert read_scalar_field(database, "gradient_status") == 1
+
+
+def test_minimize_with_invalid_gradient_method():
+    start_params = pd.DataFrame({"value": [1, 2.5, -1]})
+    with pytest.raises(ValueError):
+        minimize(
+            criterion=sum_of_squares,
+            params=start_params,
+            algorithm="scipy_L-BFGS-B",
+            gradient_options={"method": "cs"},
+            logging=False,
+        )
+
+
+def f_np(x):
+    return -x @ x
+
+
+@pytest.mark.parametrize("algorithm", ["scipy_L-BFGS-B", "pygmo_de"])
+def test_maximize_with_numpy_criterion(tmp_path, algorithm):
+    params = pd.Series([1, 1, -1.5, 1.5], name="value").to_frame()
+    params["lower"] = -2
+    params["upper"] = 2
+    constraints = [{"loc": [0, 1], "type": "equality"}]
+
+    info, final_params = maximize(
+        f_np,
+        params,
+        algorithm,
+        algo_options={"popsize": 30, "gen": 150} if algorithm == "pygmo_de" else {},
+        constraints=constraints,
+        general_options={"numpy_criterion": True},
+        logging=tmp_path / "log.db",
+    )
+    aaae(final_params["value"].to_numpy(), np.zeros(len(final_params)), decimal=2)
+
+    database = load_database(tmp_path / "log.db")
+    params_history, _ = read_new_iterations(
+        database, "params_history", 0, "pandas", limit=100_000
+    )
+    assert len(params_history) > 0
+    assert (params_history["0"] == params_history["1"]).all()
+
+
+def test_minimize_with_numpy_criterion_and_gradient():
+    start_params = pd.DataFrame({"value": [1, 2.5, -1]})
+    info, _ = minimize(
+        criterion=lambda x: x @ x,
+        params=start_params,
+        algorithm="scipy_L-BFGS-B",
+        gradient=lambda x: 2 * x,
+        general_options={"numpy_criterion": True},
+        logging=False,
+    )
+    aaae(info["x"], [0, 0, 0])
+
+
+@pytest.mark.parametrize("algorithm", ["scipy_L-BFGS-B", "scipy_SLSQP"])
+def test_minimize_with_gradient_and_constraints(algorithm):
+    start_params = pd.DataFrame()
+    start_params["value"] = [0.3, 0.3, 0.4, 2.5, -1]
+    constraints = [{"loc": [0, 1, 2], "type": "probability"}]
+
+    def criterion(params):
+        x = params["value"].to_numpy()
+        return (x ** 2).sum() + 0.3 * x[0]
+
+    def gradient(params):
+        x = params["value"].to_numpy()
+        return 2 * x + np.array([0.3, 0, 0, 0, 0])
+
+    info, params = minimize(
+        criterion=criterion,
+        params=start_params,
+        algorithm=algorithm,
+        constraints=constraints,
+        gradient=gradient,
+        logging=False,
+    )
+    aaae(params["value"].to_numpy(), [0.7 / 3, 2.3 / 6, 2.3 / 6, 0, 0], decimal=3)
+
+
+def test_buffered_evaluations_are_logged_if_optimization_is_interrupted(tmp_path):
+    def interrupted_sum_of_squares(params):
+        if len(evaluations) == 8:
+            raise KeyboardInterrupt
+        evaluations.append(params)
+        return sum_of_squares(params)
+
+    evaluations = []
+    with pytest.raises(KeyboardInterrupt):
+        minimize(
+            interrupted_sum_of_squares,
+            pd.DataFrame({"value": [1, 2.5, -1]}),
+            "scipy_L-BFGS-B",
+            logging=tmp_path / "log.db",
+            log_options={"buffer_size": 1000, "flush_interval": 1000},
+        )
+
+    database = load_database(tmp_path / "log.db")
+    criterion_history, _ = read_new_iterations(
+        database, "criterion_history", 0, "list", limit=100_000
+    )
+    gradient_history, _ = read_new_iterations(
+        database, "gradient_history", 0, "list", limit=100_000
+    )
+    # the first evaluation is done before the optimization and is not logged.
+    assert len(criterion_history) - 1 > 0
+    assert len(gradient_history) - 1 > 0
+    assert not any(
+        thread.name == "estimagic-database-writer" for thread in threading.enumerate()
+    )
+
+
+def test_minimize_with_blob_histories(tmp_path):
+    info, final_params = minimize(
+        sum_of_squares,
+        pd.DataFrame({"value": [1, 2.5, -1]}),
+        "scipy_L-BFGS-B",
+        constraints=[{"loc": 1, "type": "fixed"}],
+        logging=tmp_path / "log.db",
+        log_options={"history_format": "blob"},
+    )
+
+    database = load_database(tmp_path / "log.db")
+    params_history, _ = read_new_iterations(
+        database, "params_history", 0, "pandas", limit=100_000
+    )
+    gradient_history, _ = read_new_iterations(
+        database, "gradient_history", 0, "pandas", limit=100_000
+    )
+    assert list(params_history.columns) == ["0", "1", "2"]
+    assert (params_history["1"] == 2.5).all()
+    aaae(params_history.iloc[-1].to_numpy(), final_params["value"].to_numpy())
+    assert list(gradient_history.columns) == ["0", "2"]
+    assert len(gradient_history) > 0
+
+
+def test_minimize_only_logs_improvements_and_final_state(tmp_path):
+    info, final_params = minimize(
+        sum_of_squares,
+        pd.DataFrame({"value": [1, 2.5, -1]}),
+        "nlopt_neldermead",
+        logging=tmp_path / "log.db",
+        log_options={"log_only_improvements": True},
+    )
+
+    database = load_database(tmp_path / "log.db")
+    criterion_history, _ = read_new_iterations(
+        database, "criterion_history", 0, "pandas", limit=100_000
+    )
+    values = criterion_history["value"].to_numpy()
+    assert len(values) < info["n_evaluations"]
+    assert (np.diff(values[:-1]) < 0).all()
@@ -1,11 +1,19 @@
 """Test the constraints processing."""
+import time
+
 import numpy as np
 import pandas as pd
 import pytest
 from numba import guvectorize
 from numpy.testing import assert_array_almost_equal
 
+from estimagic.logging.create_database import load_database
+from estimagic.logging.read_database import read_last_iterations
+from estimagic.logging.read_database import read_optimization_ids
+from estimagic.logging.read_database import read_scalar_field
 from estimagic.optimization.optimize import minimize
+from estimagic.optimization.optimize import minimize_as_completed
+from estimagic.worker_pool import WorkerPool
 
 
 def rosen(x):
@@ -18,6 +26,13 @@ def rosen(x):
     return np_rosen(x["value"].to_numpy())
 
 
+def slow_rosen(x, delay):
+    """Rosenbrock function that is slow everywhere except at the start parameters."""
+    if not np.allclose(x["value"], params["value"]):
+        time.sleep(delay)
+    return rosen(x)
+
+
 def np_rosen(x):
 
     return sum(100.0 * (x[1:] - x[:-1] ** 2.0) ** 2.0 + (1 - x[:-1]) ** 2.0)
@@ -297,3 +312,84 @@ def test_criterion_including_guvectoring():
 
     assert_array_almost_equal(result_neldermead, expected_result, decimal=4)
     assert_array_almost_equal(result_bfgs, expected_result, decimal=4)
+
+
+def test_parallel_optimizations_with_logging(tmp_path):
+    result = minimize(
+        rosen,
+        params,
+        ["nlopt_neldermead", "scipy_L-BFGS-B"],
+        general_options={"n_cores": 2},
+        logging=tmp_path / "logging.db",
+    )
+    assert len(result) == 2
+    for i in range(2):
+        database = load_database(tmp_path / f"logging_{i}.db")
+        assert read_scalar_field(database, "optimization_status") == "success"
+
+
+def test_parallel_optimizations_with_shared_database(tmp_path):
+    result = minimize(
+        rosen,
+        params,
+        ["nlopt_neldermead", "scipy_L-BFGS-B"],
+        general_options={"n_cores": 2},
+        logging=tmp_path / "logging.db",
+        log_options={"shared_database": True},
+    )
+    assert not (tmp_path / "logging_0.db").exists()
+
+    database = load_database(tmp_path / "logging.db")
+    assert read_optimization_ids(database) == [0, 1]
+    for i, (info, _) in enumerate(result):
+        assert read_scalar_field(database, "optimization_status", i) == "success"
+        res = read_last_iterations(database, "criterion_history", 10_000, "pandas", i)
+        assert res["value"].min() == pytest.approx(info["fitness"], abs=1e-10)
+
+
+def test_minimize_as_completed_yields_fast_optimizations_first():
+    results = minimize_as_completed(
+        slow_rosen,
+        params,
+        "scipy_L-BFGS-B",
+        criterion_kwargs=[{"delay": 0.01}, {"delay": 0}],
+        general_options={"n_cores": 2},
+        logging=False,
+    )
+    indices = []
+    for info, res_params in results:
+        indices.append(info["optimization_index"])
+        assert_array_almost_equal(res_params["value"].to_numpy(), np.ones(5), 4)
+
+    assert indices == [1, 0]
+
+
+def test_stop_after_n_converged_cancels_slow_optimizations():
+    start = time.time()
+    result = minimize(
+        slow_rosen,
+        params,
+        "scipy_L-BFGS-B",
+        criterion_kwargs=[{"delay": 0}, {"delay": 10}, {"delay": 0}, {"delay": 10}],
+        general_options={"n_cores": 2, "stop_after_n_converged": 2},
+        logging=False,
+    )
+    assert time.time() - start < 10
+
+    statuses = [info["status"] for info, _ in result]
+    assert statuses == ["success", "cancelled", "success", "cancelled"]
+    assert_array_almost_equal(result[1][1]["value"], params["value"])
+
+
+def test_reuse_worker_pool_across_calls():
+    with WorkerPool(n_cores=2) as pool:
+        for _ in range(2):
+            results = minimize(
+                rosen,
+                params,
+                ["nlopt_neldermead", "scipy_L-BFGS-B"],
+                general_options={"worker_pool": pool},
+                logging=False,
+            )
+            for _, res_params in results:
+                assert_array_almost_equal(res_params["value"], np.ones(5), decimal=4)
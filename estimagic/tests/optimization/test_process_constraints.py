@@ -2,12 +2,21 @@
 import numpy as np
 import pandas as pd
 import pytest
+from numpy.testing import assert_array_almost_equal as aaae
+from pandas.testing import assert_frame_equal
+from scipy import sparse
 
+import estimagic.optimization.consolidate_constraints as cc
+import estimagic.optimization.process_constraints as pc_module
 from estimagic.optimization.process_constraints import _apply_constraint_killers
 from estimagic.optimization.process_constraints import _process_selectors
 from estimagic.optimization.process_constraints import (
     _replace_pairwise_equality_by_equality,
 )
+from estimagic.optimization.process_constraints import process_constraints
+from estimagic.optimization.reparametrize import compile_reparametrization_plan
+from estimagic.optimization.reparametrize import external_values_from_plan
+from estimagic.optimization.reparametrize import reparametrize_to_internal
 
 constr1 = {"loc": 0, "type": "equality"}
 expected1 = {"index": [0, 1, 2]}
@@ -89,3 +98,269 @@ def test_apply_killer_constraint_invalid():
     constraints = [{"loc": "a"}, {"loc": "b", "id": 5}, {"kill": 6}]
     with pytest.raises(KeyError):
         _apply_constraint_killers(constraints)
+
+
+@pytest.fixture
+def empty_cache():
+    pc_module._PROCESSED_CONSTRAINTS_CACHE.clear()
+    yield
+    pc_module._PROCESSED_CONSTRAINTS_CACHE.clear()
+
+
+@pytest.fixture
+def cache_example():
+    params = pd.DataFrame(
+        {"value": [0.1, 0.2, 0.3, 0.4, 5.0], "lower": -np.inf, "upper": np.inf}
+    )
+    constraints = [
+        {"loc": [0, 1, 2], "type": "increasing"},
+        {"loc": [3, 4], "type": "fixed"},
+    ]
+    return params, constraints
+
+
+def _fail(*args, **kwargs):
+    raise AssertionError("Constraints were processed again.")
+
+
+def test_process_constraints_reuses_cache_if_only_values_change(
+    empty_cache, cache_example, monkeypatch
+):
+    params, constraints = cache_example
+    expected_pc, expected_pp = process_constraints(constraints, params)
+
+    new_params = params.copy()
+    new_params.loc[[0, 1, 2], "value"] = [1.0, 2.0, 3.0]
+    monkeypatch.setattr(pc_module, "consolidate_constraints", _fail)
+    pc, pp = process_constraints(constraints, new_params)
+
+    for constr, expected_constr in zip(pc, expected_pc):
+        assert constr["type"] == expected_constr["type"]
+        assert list(constr["index"]) == list(expected_constr["index"])
+    assert_frame_equal(pp.drop(columns="value"), expected_pp.drop(columns="value"))
+    assert pp["value"].tolist() == [1.0, 2.0, 3.0, 0.4, 5.0]
+
+
+def test_process_constraints_reprocesses_if_fixed_values_change(
+    empty_cache, cache_example
+):
+    params, constraints = cache_example
+    process_constraints(constraints, params)
+
+    new_params = params.copy()
+    new_params.loc[4, "value"] = 6.0
+    _, pp = process_constraints(constraints, new_params)
+
+    assert pp.loc[4, "_fixed_value"] == 6.0
+
+
+def test_process_constraints_checks_values_if_cache_is_used(
+    empty_cache, cache_example
+):
+    params, constraints = cache_example
+    process_constraints(constraints, params)
+
+    new_params = params.copy()
+    new_params.loc[[0, 1, 2], "value"] = [3.0, 2.0, 1.0]
+    with pytest.raises(ValueError):
+        process_constraints(constraints, new_params)
+
+
+def test_process_constraints_does_not_cache_queries_on_values(empty_cache):
+    params = pd.DataFrame({"value": [0.1, 0.2, 0.3]})
+    constraints = [{"query": "value > 0.15", "type": "equality"}]
+    with pytest.raises(ValueError):
+        process_constraints(constraints, params)
+
+    assert len(pc_module._PROCESSED_CONSTRAINTS_CACHE) == 0
+
+
+def test_linear_constraint_with_fixed_parameter(empty_cache):
+    params = pd.DataFrame({"value": [1.0, 2, 3, 4], "lower": -np.inf, "upper": np.inf})
+    constraints = [
+        {"loc": [0, 1, 2], "type": "linear", "weights": 1, "value": 6},
+        {"loc": 0, "type": "fixed"},
+    ]
+    pc, pp = process_constraints(constraints, params)
+
+    assert pc[0]["index"] == [1, 2]
+    assert pc[0]["right_hand_side"]["value"].tolist() == [5.0]
+    assert pp["_internal_fixed_value"].tolist()[2] == 5.0
+
+
+@pytest.fixture
+def many_linear_constraints():
+    n = 150
+    params = pd.DataFrame(
+        {"value": np.linspace(0, 1, n), "lower": -np.inf, "upper": np.inf}
+    )
+    params.loc[n - 1, "upper"] = 2
+    constraints = [
+        {"loc": list(range(50)), "type": "increasing"},
+        {"loc": list(range(40, 150)), "type": "linear", "weights": 1, "lower": 0},
+        {"loc": [60, 61], "type": "linear", "weights": [1, -1], "upper": 0},
+        {"loc": [70, 71], "type": "equality"},
+    ]
+    params.loc[71, "value"] = params.loc[70, "value"]
+    return params, constraints
+
+
+def test_sparse_and_dense_linear_constraints_are_equivalent(
+    empty_cache, many_linear_constraints, monkeypatch
+):
+    params, constraints = many_linear_constraints
+    pc_sparse, pp_sparse = process_constraints(constraints, params)
+    assert sparse.issparse(pc_sparse[0]["from_internal"])
+
+    pc_module._PROCESSED_CONSTRAINTS_CACHE.clear()
+    monkeypatch.setattr(cc, "_MIN_PARAMS_FOR_SPARSE", np.inf)
+    pc_dense, pp_dense = process_constraints(constraints, params)
+    assert not sparse.issparse(pc_dense[0]["from_internal"])
+
+    assert pc_sparse[0]["index"] == pc_dense[0]["index"]
+    aaae(pc_sparse[0]["to_internal"].toarray(), pc_dense[0]["to_internal"])
+    aaae(pc_sparse[0]["from_internal"].toarray(), pc_dense[0]["from_internal"])
+    assert_frame_equal(pp_sparse, pp_dense)
+
+
+def test_reparametrize_with_sparse_linear_constraints(
+    empty_cache, many_linear_constraints
+):
+    params, constraints = many_linear_constraints
+    pc, pp = process_constraints(constraints, params)
+    internal = reparametrize_to_internal(pp, pc)
+    plan = compile_reparametrization_plan(pp, pc)
+
+    aaae(external_values_from_plan(internal, plan), params["value"].to_numpy())
+    assert len(plan.matrices) < 150 ** 2 / 2
+
+
+@pytest.fixture(params=["dense", "sparse"])
+def linear_path(request, monkeypatch):
+    min_params = np.inf if request.param == "dense" else 1
+    monkeypatch.setattr(cc, "_MIN_PARAMS_FOR_SPARSE", min_params)
+
+
+@pytest.mark.parametrize("n_params", [30, 200])
+def test_overlapping_increasing_constraints_are_dropped(
+    empty_cache, linear_path, n_params
+):
+    params = pd.DataFrame(
+        {"value": np.linspace(0, 1, n_params), "lower": -np.inf, "upper": np.inf}
+    )
+    windows = [
+        {"loc": list(range(start, start + 10)), "type": "increasing"}
+        for start in range(n_params - 9)
+    ]
+    pc_windows, _ = process_constraints(windows, params)
+
+    pc_module._PROCESSED_CONSTRAINTS_CACHE.clear()
+    single = [{"loc": list(range(n_params)), "type": "increasing"}]
+    pc_single, _ = process_constraints(single, params)
+
+    assert len(pc_windows) == 1
+    assert pc_windows[0]["index"] == pc_single[0]["index"]
+    assert_frame_equal(
+        pc_windows[0]["right_hand_side"], pc_single[0]["right_hand_side"]
+    )
+
+
+def test_duplicate_linear_constraints_keep_strictest_bounds(empty_cache):
+    params = pd.DataFrame({"value": [1.0, 2, 3], "lower": -np.inf, "upper": np.inf})
+    constraints = [
+        {"loc": [0, 1], "type": "increasing"},
+        {"loc": [0, 1], "type": "linear", "weights": [-2, 2], "lower": 0.5},
+    ]
+    pc, _ = process_constraints(constraints, params)
+
+    assert len(pc[0]["right_hand_side"]) == 1
+    assert pc[0]["right_hand_side"]["upper"].iloc[0] == -0.25
+
+
+def test_duplicate_linear_constraints_with_different_values_raise(
+    empty_cache, linear_path
+):
+    params = pd.DataFrame({"value": [1.0, 2, 3], "lower": -np.inf, "upper": np.inf})
+    constraints = [
+        {"loc": [0, 1], "type": "linear", "weights": [1, 1], "value": 3},
+        {"loc": [0, 1], "type": "linear", "weights": [2, 2], "value": 4},
+    ]
+    with pytest.raises(ValueError):
+        process_constraints(constraints, params)
+
+
+@pytest.fixture
+def implied_by_fixes():
+    params = pd.DataFrame({"value": [0.5, 0.5, 1.5], "lower": -np.inf, "upper": np.inf})
+    constraints = [
+        {"loc": [0, 1], "type": "linear", "weights": [1, 1], "value": 1},
+        {"loc": [1, 2], "type": "linear", "weights": [1, 1], "value": 2},
+    ]
+    return params, constraints
+
+
+@pytest.mark.parametrize(
+    "implied", [{"value": -1}, {"lower": -2}, {"lower": -1, "upper": 0}]
+)
+def test_linear_constraints_implied_by_fixes_are_dropped(
+    empty_cache, linear_path, implied_by_fixes, implied
+):
+    params, constraints = implied_by_fixes
+    constraints.append({"loc": [0, 2], "type": "linear", "weights": [1, -1], **implied})
+    pc, pp = process_constraints(constraints, params)
+
+    assert len(pc[0]["right_hand_side"]) == 2
+    internal = reparametrize_to_internal(pp, pc)
+    plan = compile_reparametrization_plan(pp, pc)
+    aaae(external_values_from_plan(internal, plan), params["value"].to_numpy())
+
+
+@pytest.fixture
+def weights_and_rhs_implied_by_fixes():
+    weights = pd.DataFrame([[1, 1, 0], [0, 1, 1], [1, 0, -1]], dtype=float)
+    rhs = pd.DataFrame(
+        {"value": [1, 2, np.nan], "lower": [-np.inf, -np.inf, -1.5], "upper": np.inf}
+    )
+    return weights, rhs
+
+
+def test_drop_linear_constraints_implied_by_fixes(weights_and_rhs_implied_by_fixes):
+    weights, rhs = weights_and_rhs_implied_by_fixes
+    new_weights, new_rhs = cc._drop_linear_constraints_implied_by_fixes(weights, rhs)
+    assert_frame_equal(new_weights, weights.iloc[:2])
+    assert_frame_equal(new_rhs, rhs.iloc[:2])
+
+
+@pytest.mark.parametrize("column, value", [("value", 0), ("lower", 0), ("upper", -2)])
+def test_linear_constraints_incompatible_with_fixes_raise(
+    weights_and_rhs_implied_by_fixes, column, value
+):
+    weights, rhs = weights_and_rhs_implied_by_fixes
+    rhs.loc[2, column] = value
+    with pytest.raises(ValueError):
+        cc._drop_linear_constraints_implied_by_fixes(weights, rhs)
+
+
+def test_join_overlapping_lists():
+    candidates = [[5, 3], [1, 2], [7], [3, 8], [2, 9], [8, 4, 6]]
+    expected = [[3, 4, 5, 6, 8], [1, 2, 9], [7]]
+    assert cc._join_overlapping_lists(candidates) == expected
+
+
+def test_consolidate_many_pairwise_equality_constraints():
+    n_groups, group_size = 1000, 5
+    pairs = [
+        [start + i, start + i + 1]
+        for start in range(0, n_groups * group_size, group_size)
+        for i in range(group_size - 1)
+    ]
+    order = np.random.default_rng(0).permutation(len(pairs))
+    equality_pc = [{"index": pairs[i], "type": "equality"} for i in order]
+
+    consolidated = cc._consolidate_equality_constraints(equality_pc)
+
+    assert len(consolidated) == n_groups
+    assert sorted(constr["index"][0] for constr in consolidated) == list(
+        range(0, n_groups * group_size, group_size)
+    )
+    assert all(len(constr["index"]) == group_size for constr in consolidated)
@@ -7,7 +7,13 @@ import pytest
 from numpy.testing import assert_array_almost_equal as aaae
 from pandas.testing import assert_series_equal
 
+from estimagic.differentiation.numdiff_np import first_derivative
 from estimagic.optimization.process_constraints import process_constraints
+from estimagic.optimization.reparametrize import batch_external_values_from_internal
+from estimagic.optimization.reparametrize import compile_reparametrization_plan
+from estimagic.optimization.reparametrize import external_values_from_internal
+from estimagic.optimization.reparametrize import external_values_from_plan
+from estimagic.optimization.reparametrize import reparametrization_jacobian
 from estimagic.optimization.reparametrize import reparametrize_from_internal
 from estimagic.optimization.reparametrize import reparametrize_to_internal
 
@@ -139,6 +145,76 @@ def test_reparametrize_from_internal(example_params, all_constraints, case, numb
     assert_series_equal(calculated_external_value, expected_external_value)
 
 
+@pytest.mark.parametrize("case, number", to_test)
+def test_external_values_from_plan(example_params, all_constraints, case, number):
+    constraints = all_constraints[case]
+    params = reduce_params(example_params, constraints)
+    params["value"] = params[f"value{number}"]
+
+    keep = params[f"internal_value{number}"].notnull()
+
+    pc, pp = process_constraints(constraints, params)
+    plan = compile_reparametrization_plan(pp, pc)
+
+    internal_p = params[f"internal_value{number}"][keep].to_numpy()
+    calculated_external_value = external_values_from_plan(internal_p, plan)
+
+    aaae(calculated_external_value, params["value"].to_numpy())
+
+
+@pytest.mark.parametrize("case, number", to_test)
+def test_batch_external_values_from_internal(
+    example_params, all_constraints, case, number
+):
+    constraints = all_constraints[case]
+    params = reduce_params(example_params, constraints)
+    params["value"] = params[f"value{number}"]
+
+    keep = params[f"internal_value{number}"].notnull()
+
+    pc, pp = process_constraints(constraints, params)
+    kwargs = {
+        "fixed_values": pp["_internal_fixed_value"].to_numpy(),
+        "pre_replacements": pp["_pre_replacements"].to_numpy(),
+        "processed_constraints": pc,
+        "post_replacements": pp["_post_replacements"].to_numpy(),
+    }
+
+    internal_p = params[f"internal_value{number}"][keep].to_numpy()
+    internal_batch = internal_p * np.array([[1], [1.01], [0.99]])
+
+    calculated = batch_external_values_from_internal(internal_batch, **kwargs)
+    expected = [external_values_from_internal(x, **kwargs) for x in internal_batch]
+
+    aaae(calculated, np.array(expected))
+    aaae(calculated[0], params["value"].to_numpy())
+
+
+@pytest.mark.parametrize("case, number", to_test)
+def test_reparametrization_jacobian(example_params, all_constraints, case, number):
+    constraints = all_constraints[case]
+    params = reduce_params(example_params, constraints)
+    params["value"] = params[f"value{number}"]
+
+    keep = params[f"internal_value{number}"].notnull()
+
+    pc, pp = process_constraints(constraints, params)
+    kwargs = {
+        "fixed_values": pp["_internal_fixed_value"].to_numpy(),
+        "pre_replacements": pp["_pre_replacements"].to_numpy(),
+        "processed_constraints": pc,
+        "post_replacements": pp["_post_replacements"].to_numpy(),
+    }
+
+    internal_p = params[f"internal_value{number}"][keep].to_numpy()
+    calculated = reparametrization_jacobian(internal_p, **kwargs)
+    expected = first_derivative(
+        external_values_from_internal, internal_p, func_kwargs=kwargs, method="central"
+    )
+
+    aaae(calculated, expected, decimal=5)
+
+
 invalid_cases = [
     "basic_probability",
     "uncorrelated_covariance",
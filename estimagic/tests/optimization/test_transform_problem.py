@@ -7,6 +7,7 @@ from pandas.testing import assert_frame_equal as afe
 
 import estimagic.optimization.transform_problem as tp
 from estimagic.decorators import expand_criterion_output
+from estimagic.optimization.evaluation_cache import EvaluationCache
 
 
 @pytest.fixture
@@ -26,22 +27,6 @@ def incomplete_params():
     return user_input
 
 
-def test_process_algorithm_correct_input():
-    res = tp._process_algorithm("nlopt_neldermead")
-    expected = ("nlopt", "neldermead")
-    assert res == expected
-
-
-def test_process_algorithm_wrong_algo_name():
-    with pytest.raises(NotImplementedError):
-        tp._process_algorithm("nlopt_neldremead")
-
-
-def test_process_algorithm_wrong_origin():
-    with pytest.raises(NotImplementedError):
-        tp._process_algorithm("nlpot_neldermead")
-
-
 def test_set_params_defaults_if_missing_minimal_params(minimal_params):
     user_input = minimal_params
     expected = user_input.copy()
@@ -167,12 +152,47 @@ def test_internal_gradient_with_user_provided_gradient():
         criterion_kwargs={},
         general_options={},
         database=False,
+        evaluation_cache=EvaluationCache(),
     )
     calc = grad(np.array([0.5, 1, 2]))
     aaae(calc, np.array([0.5, 1, 2]))
     assert isinstance(calc, np.ndarray)
 
 
+def sum_of_squares(params):
+    return (params["value"] ** 2).sum(), pd.DataFrame({"value": [np.nan]})
+
+
+def test_parallel_numerical_gradient_fills_cache_of_parent_process():
+    test_params = pd.DataFrame()
+    test_params["value"] = [0.5, 1, 2]
+    test_params["name"] = ["a", "b", "c"]
+    test_params["_internal_free"] = True
+    test_params["_internal_fixed_value"] = np.nan
+    test_params["_pre_replacements"] = [0, 1, 2]
+    test_params["_post_replacements"] = -1
+    cache = EvaluationCache()
+    grad = tp._create_internal_gradient(
+        gradient=None,
+        gradient_kwargs={},
+        gradient_options={"n_cores": 2, "respect_bounds": False},
+        criterion=sum_of_squares,
+        params=test_params,
+        constraints=[],
+        criterion_kwargs={},
+        general_options={},
+        database=False,
+        evaluation_cache=cache,
+    )
+    x = np.array([0.5, 1, 2])
+    aaae(grad(x), 2 * x, decimal=4)
+    assert cache.misses == 4
+
+    # the criterion at x and the three forward steps are cached.
+    aaae(grad(x), 2 * x, decimal=4)
+    assert (cache.hits, cache.misses) == (4, 4)
+
+
 def test_get_internal_bounds():
     params = pd.DataFrame()
     params["_internal_free"] = [True, False, False, True]
@@ -0,0 +1,37 @@
+"""Test that importing estimagic does not load optional backends."""
+import subprocess
+import sys
+from pathlib import Path
+
+import estimagic
+
+OPTIONAL_MODULES = [
+    "bokeh",
+    "joblib",
+    "petsc4py",
+    "pygmo",
+    "scipy.optimize",
+    "scipy.stats",
+]
+
+
+def _run_in_fresh_interpreter(code):
+    # estimagic is not installed in the test environment, so the interpreter is
+    # started in the root of the repository.
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+        cwd=Path(estimagic.__file__).parents[1],
+    )
+    return output.stdout.strip()
+
+
+def test_import_does_not_load_optional_backends():
+    code = (
+        "import sys; import estimagic; "
+        f"print(','.join(m for m in {OPTIONAL_MODULES} if m in sys.modules))"
+    )
+    loaded = _run_in_fresh_interpreter(code)
+    assert loaded == ""
@@ -0,0 +1,127 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from estimagic.worker_pool import _is_large
+from estimagic.worker_pool import WorkerPool
+
+
+def _sum(arr, offset=0):
+    return arr.sum() + offset
+
+
+def _loaded_tokens():
+    from estimagic.worker_pool import _WORKER_CACHE
+
+    return list(_WORKER_CACHE)
+
+
+def _is_memmap(obj):
+    if isinstance(obj, pd.DataFrame):
+        obj = obj._mgr.blocks[0].values
+    return isinstance(obj, np.memmap) and not obj.flags.writeable
+
+
+def _sleep(seconds):
+    import time
+
+    time.sleep(seconds)
+
+
+def _sleep_long():
+    _sleep(60)
+
+
+@pytest.fixture
+def pool():
+    with WorkerPool(n_cores=1, cache_threshold=100) as pool:
+        yield pool
+
+
+def test_submit_and_map(pool):
+    arr = np.arange(100.0)
+    assert pool.submit(_sum, arr, offset=1).result() == arr.sum() + 1
+    assert pool.map(_sum, [arr, arr + 1]) == [arr.sum(), arr.sum() + 100]
+
+
+def test_large_objects_are_cached_once(pool):
+    arr = np.arange(100.0)
+    pool.map(_sum, [arr, arr.copy()])
+    assert len(pool._cached_files) == 1
+    assert len(pool.submit(_loaded_tokens).result()) == 1
+
+
+def test_modified_object_is_sent_again(pool):
+    arr = np.arange(100.0)
+    first = pool.submit(_sum, arr).result()
+    arr[0] = 1000
+    second = pool.submit(_sum, arr).result()
+    assert second == first + 1000
+    assert len(pool._cached_files) == 2
+
+
+@pytest.mark.parametrize(
+    "obj", [np.arange(100.0), pd.DataFrame(np.ones((20, 5)), columns=list("abcde"))]
+)
+def test_workers_receive_read_only_memory_maps(pool, obj):
+    assert pool.submit(_is_memmap, obj).result()
+
+
+def test_small_objects_are_not_memory_mapped(pool):
+    assert not pool.submit(_is_memmap, np.arange(3.0)).result()
+
+
+def test_temp_folder(tmp_path):
+    with WorkerPool(n_cores=1, cache_threshold=100, temp_folder=tmp_path) as pool:
+        pool.submit(_sum, np.arange(100.0)).result()
+        assert len(list(tmp_path.glob("estimagic_worker_pool_*/*.pkl"))) == 1
+
+
+def test_cache_size_is_respected():
+    with WorkerPool(n_cores=1, cache_threshold=100, cache_size=2) as pool:
+        for i in range(4):
+            pool.submit(_sum, np.full(100, float(i))).result()
+        assert len(pool._cached_files) == 2
+        assert len(list(pool._cache_dir.iterdir())) == 2
+        assert len(pool.submit(_loaded_tokens).result()) <= 2
+
+
+def test_files_of_pending_tasks_are_not_removed():
+    with WorkerPool(n_cores=1, cache_threshold=100, cache_size=2) as pool:
+        pool.submit(_sleep, 0.5)
+        arrays = [np.full(100, float(i)) for i in range(5)]
+        futures = [pool.submit(_sum, arr) for arr in arrays]
+        assert [f.result() for f in futures] == [arr.sum() for arr in arrays]
+
+        pool.submit(_sum, np.full(100, 5.0)).result()
+        assert len(pool._cached_files) == 2
+        assert len(list(pool._cache_dir.iterdir())) == 2
+
+
+def test_cancel_running_task(pool):
+    future = pool.submit(_sleep_long)
+    while not future.running():
+        pass
+    pool.cancel([future])
+    assert pool.submit(_sum, np.ones(3)).result() == 3
+
+
+def test_pool_cannot_be_pickled(pool):
+    with pytest.raises(TypeError):
+        pickle.dumps(pool)
+
+
+def test_shutdown_removes_cache_dir():
+    pool = WorkerPool(n_cores=1, cache_threshold=100)
+    pool.submit(_sum, np.arange(100.0)).result()
+    cache_dir = pool._cache_dir
+    pool.shutdown()
+    assert not cache_dir.exists()
+
+
+def test_is_large():
+    assert _is_large(pd.DataFrame(np.ones((10, 10))), 800)
+    assert not _is_large(np.ones(10), 800)
+    assert not _is_large(list(range(1000)), 1)
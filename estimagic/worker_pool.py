@@ -0,0 +1,289 @@
+"""A pool of worker processes that can be reused across calls of estimagic functions.
+
+Every call of :func:`~estimagic.optimization.optimize.minimize` with several
+optimizations or of :func:`~estimagic.differentiation.numdiff_np.first_derivative` with
+several cores would otherwise start new processes and send the criterion function and
+all its data to them. In bootstrap or simulation studies with thousands of calls, this
+overhead can dominate the runtime.
+
+A :class:`WorkerPool` keeps its processes alive between calls. Large numpy arrays and
+pandas objects in the submitted tasks are written to a temporary directory once and are
+replaced by a small token that identifies them by the hash of their content. Each
+worker memory maps a cached object the first time it encounters its token and keeps
+the memory map for later tasks. Thus, all workers share one copy of the data and the
+memory usage does not grow with the number of workers.
+
+"""
+import functools
+import io
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import Counter
+from collections import OrderedDict
+from pathlib import Path
+
+import cloudpickle
+import joblib
+import numpy as np
+import pandas as pd
+from joblib.externals.loky import ProcessPoolExecutor
+
+# Objects cached on the worker side. Maps tokens to loaded objects.
+_WORKER_CACHE = OrderedDict()
+
+# Minimal free space of the shared memory file system to use it for the cache.
+_SHARED_MEMORY_MIN_SIZE = 2e9
+
+
+class WorkerPool:
+    """Pool of worker processes that is kept alive across calls of estimagic functions.
+
+    A WorkerPool can be passed to :func:`~estimagic.optimization.optimize.minimize`,
+    :func:`~estimagic.optimization.optimize.maximize` and
+    :func:`~estimagic.estimation.estimate.maximize_log_likelihood` via the
+    ``"worker_pool"`` entry of ``general_options`` and to
+    :func:`~estimagic.differentiation.numdiff_np.first_derivative` via its
+    ``worker_pool`` argument.
+
+    Numpy arrays, DataFrames and Series that have at least ``cache_threshold`` bytes are
+    written to ``temp_folder`` once and are memory mapped by the workers. They are
+    identified by a hash of their content, so a new array with the same content hits the
+    cache while a modified array is written again. The workers receive read-only views
+    of the cached objects, i.e. the functions that are run on the workers must not
+    modify them inplace.
+
+    Args:
+        n_cores (int): Number of worker processes.
+        cache_threshold (int): Minimal size in bytes of an array or pandas object to be
+            cached on the workers. Default 1e6.
+        cache_size (int): Maximal number of cached objects. Default 4. Objects that
+            are used by tasks that are not done yet are kept in addition.
+        temp_folder (str or pathlib.Path): Directory in which the cached objects are
+            stored. By default, the shared memory file system ``/dev/shm`` is used if
+            it has enough free space and the default temporary directory otherwise.
+
+    Examples:
+        >>> with WorkerPool(n_cores=2) as pool:
+        ...     pool.map(abs, [-1, 2])
+        [1, 2]
+
+    """
+
+    def __init__(self, n_cores, cache_threshold=1e6, cache_size=4, temp_folder=None):
+        self.n_cores = n_cores
+        self.cache_threshold = cache_threshold
+        self.cache_size = cache_size
+        temp_folder = _default_temp_folder() if temp_folder is None else temp_folder
+        self._cache_dir = Path(
+            tempfile.mkdtemp(prefix="estimagic_worker_pool_", dir=temp_folder)
+        )
+        self._cached_files = OrderedDict()
+        # number of submitted tasks that are not done yet per token.
+        self._tokens_in_use = Counter()
+        self._lock = threading.Lock()
+        self._executor = ProcessPoolExecutor(max_workers=n_cores)
+        self._finalizer = weakref.finalize(
+            self, shutil.rmtree, str(self._cache_dir), ignore_errors=True
+        )
+
+    def submit(self, func, *args, **kwargs):
+        """Schedule ``func(*args, **kwargs)`` to be run on a worker.
+
+        Returns:
+            future (concurrent.futures.Future)
+
+        """
+        return self.submit_all(func, [(args, kwargs)])[0]
+
+    def submit_all(self, func, arguments):
+        """Schedule one call of ``func`` per entry in ``arguments``.
+
+        Large objects that are shared between the calls are only hashed once. Their
+        files are not removed from the cache before all tasks that use them are done.
+
+        Args:
+            func (callable): The function that is run on the workers.
+            arguments (list): List of tuples with the positional and keyword arguments
+                of each call.
+
+        Returns:
+            futures (list): List of concurrent.futures.Future objects.
+
+        """
+        memo = {}
+        futures = []
+        for args, kwargs in arguments:
+            payload, tokens = self._serialize((func, args, kwargs), memo)
+            with self._lock:
+                self._tokens_in_use.update(tokens)
+            future = self._executor.submit(
+                _run_serialized_task, payload, self.cache_size
+            )
+            future.add_done_callback(functools.partial(self._release, tokens))
+            futures.append(future)
+        return futures
+
+    def map(self, func, iterable):
+        """Evaluate ``func`` at each element of ``iterable`` on the workers.
+
+        Returns:
+            results (list): The results in the order of ``iterable``.
+
+        """
+        futures = self.submit_all(func, [((arg,), {}) for arg in iterable])
+        return [future.result() for future in futures]
+
+    def cancel(self, futures):
+        """Cancel futures that were submitted to this pool.
+
+        Futures that have not started yet are simply cancelled. If some of the futures
+        are already running, all workers are terminated and replaced by new ones. This
+        also affects other tasks that are running on the pool and clears the caches of
+        the workers.
+
+        Args:
+            futures (list): List of concurrent.futures.Future objects.
+
+        """
+        running = [f for f in futures if not f.cancel() and not f.done()]
+        if len(running) > 0:
+            self._executor.shutdown(wait=False, kill_workers=True)
+            self._executor = ProcessPoolExecutor(max_workers=self.n_cores)
+
+    def shutdown(self, wait=True):
+        """Shut down the workers and remove the temporary files of the cache."""
+        self._executor.shutdown(wait=wait)
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def __reduce__(self):
+        raise TypeError("A WorkerPool cannot be pickled or used inside of a worker.")
+
+    def _serialize(self, obj, memo):
+        buffer = io.BytesIO()
+        pickler = _CachingPickler(buffer, self._persistent_id, memo)
+        pickler.dump(obj)
+        return buffer.getvalue(), pickler.tokens
+
+    def _release(self, tokens, future):
+        """Mark the cached files of a task as no longer used when it is done."""
+        with self._lock:
+            for token in tokens:
+                self._tokens_in_use[token] -= 1
+                if self._tokens_in_use[token] == 0:
+                    del self._tokens_in_use[token]
+
+    def _persistent_id(self, obj, memo):
+        """Return the token and path of large objects and None for all others."""
+        if not _is_large(obj, self.cache_threshold):
+            return None
+
+        if id(obj) not in memo:
+            token = joblib.hash(obj)
+            if token not in self._cached_files:
+                path = self._cache_dir / f"{token}.pkl"
+                joblib.dump(obj, path)
+                self._cached_files[token] = path
+            self._cached_files.move_to_end(token)
+            # keep a reference to obj such that its id cannot be reused.
+            memo[id(obj)] = (obj, (token, str(self._cached_files[token])))
+            with self._lock:
+                in_use = set(self._tokens_in_use)
+            in_use.update(pid[0] for _, pid in memo.values())
+            self._remove_old_files(in_use)
+
+        return memo[id(obj)][1]
+
+    def _remove_old_files(self, in_use):
+        """Remove the least recently used files if there are more than cache_size.
+
+        Files of the current call and of tasks that are not done yet are kept, even if
+        this exceeds cache_size.
+
+        """
+        for token in list(self._cached_files):
+            if len(self._cached_files) <= self.cache_size:
+                break
+            if token not in in_use:
+                self._cached_files.pop(token).unlink()
+
+
+class _CachingPickler(cloudpickle.CloudPickler):
+    """Pickler that replaces large objects by a reference to their cached version."""
+
+    def __init__(self, file, persistent_id, memo):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._get_persistent_id = persistent_id
+        self._memo = memo
+        # tokens of the cached objects that are referenced in the pickle.
+        self.tokens = set()
+
+    def persistent_id(self, obj):
+        pid = self._get_persistent_id(obj, self._memo)
+        if pid is not None:
+            self.tokens.add(pid[0])
+        return pid
+
+
+class _CachingUnpickler(pickle.Unpickler):
+    """Unpickler that resolves references to cached objects on the worker."""
+
+    def __init__(self, file, cache_size):
+        super().__init__(file)
+        self._cache_size = cache_size
+
+    def persistent_load(self, pid):
+        token, path = pid
+        if token not in _WORKER_CACHE:
+            _WORKER_CACHE[token] = joblib.load(path, mmap_mode="r")
+            while len(_WORKER_CACHE) > self._cache_size:
+                _WORKER_CACHE.popitem(last=False)
+        _WORKER_CACHE.move_to_end(token)
+        return _WORKER_CACHE[token]
+
+
+def _run_serialized_task(payload, cache_size):
+    """Deserialize and run a task on a worker."""
+    func, args, kwargs = _CachingUnpickler(io.BytesIO(payload), cache_size).load()
+    return func(*args, **kwargs)
+
+
+def _default_temp_folder():
+    """Return /dev/shm if it has enough free space and None otherwise.
+
+    None means that the default temporary directory of the system is used.
+
+    """
+    shared_memory = "/dev/shm"
+    try:
+        stats = os.statvfs(shared_memory)
+    except (AttributeError, OSError):
+        return None
+    has_enough_space = stats.f_bavail * stats.f_frsize >= _SHARED_MEMORY_MIN_SIZE
+    writable = os.access(shared_memory, os.W_OK)
+    return shared_memory if has_enough_space and writable else None
+
+
+def _is_large(obj, threshold):
+    """Check if obj is an array or pandas object with at least threshold bytes.
+
+    The size of pandas objects is approximated by eight bytes per entry because
+    computing their exact memory usage is slow for small objects.
+
+    """
+    if isinstance(obj, np.ndarray):
+        nbytes = obj.nbytes
+    elif isinstance(obj, (pd.DataFrame, pd.Series)):
+        nbytes = 8 * obj.size
+    else:
+        nbytes = 0
+    return nbytes >= threshold